@@ -1,54 +1,46 @@
 # 引入必要的函式庫
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
+import datetime
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
-import time
-import random
+import browser_pool
+import http_fetch
 
-def fetch_aaii_bull_bear_diff():
-    """爬取 AAII 最新一筆看多與看空百分比，並計算差值 (v2.0: 修復崩潰)"""
-    TARGET_URL = "https://www.stockq.org/economy/aaiisurvey.php"
-    
-    chrome_options = Options()
-    # --- 關鍵修正：使用新版 Headless 模式 ---
-    chrome_options.add_argument("--headless=new") 
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--window-size=1920,1080")
-    
-    # --- 關鍵修正：加入偽裝機制 ---
-    chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36')
-    chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-    chrome_options.add_experimental_option('excludeSwitches', ['enable-automation'])
-    chrome_options.add_experimental_option('useAutomationExtension', False)
-    
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    
-    # 移除 webdriver 標記
-    driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
-        'source': 'Object.defineProperty(navigator, "webdriver", {get: () => undefined})'
-    })
-    
+TARGET_URL = "https://www.stockq.org/economy/aaiisurvey.php"
+ROW_SELECTOR = "table.economytable tr.row2"
+
+def _parse_cells(cells):
+    # cells[1] = 看多, cells[3] = 看空
+    bull = float(cells[1].strip().replace('%',''))
+    bear = float(cells[3].strip().replace('%',''))
+    return bull, bear, bull - bear
+
+def _parse_row(cells):
+    """最新一列：解析數值，並把該列的調查日期 (cells[0]，例如 2025/12/04) 記為來源日期"""
+    values = _parse_cells(cells)
     try:
+        http_fetch.set_source_date(datetime.datetime.strptime(cells[0].strip(), '%Y/%m/%d').date())
+    except ValueError:
+        pass  # 讀不到日期時由結果快取依公布時間推算
+    return values
+
+def _fetch_via_http():
+    """第一層：stockq 的表格是伺服器端產生的，直接解析 HTML 即可"""
+    row = http_fetch.soup(http_fetch.get_html(TARGET_URL)).select_one(ROW_SELECTOR)
+    if row is None:
+        raise ValueError(f"找不到元素: {ROW_SELECTOR}")
+    return _parse_row([td.get_text() for td in row.find_all("td")])
+
+def _fetch_via_selenium():
+    with browser_pool.session() as driver:
         driver.get(TARGET_URL)
-        time.sleep(random.uniform(2, 4)) # 隨機等待
-        wait = WebDriverWait(driver, 15)
         # 等待表格出現
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "table.economytable tr.row2")))
+        browser_pool.wait_for(driver, (By.CSS_SELECTOR, ROW_SELECTOR), 15)
         # 取得最新一筆 row2 的所有欄位
-        first_row = driver.find_element(By.CSS_SELECTOR, "table.economytable tr.row2")
-        tds = first_row.find_elements(By.TAG_NAME, "td")
-        # tds[1] = 看多, tds[3] = 看空
-        bull = float(tds[1].text.strip().replace('%',''))
-        bear = float(tds[3].text.strip().replace('%',''))
-        diff = bull - bear
-        return bull, bear, diff
+        first_row = driver.find_element(By.CSS_SELECTOR, ROW_SELECTOR)
+        return _parse_row([td.text for td in first_row.find_elements(By.TAG_NAME, "td")])
+
+def fetch_aaii_bull_bear_diff():
+    """爬取 AAII 最新一筆看多與看空百分比，並計算差值 (v4.0: HTTP 優先，Selenium 備援)"""
+    try:
+        return http_fetch.tiered(('http', _fetch_via_http), ('selenium', _fetch_via_selenium))
     except Exception as e:
         return None, None, f"抓取錯誤: {str(e)[:100]}"
-    finally:
-        driver.quit()
@@ -0,0 +1,193 @@
+# --- backfill.py (v1.0: 市場欄位批次回填) ---
+# 以少數幾次「多年 × 多代號」的 yf.download，重建歷史資料中所有 yfinance 來源的欄位：
+#   SPX / NDX 開高低收量、3M 殖利率、VIX、DXY、BTC 漲跌、HYG、IWM、SOXX、XLY/XLP 比值、RSI
+# - 衍生欄位 (RSI、BTC 漲跌、風險比值) 以 pandas 整欄向量化計算，不逐日呼叫抓取函式
+# - 依年份切塊，每完成一塊記錄已完成到哪一天 (data/cache/backfill.json)，中斷後重跑會從下一天繼續
+# - 只補空白欄位，不覆蓋每日實際抓到的值 (--overwrite 可強制覆蓋)
+# - fill_gaps()：每日執行時自動找出漏跑的交易日並補上市場欄位
+#
+# 用法: python backfill.py --start 2015-01-01 [--end 2025-12-09] [--years 5] [--overwrite] [--restart]
+#       python backfill.py --gaps
+import os
+import json
+import time
+import datetime
+import argparse
+import pandas as pd
+import bar_cache
+import history_store
+import trading_calendar
+
+CHECKPOINT_FILE = "data/cache/backfill.json"
+CHUNK_YEARS = 5     # 每次批次下載涵蓋幾年
+WARMUP_DAYS = 120   # 每塊往前多抓的日曆天數，讓 RSI (Wilder 平滑) 收斂、BTC 漲跌有前一天可比
+
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+# 收盤價直接寫入的欄位：代號 → 歷史欄位
+CLOSE_COLUMNS = {
+    '^IRX': '3M_Yield',
+    '^VIX': 'VIX',
+    'DX-Y.NYB': 'DXY',
+    'HYG': 'HYG_Price',
+    'IWM': 'IWM_Price',
+    'SOXX': 'SOXX_Price',
+}
+TICKERS = ['^GSPC', '^NDX', 'BTC-USD', 'XLY', 'XLP'] + list(CLOSE_COLUMNS)
+
+COLUMNS = ([f'{p}_{f}' for p in ('SPX', 'NDX') for f in OHLCV]
+           + list(CLOSE_COLUMNS.values()) + ['RSI', 'BTC_Chg', 'Risk_Ratio'])
+
+def _fmt(series, spec):
+    """數值欄轉成與每日存檔相同格式的字串，缺值為空白"""
+    return series.map(lambda x: "" if pd.isna(x) else format(x, spec))
+
+def rsi(close, period=14):
+    """Wilder RSI (與 data_fetchers.fetch_rsi_index 相同算法，但整欄一次算完)"""
+    delta = close.diff()
+    gain = delta.clip(lower=0).ewm(com=period - 1, adjust=False).mean()
+    loss = (-delta.clip(upper=0)).ewm(com=period - 1, adjust=False).mean()
+    return 100 - 100 / (1 + gain / loss)
+
+def build_rows(frames, dates):
+    """
+    frames : {ticker: 日 K DataFrame} (bar_cache.download 的結果，需含暖身區間)
+    dates  : 要產生的交易日 (datetime.date 清單)
+    回傳 list of dict (只含 COLUMNS 欄位)；該日沒有 SPX 收盤價的交易日略過。
+    """
+    idx = pd.DatetimeIndex(pd.to_datetime(dates))
+    out = pd.DataFrame(index=idx)
+
+    def close(sym):
+        frame = frames.get(sym)
+        return frame['Close'] if frame is not None else pd.Series(dtype=float)
+
+    for sym, prefix in (('^GSPC', 'SPX'), ('^NDX', 'NDX')):
+        frame = frames.get(sym, pd.DataFrame(columns=OHLCV)).reindex(idx)
+        for f in OHLCV[:-1]:
+            out[f'{prefix}_{f}'] = _fmt(frame[f], '.2f')
+        out[f'{prefix}_Volume'] = _fmt(frame['Volume'], '.0f')
+
+    for sym, col in CLOSE_COLUMNS.items():
+        out[col] = _fmt(close(sym).reindex(idx), '.2f')
+
+    # 衍生欄位：先在各自完整的序列上算，再對齊到交易日
+    out['RSI'] = _fmt(rsi(close('^GSPC')).reindex(idx), '.1f')
+    # BTC 週末也交易，漲跌幅要在自己的日曆上算 (與每日排程取「最後兩根日 K」一致)
+    out['BTC_Chg'] = _fmt((close('BTC-USD').pct_change() * 100).reindex(idx), '.2f')  # 與每日存檔相同 (不帶正號)
+    ratio = pd.concat({'XLY': close('XLY'), 'XLP': close('XLP')}, axis=1).dropna()
+    out['Risk_Ratio'] = _fmt((ratio['XLY'] / ratio['XLP']).reindex(idx), '.2f')
+
+    out = out[out['SPX_Close'] != ""]
+    out.insert(0, 'Date', out.index.strftime('%Y-%m-%d'))
+    return out.to_dict('records')
+
+def backfill_range(start, end, overwrite=False):
+    """下載 [start, end] (含暖身區間) 並寫入歷史資料庫，回傳有變動的筆數"""
+    dates = trading_calendar.sessions(start, end)
+    if not dates: return 0
+    frames = bar_cache.download(TICKERS, start=(start - datetime.timedelta(days=WARMUP_DAYS)).isoformat(),
+                                end=(end + datetime.timedelta(days=1)).isoformat())
+    if '^GSPC' not in frames:
+        raise RuntimeError("^GSPC 下載失敗")
+    rows = build_rows(frames, dates)
+    return history_store.upsert(rows, COLUMNS, overwrite=overwrite)
+
+def _chunks(start, end, years):
+    cur = start
+    while cur <= end:
+        stop = min(datetime.date(cur.year + years, 1, 1) - datetime.timedelta(days=1), end)
+        yield cur, stop
+        cur = stop + datetime.timedelta(days=1)
+
+def _load_checkpoint():
+    try:
+        with open(CHECKPOINT_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def _save_checkpoint(state):
+    os.makedirs(os.path.dirname(CHECKPOINT_FILE), exist_ok=True)
+    tmp = CHECKPOINT_FILE + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp, CHECKPOINT_FILE)
+
+def _default_end():
+    """
+    最後一個已收盤交易日；但那天若還沒有每日存檔 (排程會寫入完整的一列)，就只回填到前一個交易日，
+    避免先寫入只有市場欄位的列，讓當天的每日存檔誤判為已存在
+    """
+    latest = trading_calendar.last_completed_session()
+    row = history_store.get_row(latest.isoformat())
+    return latest if row and row.get('SPX_Close') else trading_calendar.previous_session(latest)
+
+def run(start, end=None, years=CHUNK_YEARS, overwrite=False, restart=False):
+    """
+    分塊回填 [start, end]；同樣的參數重跑時，從上次完成的日期之後繼續。
+    檢查點只以 start 與明確指定的參數區分：沒有指定 end 時，隔天重跑會沿用進度、只往後延伸新的交易日。
+    restart=True 忽略檢查點從頭開始。
+    """
+    job = f"{start}~{end or ''} years={years} overwrite={overwrite}"
+    end = end or _default_end()
+    state = _load_checkpoint()
+    if restart or state.get('job') != job:
+        state = {'job': job, 'through': None}
+
+    resume = start
+    if state['through']:
+        resume = datetime.date.fromisoformat(state['through']) + datetime.timedelta(days=1)
+        print(f"⏭️ {start} ~ {state['through']} 已完成，" + (f"從 {resume} 繼續" if resume <= end else "沒有新的交易日"))
+
+    total = 0
+    for a, b in _chunks(resume, end, years):
+        t0 = time.perf_counter()
+        changed = backfill_range(a, b, overwrite)
+        total += changed
+        state['through'] = b.isoformat()
+        _save_checkpoint(state)
+        print(f"✅ {a}~{b}: 更新 {changed} 筆 ({time.perf_counter() - t0:.1f} 秒)")
+    return total
+
+def find_gaps(start=None, end=None):
+    """資料庫第一天 (或 start) 到 end 之間，尚未寫入的交易日"""
+    if start is None:
+        first = history_store.first_date()
+        if not first: return []
+        start = datetime.date.fromisoformat(first)
+    end = end or trading_calendar.last_completed_session()
+    days = [d.isoformat() for d in trading_calendar.sessions(start, end)]
+    return [datetime.date.fromisoformat(d) for d in history_store.missing_sessions(days)]
+
+def fill_gaps():
+    """每日執行用：偵測漏跑的交易日，以一次批次下載補上市場欄位 (情緒類欄位無法回溯，維持空白)"""
+    try:
+        gaps = find_gaps()
+        if not gaps:
+            return 0
+        print(f"🩹 發現 {len(gaps)} 個缺漏交易日 ({gaps[0]} ~ {gaps[-1]})，開始補資料...")
+        changed = backfill_range(gaps[0], gaps[-1])
+        print(f"🩹 已補上 {changed} 筆")
+        return changed
+    except Exception as e:
+        print(f"⚠️ 缺漏補齊失敗: {e}")
+        return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="批次回填歷史資料的市場 (yfinance) 欄位")
+    parser.add_argument("--start", help="起始日期 YYYY-MM-DD")
+    parser.add_argument("--end", help="結束日期 YYYY-MM-DD (預設最後一個已收盤交易日，當天尚未每日存檔時到前一個交易日)")
+    parser.add_argument("--years", type=int, default=CHUNK_YEARS, help="每次批次下載涵蓋的年數")
+    parser.add_argument("--overwrite", action="store_true", help="覆蓋已有的值 (預設只補空白欄位)")
+    parser.add_argument("--restart", action="store_true", help="忽略檢查點從頭開始")
+    parser.add_argument("--gaps", action="store_true", help="只補資料庫中缺漏的交易日")
+    args = parser.parse_args()
+
+    if args.gaps:
+        fill_gaps()
+    elif args.start:
+        end = datetime.date.fromisoformat(args.end) if args.end else None
+        total = run(datetime.date.fromisoformat(args.start), end, args.years, args.overwrite, args.restart)
+        print(f"💾 回填完成，共更新 {total} 筆")
+    else:
+        parser.print_help()
@@ -0,0 +1,127 @@
+# --- backtest.py (v1.0: 向量化回測) ---
+# 用 config.INDICATORS 的門檻規則 (含 get_indicator_status 的 VIX / PUT_CALL / BTC 特例)
+# 一次套用到整段歷史資料，算出每天的多空票數，並統計各結論之後 1 / 5 / 20 日的 SPX 報酬。
+# 全部以 NumPy 陣列運算，沒有逐列的 Python 迴圈。
+#
+# 用法: python backtest.py [--start 2025-12-01] [--end 2026-06-30]
+import time
+import argparse
+import numpy as np
+import history_store
+from config import INDICATORS
+
+HORIZONS = (1, 5, 20)
+MA_WINDOW = 20
+# 與 calculate_summary 的三種結論對應
+VERDICTS = {1: "🟢 Risk On", -1: "🔴 Risk Off", 0: "⚪ 觀望"}
+# 規則為「大於 g 偏多、小於 r 偏空」的特例 (其餘依 inverse 判斷)
+SPECIAL_KEYS = ('BTC', 'PUT_CALL', 'VIX')
+
+def load_arrays(start=None, end=None):
+    """讀入歷史資料，回傳 (日期陣列, {欄位: float64 陣列})"""
+    frame = history_store.load_frame(start, end)
+    return frame.index.to_numpy(), {col: frame[col].to_numpy(dtype=np.float64) for col in frame.columns}
+
+def rolling_mean(values, window):
+    """移動平均 (視窗內有缺值則為 NaN)，用累積和計算"""
+    valid = ~np.isnan(values)
+    csum = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+    count = np.concatenate(([0], np.cumsum(valid)))
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        sums = csum[window:] - csum[:-window]
+        full = (count[window:] - count[:-window]) == window
+        out[window - 1:] = np.where(full, sums / window, np.nan)
+    return out
+
+def vector_signal(key, values, thresholds=None):
+    """
+    對整條數列套用指標規則，回傳 +1 (🟢) / -1 (🔴) / 0 (中性或無資料)。
+    thresholds 預設取 config；參數掃描時可傳入可廣播的陣列，例如 g 形狀 (N, 1)。
+    ma_trend 以歷史資料本身的收盤價計算 MA20 (缺資料的日子會讓 MA 變成 NaN)。
+    """
+    cfg = INDICATORS[key]
+    thresholds = cfg['thresholds'] if thresholds is None else thresholds
+
+    if isinstance(thresholds, str):
+        if thresholds == 'ma_trend':
+            ref = rolling_mean(values, MA_WINDOW)
+        else:  # 'arrow_trend': 與前一筆比較
+            ref = np.concatenate(([np.nan], values[:-1]))
+        ok = ~np.isnan(ref) & ~np.isnan(values)
+        return np.where(ok, np.where(values > ref, 1, -1), 0).astype(np.int8)
+
+    g_limit, r_limit = (np.asarray(t, dtype=np.float64) for t in thresholds)
+    # NaN 的比較結果一律為 False，自然落在 0 (無法判讀)
+    if key in SPECIAL_KEYS:
+        bull, bear = values > g_limit, values < r_limit
+    elif cfg.get('inverse'):
+        bull, bear = values <= g_limit, values >= r_limit
+    else:
+        bull, bear = values >= g_limit, values <= r_limit
+    return np.where(bull, 1, np.where(bear, -1, 0)).astype(np.int8)
+
+def forward_returns(close, horizon):
+    """第 t 天收盤買進、持有 horizon 天後的報酬；最後 horizon 天為 NaN"""
+    out = np.full(close.shape, np.nan)
+    if len(close) > horizon:
+        out[:-horizon] = close[horizon:] / close[:-horizon] - 1
+    return out
+
+def verdict_stats(verdict, forward):
+    """依結論分組統計前瞻報酬: {結論: {horizon: (樣本數, 平均, 中位數, 勝率)}}"""
+    stats = {}
+    for v in VERDICTS:
+        stats[v] = {}
+        for h, fwd in forward.items():
+            sample = fwd[(verdict == v) & ~np.isnan(fwd)]
+            if sample.size:
+                stats[v][h] = (sample.size, sample.mean(), np.median(sample), (sample > 0).mean())
+            else:
+                stats[v][h] = (0, np.nan, np.nan, np.nan)
+    return stats
+
+def evaluate(columns, keys=None, horizons=HORIZONS):
+    """
+    純向量運算部分 (不含讀檔)。回傳 dict:
+    signals (K×T 的 +1/-1/0 矩陣)、bulls / bears (每天票數)、verdict、forward、stats
+    """
+    keys = keys or [k for k in INDICATORS if k in history_store.INDICATOR_COLUMNS]
+    signals = np.vstack([vector_signal(k, columns[history_store.INDICATOR_COLUMNS[k]]) for k in keys])
+    bulls = (signals > 0).sum(axis=0)
+    bears = (signals < 0).sum(axis=0)
+    verdict = np.sign(bulls - bears)
+    forward = {h: forward_returns(columns['SPX_Close'], h) for h in horizons}
+    return {
+        'keys': keys, 'signals': signals, 'bulls': bulls, 'bears': bears,
+        'verdict': verdict, 'forward': forward, 'stats': verdict_stats(verdict, forward),
+    }
+
+def run(start=None, end=None):
+    dates, columns = load_arrays(start, end)
+    if not len(dates):
+        print("⚠️ 區間內沒有歷史資料")
+        return None
+
+    t0 = time.perf_counter()
+    result = evaluate(columns)
+    elapsed = (time.perf_counter() - t0) * 1000
+    result['dates'] = dates
+
+    print(f"📊 回測區間 {dates[0]} ~ {dates[-1]} ({len(dates)} 天, {len(result['keys'])} 個指標, 運算 {elapsed:.1f} ms)")
+    for v, name in VERDICTS.items():
+        days = int((result['verdict'] == v).sum())
+        print(f"\n{name}: {days} 天")
+        for h, (n, mean, median, win) in result['stats'][v].items():
+            if n:
+                print(f"  {h:>2} 日後 SPX: 平均 {mean:+.2%} | 中位數 {median:+.2%} | 勝率 {win:.0%} (n={n})")
+            else:
+                print(f"  {h:>2} 日後 SPX: 無樣本")
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="以 INDICATORS 門檻回測歷史資料")
+    parser.add_argument("--start", help="起始日期 YYYY-MM-DD")
+    parser.add_argument("--end", help="結束日期 YYYY-MM-DD")
+    args = parser.parse_args()
+    run(args.start, args.end)
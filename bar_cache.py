@@ -0,0 +1,112 @@
+# --- bar_cache.py (v1.0: 本地日 K 快取) ---
+# 每個代號一個 .npz 檔 (日期 int64 + OHLCV float64)，放在 data/cache/bars/。
+# 每次只下載「快取最後一天之後」的 K 線並合併，下載失敗時直接用快取 (可離線運作)。
+import os
+import time
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+CACHE_DIR = "data/cache/bars"
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+MAX_BARS = 400         # 每個代號最多保留幾根日 K (約 1.5 年)，超過的舊資料會被淘汰
+MAX_TICKERS = 800      # 快取檔案數上限，超過時刪除最久沒用到的代號
+FRESH_SECONDS = 600    # 10 分鐘內剛更新過就不再下載 (同一天重跑)；常駐模式依輪詢間隔傳入 fresh_seconds
+
+def _path(ticker):
+    safe = ticker.replace('^', '_').replace('/', '_').replace('=', '_')
+    return os.path.join(CACHE_DIR, f"{safe}.npz")
+
+def load(ticker):
+    """讀取快取，回傳 (DataFrame, 上次更新時間)；沒有快取回傳 (None, 0)"""
+    path = _path(ticker)
+    try:
+        with np.load(path) as z:
+            frame = pd.DataFrame(z['values'], columns=FIELDS,
+                                 index=pd.to_datetime(z['dates']).rename('Date'))
+            fetched_at = float(z['fetched_at'])
+        os.utime(path)  # 標記最近使用，供 LRU 淘汰判斷
+        return frame, fetched_at
+    except Exception:
+        return None, 0
+
+def save(ticker, frame, fetched_at=None):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    frame = frame.reindex(columns=FIELDS).tail(MAX_BARS)
+    dates = frame.index.values.astype('datetime64[ns]').astype(np.int64)
+    tmp = _path(ticker) + ".tmp.npz"
+    np.savez_compressed(tmp, dates=dates, values=frame.to_numpy(dtype=np.float64),
+                        fetched_at=np.float64(fetched_at or time.time()))
+    os.replace(tmp, _path(ticker))
+
+def evict(max_tickers=MAX_TICKERS):
+    """刪除最久沒用到的代號，讓快取檔案數維持在上限內"""
+    try:
+        files = [os.path.join(CACHE_DIR, f) for f in os.listdir(CACHE_DIR) if f.endswith('.npz')]
+    except FileNotFoundError:
+        return
+    if len(files) <= max_tickers: return
+    files.sort(key=os.path.getmtime)
+    for f in files[:len(files) - max_tickers]:
+        try: os.remove(f)
+        except OSError: pass
+
+def _normalize(frame):
+    frame = frame.dropna(subset=['Close'])
+    if getattr(frame.index, 'tz', None) is not None:
+        frame.index = frame.index.tz_localize(None)
+    frame.index = frame.index.normalize()
+    return frame
+
+def download(tickers, **kwargs):
+    """批次下載多個代號 (一次 yf.download)，回傳 {ticker: DataFrame}"""
+    data = yf.download(list(tickers), progress=False, auto_adjust=False, group_by='ticker', **kwargs)
+    frames = {}
+    for sym in tickers:
+        try:
+            # 各代號交易日不同 (例如 BTC 週末也有)，只保留自己有收盤價的列
+            sub = _normalize(data[sym])
+        except KeyError:
+            continue
+        if not sub.empty:
+            frames[sym] = sub
+    return frames
+
+def update(tickers, period="3mo", fresh_seconds=FRESH_SECONDS):
+    """
+    更新並回傳 {ticker: DataFrame}。
+    - 沒有快取的代號：下載 period 長度的歷史
+    - 已有快取的代號：上次更新超過 fresh_seconds 秒時，從快取最後一天 (含，因為可能是盤中未收的 K 線) 開始補抓
+    兩組各一次批次下載；網路失敗時回傳現有快取。
+    """
+    cached, cold, warm = {}, [], []
+    now = time.time()
+    for sym in tickers:
+        frame, fetched_at = load(sym)
+        if frame is None or frame.empty:
+            cold.append(sym)
+            continue
+        cached[sym] = frame
+        if now - fetched_at > fresh_seconds:
+            warm.append(sym)
+
+    fresh = {}
+    if cold:
+        try: fresh.update(download(cold, period=period))
+        except Exception as e: print(f"⚠️ K 線下載失敗 ({len(cold)} 檔新代號): {e}")
+    if warm:
+        start = min(cached[sym].index[-1] for sym in warm).strftime("%Y-%m-%d")
+        try: fresh.update(download(warm, start=start))
+        except Exception as e: print(f"⚠️ K 線增量下載失敗，改用本地快取: {e}")
+
+    frames = dict(cached)
+    for sym, new in fresh.items():
+        old = cached.get(sym)
+        merged = new if old is None else pd.concat([old, new])
+        merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+        try: save(sym, merged, now)
+        except Exception as e: print(f"⚠️ K 線快取寫入失敗 ({sym}): {e}")
+        frames[sym] = merged.tail(MAX_BARS)
+
+    if fresh: evict()
+    return frames
@@ -0,0 +1,276 @@
+# --- benchmarks/offline.py (離線端到端基準測試) ---
+# 不連任何外部網站就能量測整條流程的速度：
+# - 本機 HTTP 伺服器回放存好的網頁 / JSON (http_fetch 與瀏覽器都透過 FETCH_URL_REWRITE 導向這裡)
+# - 同一個伺服器也是 Discord webhook 的替身 (POST 一律回 204)
+# - yfinance 改讀存好的日 K CSV (替換 bar_cache.download)
+# - 每個情境在獨立的子 process、獨立的暫存工作目錄中執行，回報延遲百分位數與峰值 RSS
+#
+# 固定資料 (fixtures) 目錄格式:
+#   yfinance/<代號>.csv              日 K (Date, Open, High, Low, Close, Adj Close, Volume)
+#   pages/<host>/<path>              網頁或 JSON；目錄請求讀 index.html，找不到時讀同目錄的 _default
+# 沒有指定 --fixtures 時會自動產生一組合成資料；用 benchmarks/record.py 可以錄製真實資料。
+#
+# 用法: python benchmarks/offline.py [--cases main,fetch,status,save_csv] [--iterations 5] [--fixtures DIR]
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import resource
+import threading
+import subprocess
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 只能用瀏覽器抓的指標；這台機器沒有 Chrome 時改為立即失敗，不讓它卡在啟動瀏覽器
+BROWSER_ONLY = ('CNN',)
+CHROME_BINARIES = ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome')
+
+# --- 1. 合成 fixtures ---
+def _safe(ticker):
+    return ticker.replace('^', '_').replace('/', '_').replace('=', '_')
+
+def synthesize(root, days=400, seed=0):
+    """產生一組涵蓋到今天的合成日 K 與各來源頁面，格式與 record.py 錄下的相同"""
+    import numpy as np
+    import pandas as pd
+    import backfill
+    import registry
+    import data_fetchers
+    import trading_calendar
+    import aaii_index
+    import naaim_index
+    import put_call_ratio
+    import breadth
+
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp(trading_calendar.last_completed_session())
+    os.makedirs(os.path.join(root, "yfinance"), exist_ok=True)
+    # 市場寬度的成分股用合成代號 (S000 ~ S499)，清單頁面見下方
+    members = [f"S{i:03d}" for i in range(500)]
+    tickers = set(data_fetchers.BASE_TICKERS) | set(backfill.TICKERS) | set(registry.tickers(registry.select())) | set(members)
+    for ticker in sorted(tickers):
+        freq = 'D' if ticker.endswith('-USD') else 'B'
+        index = pd.date_range(end=end, periods=days, freq=freq, name='Date')
+        close = 100 * np.cumprod(1 + rng.normal(0.0003, 0.01, days))
+        frame = pd.DataFrame({'Open': close * 0.998, 'High': close * 1.006, 'Low': close * 0.994,
+                              'Close': close, 'Adj Close': close,
+                              'Volume': rng.integers(10**8, 5 * 10**9, days).astype(float)}, index=index)
+        frame.to_csv(os.path.join(root, "yfinance", f"{_safe(ticker)}.csv"))
+
+    def page(url, body):
+        from urllib.parse import urlsplit
+        parts = urlsplit(url)
+        path = os.path.join(root, "pages", parts.netloc, parts.path.lstrip('/'))
+        if url.endswith('/'):
+            path = os.path.join(path, "index.html")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(body)
+
+    weeks = pd.date_range(end=end, periods=30, freq='W-THU')[::-1]
+    rows = "".join(f'<tr class="row2"><td>{d:%Y/%m/%d}</td><td>{40 + i % 5:.1f}%</td><td>30.0%</td><td>{28 - i % 7:.1f}%</td></tr>'
+                   for i, d in enumerate(weeks))
+    page(aaii_index.TARGET_URL, f'<table class="economytable"><tr><th>日期</th></tr>{rows}</table>')
+    rows = "".join(f'<tr><td>{d:%m/%d/%Y}</td><td>{70 + i % 20:.2f}</td></tr>' for i, d in enumerate(weeks))
+    page(naaim_index.TARGET_URL, f'<div id="brxe-ymwzia" class="brxe-shortcode">97.13</div><table>{rows}</table>')
+    page(put_call_ratio.DATA_URL.rsplit('/', 1)[0] + "/_default",
+         json.dumps({'ratios': [{'name': put_call_ratio.RATIO_NAME, 'value': '0.91'}]}))
+    page(put_call_ratio.BASE_URL, f'<table><tr><td>{put_call_ratio.RATIO_NAME}</td><td>0.91</td></tr></table>')
+    page("https://feargreedmeter.com/", '<div class="text-center text-4xl font-semibold mb-1 text-white">45</div>')
+    page("https://www.google.com/finance/quote/SKEW:INDEXCBOE", '<div class="YMlKec fxKbKc">150.20</div>')
+    page("https://www.google.com/finance/quote/TNX:INDEXCBOE", '<div class="YMlKec fxKbKc">42.50</div>')
+    page("https://www.barchart.com/stocks/quotes/$S5TH", '<span class="last-change">58.84</span>')
+    rows = "".join(f'<tr><td>{t}</td><td>Synthetic {t}</td></tr>' for t in members)
+    page(breadth.CONSTITUENTS_URL, f'<table id="constituents"><tbody><tr><th>Symbol</th></tr>{rows}</tbody></table>')
+
+# --- 2. 本機伺服器 (網頁回放 + Discord 替身) ---
+class _Handler(BaseHTTPRequestHandler):
+    pages = None
+    posts = 0
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, code, body=b"", ctype="text/html; charset=utf-8"):
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = os.path.normpath(os.path.join(self.pages, self.path.split('?')[0].lstrip('/')))
+        candidates = [path, os.path.join(path, "index.html"), os.path.join(os.path.dirname(path), "_default")]
+        for candidate in candidates:
+            if candidate.startswith(self.pages) and os.path.isfile(candidate):
+                with open(candidate, 'rb') as f:
+                    body = f.read()
+                ctype = "application/json" if body[:1] in (b"{", b"[") else "text/html; charset=utf-8"
+                return self._send(200, body, ctype)
+        self._send(404, b"not found")
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        type(self).posts += 1
+        self._send(204)
+
+def serve(pages_dir):
+    handler = type("Handler", (_Handler,), {'pages': os.path.abspath(pages_dir)})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+# --- 3. 子 process：在暫存目錄中執行單一情境 ---
+def _replay_yfinance(fixtures):
+    """bar_cache.download 改讀 fixtures/yfinance/*.csv，依 start / end 篩選"""
+    import pandas as pd
+    import bar_cache
+
+    frames = {}
+    def download(tickers, start=None, end=None, **kwargs):
+        out = {}
+        for ticker in tickers:
+            if ticker not in frames:
+                path = os.path.join(fixtures, "yfinance", f"{_safe(ticker)}.csv")
+                frames[ticker] = pd.read_csv(path, index_col='Date', parse_dates=True) if os.path.exists(path) else None
+            frame = frames[ticker]
+            if frame is None: continue
+            if start: frame = frame[frame.index >= pd.Timestamp(start)]
+            if end: frame = frame[frame.index < pd.Timestamp(end)]
+            if not frame.empty: out[ticker] = frame
+        return out
+    bar_cache.download = download
+
+def _disable_browser():
+    import contextlib
+    import browser_pool
+
+    @contextlib.contextmanager
+    def session(profile='default'):
+        raise RuntimeError("離線基準測試: 此機器沒有 Chrome")
+        yield
+    browser_pool.session = session
+
+_workdirs = []
+
+def _fresh_workdir(template):
+    work = tempfile.mkdtemp(prefix="bench-")
+    _workdirs.append(work)
+    if template and os.path.isdir(os.path.join(template, "data")):
+        shutil.copytree(os.path.join(template, "data", "history"), os.path.join(work, "data", "history"))
+    return work
+
+def child(case, fixtures, iterations, has_browser):
+    _replay_yfinance(fixtures)
+    if not has_browser:
+        _disable_browser()
+    import main
+    import utils
+    import registry
+    from config import INDICATORS
+
+    keys = registry.select()
+    samples = []
+
+    def timed(func, *args):
+        t0 = time.perf_counter()
+        func(*args)
+        samples.append(time.perf_counter() - t0)
+
+    if case == 'main':
+        for _ in range(iterations):
+            os.chdir(_fresh_workdir(ROOT))
+            timed(main.run, keys)
+    elif case.startswith('fetch:'):
+        key = case.split(':', 1)[1]
+        import data_fetchers
+        os.chdir(_fresh_workdir(None))
+        data_fetchers.load_market_snapshot(registry.tickers(keys))
+        for _ in range(iterations):
+            for f in ("data/cache/put_call.json", "data/cache/results.json"):
+                if os.path.exists(f): os.remove(f)
+            timed(main.run_indicator, key, INDICATORS[key])
+    elif case == 'status':
+        values = [(key, f"{v:.2f}") for key in INDICATORS for v in (0.5, 15, 45, 100)]
+        for _ in range(iterations):
+            timed(lambda: [utils.get_indicator_status(k, v) for _ in range(250) for k, v in values])
+    elif case == 'save_csv':
+        import data_fetchers
+        os.chdir(_fresh_workdir(None))
+        data_fetchers.load_market_snapshot(registry.tickers(keys))
+        results = {key: main.run_indicator(key, INDICATORS[key]) for key in keys if registry.source_of(key) == 'yfinance'}
+        for _ in range(iterations):
+            shutil.rmtree("data/history", ignore_errors=True)
+            timed(utils.save_csv, results)
+    else:
+        raise SystemExit(f"未知的情境: {case}")
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    os.chdir(ROOT)
+    for work in _workdirs:
+        shutil.rmtree(work, ignore_errors=True)
+    print(json.dumps({'case': case, 'samples': samples, 'peak_rss_mb': peak_kb / 1024}))
+
+# --- 4. 主程式：啟動伺服器、逐一以子 process 執行並彙整 ---
+def percentile(samples, q):
+    ordered = sorted(samples)
+    if not ordered: return float('nan')
+    pos = (len(ordered) - 1) * q / 100
+    lo, hi = int(pos), min(int(pos) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+def expand_cases(names):
+    from config import INDICATORS
+    cases = []
+    for name in names:
+        cases.extend(f"fetch:{key}" for key in INDICATORS) if name == 'fetch' else cases.append(name)
+    return cases
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="離線端到端基準測試")
+    parser.add_argument("--cases", default="main,fetch,status,save_csv",
+                        help="逗號分隔：main / fetch (每個指標各一) / fetch:KEY / status / save_csv")
+    parser.add_argument("--iterations", type=int, default=5, help="每個情境重複次數")
+    parser.add_argument("--fixtures", help="錄製好的 fixtures 目錄 (預設自動產生合成資料)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--server", help=argparse.SUPPRESS)
+    parser.add_argument("--browser", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.fixtures, args.iterations, bool(args.browser))
+        raise SystemExit(0)
+
+    fixtures = args.fixtures
+    if not fixtures:
+        fixtures = tempfile.mkdtemp(prefix="bench-fixtures-")
+        synthesize(fixtures)
+        print(f"🧪 已產生合成 fixtures: {fixtures}")
+    server, url = serve(os.path.join(fixtures, "pages"))
+    has_browser = any(shutil.which(b) for b in CHROME_BINARIES)
+    if not has_browser:
+        print(f"⚠️ 找不到 Chrome，只能用瀏覽器抓的指標 ({', '.join(BROWSER_ONLY)}) 會直接記為失敗")
+
+    env = dict(os.environ, FETCH_URL_REWRITE=url, DISCORD_WEBHOOK_URL=f"{url}/discord/webhook")
+    print(f"\n{'情境':<22} {'次數':>4} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9} {'峰值 RSS':>10}")
+    for case in expand_cases(args.cases.split(',')):
+        cmd = [sys.executable, os.path.abspath(__file__), "--child", case, "--fixtures", os.path.abspath(fixtures),
+               "--iterations", str(args.iterations), "--browser", str(int(has_browser))]
+        out = subprocess.run(cmd, env=env, capture_output=True, text=True)
+        try:
+            result = json.loads(out.stdout.strip().splitlines()[-1])
+        except (IndexError, ValueError):
+            print(f"{case:<22} 失敗: {(out.stderr.strip().splitlines() or ['?'])[-1][:80]}")
+            continue
+        ms = [s * 1000 for s in result['samples']]
+        print(f"{case:<22} {len(ms):>4} " + " ".join(f"{percentile(ms, q):7.1f}ms" for q in (50, 90, 99))
+              + f" {max(ms):7.1f}ms {result['peak_rss_mb']:8.1f}MB")
+    print(f"\n📨 Discord 替身共收到 {server.RequestHandlerClass.posts} 則訊息")
+    server.shutdown()
+    if not args.fixtures:
+        shutil.rmtree(fixtures, ignore_errors=True)
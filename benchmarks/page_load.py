@@ -0,0 +1,71 @@
+# --- benchmarks/page_load.py (瀏覽器資源封鎖的效果) ---
+# 對每個 Selenium 爬蟲的頁面，分別在「不封鎖」與「套用 config 封鎖清單」下各載入 N 次，
+# 比較導覽開始到目標元素出現的時間與實際下載量 (需要 Chrome 與網路)。
+# 不封鎖時的下載量中位數會寫入 browser_pool.BASELINE_FILE，日常執行時據此回報封鎖省下多少。
+#
+# 用法: python benchmarks/page_load.py [--runs 3] [--only google,barchart]
+import os
+import sys
+import argparse
+import statistics
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from selenium.webdriver.common.by import By
+import browser_pool
+import metrics
+import aaii_index
+import naaim_index
+
+# (名稱, 網址, 目標元素, 瀏覽器 profile)，與各爬蟲相同
+PAGES = [
+    ('google', "https://www.google.com/finance/quote/SKEW:INDEXCBOE", "div.YMlKec.fxKbKc", 'default'),
+    ('feargreed', "https://feargreedmeter.com/", "div.text-center.text-4xl.font-semibold.mb-1.text-white", 'default'),
+    ('barchart', "https://www.barchart.com/stocks/quotes/$S5TH", "span.last-change", 'lean'),
+    ('stockq', aaii_index.TARGET_URL, aaii_index.ROW_SELECTOR, 'default'),
+    ('naaim', naaim_index.TARGET_URL, naaim_index.VALUE_SELECTOR, 'default'),
+]
+
+def measure(url, selector, profile, blocking):
+    browser_pool.BLOCKING = blocking
+    with metrics.span('page') as record:
+        with browser_pool.session(profile) as driver:
+            driver.execute_cdp_cmd('Network.setCacheDisabled', {'cacheDisabled': True})  # 每次都是冷載入
+            driver.get(url)
+            browser_pool.wait_for(driver, (By.CSS_SELECTOR, selector), 30)
+    return record['selector_s'], record.get('bytes', 0)
+
+def main():
+    parser = argparse.ArgumentParser(description="比較資源封鎖前後的頁面載入")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--only', help="只測這些頁面，逗號分隔")
+    args = parser.parse_args()
+    only = set(args.only.split(',')) if args.only else None
+
+    print(f"{'頁面':<10} {'封鎖':<4} {'元素出現 p50':>12} {'下載 p50':>10}")
+    for name, url, selector, profile in PAGES:
+        if only and name not in only: continue
+        medians = {}
+        for blocking in (False, True):
+            samples = []
+            for _ in range(args.runs):
+                try:
+                    samples.append(measure(url, selector, profile, blocking))
+                except Exception as e:
+                    print(f"❌ {name} ({'封鎖' if blocking else '不封鎖'}): {str(e)[:80]}")
+            if not samples: continue
+            seconds = statistics.median(s for s, _ in samples)
+            size = statistics.median(b for _, b in samples)
+            medians[blocking] = (seconds, size)
+            if not blocking:
+                browser_pool.save_baseline(urlsplit(url).hostname, size)
+            print(f"{name:<10} {'是' if blocking else '否':<4} {seconds:11.2f}s {size / 1024:8.0f} KB")
+        if len(medians) == 2:
+            (t0, b0), (t1, b1) = medians[False], medians[True]
+            print(f"{'':<10} 節省 {t0 - t1:+.2f}s、{(b0 - b1) / 1024:.0f} KB ({(b0 - b1) / b0 * 100 if b0 else 0:.0f}%)")
+    browser_pool.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# --- benchmarks/record.py (錄製離線基準測試用的 fixtures) ---
+# 連網抓一次真實資料存成 benchmarks/offline.py 可回放的格式：
+#   yfinance/<代號>.csv   各代號近一年日 K
+#   pages/<host>/<path>   各爬蟲來源的頁面 (HTTP 抓不到時用瀏覽器取渲染後的原始碼)
+#
+# 用法: python benchmarks/record.py [輸出目錄，預設 benchmarks/fixtures]
+import os
+import sys
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import bar_cache
+import backfill
+import breadth
+import browser_pool
+import data_fetchers
+import http_fetch
+import registry
+import trading_calendar
+import aaii_index
+import naaim_index
+import put_call_ratio
+from offline import _safe
+
+PAGES = [
+    aaii_index.TARGET_URL,
+    naaim_index.TARGET_URL,
+    "https://feargreedmeter.com/",
+    "https://www.google.com/finance/quote/SKEW:INDEXCBOE",
+    "https://www.google.com/finance/quote/TNX:INDEXCBOE",
+    "https://www.barchart.com/stocks/quotes/$S5TH",
+    breadth.CONSTITUENTS_URL,
+]
+
+def _path(root, url):
+    parts = urlsplit(url)
+    path = os.path.join(root, "pages", parts.netloc, parts.path.lstrip('/'))
+    return os.path.join(path, "index.html") if url.endswith('/') else path
+
+def _save(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    print(f"💾 {path} ({len(text) / 1024:.0f} KB)")
+
+def _page_source(url):
+    def via_selenium():
+        with browser_pool.session() as driver:
+            driver.get(url)
+            browser_pool.wait_ready(driver)
+            return driver.page_source
+    return http_fetch.tiered(('http', lambda: http_fetch.get_html(url)), ('selenium', via_selenium))
+
+def record(root):
+    tickers = sorted(set(data_fetchers.BASE_TICKERS) | set(backfill.TICKERS) | set(registry.tickers(registry.select()))
+                     | set(breadth.constituents()))
+    os.makedirs(os.path.join(root, "yfinance"), exist_ok=True)
+    for ticker, frame in bar_cache.download(tickers, period="2y").items():
+        frame.to_csv(os.path.join(root, "yfinance", f"{_safe(ticker)}.csv"))
+    print(f"💾 yfinance: {len(tickers)} 個代號")
+
+    for url in PAGES:
+        try:
+            _save(_path(root, url), _page_source(url))
+        except Exception as e:
+            print(f"❌ {url}: {str(e)[:100]}")
+
+    # CBOE 每日 JSON：錄最近一個有資料的交易日，同時存成 _default 供其他日期共用
+    for day in trading_calendar.sessions_back(trading_calendar.last_completed_session(), 5):
+        url = put_call_ratio.DATA_URL.format(date=day.isoformat())
+        try:
+            text = http_fetch.get(url).text
+        except Exception:
+            continue
+        _save(_path(root, url), text)
+        _save(os.path.join(os.path.dirname(_path(root, url)), "_default"), text)
+        break
+
+if __name__ == "__main__":
+    record(sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "benchmarks", "fixtures"))
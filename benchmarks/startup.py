@@ -0,0 +1,66 @@
+# --- benchmarks/startup.py (匯入時間基準) ---
+# 每個情境都在全新的 Python process 中量測匯入耗時，並檢查有沒有載入不該載入的重量級套件。
+# 任何情境載入了禁止的套件、或中位數超過預算時，以非 0 結束碼離開 (可放進 CI 防止退化)。
+#
+# 用法: python benchmarks/startup.py [--runs 5] [--strict]
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ('selenium', 'webdriver_manager', 'pandas', 'yfinance', 'numpy', 'requests', 'bs4')
+
+# (名稱, 要執行的匯入程式碼, 不得載入的套件, 預算毫秒)
+SCENARIOS = [
+    ('config', "import config", HEAVY, 50),
+    ('utils (報表 / 判讀)', "import utils", HEAVY, 100),
+    ('main (只解析參數)', "import main", ('selenium', 'webdriver_manager', 'pandas', 'yfinance'), 300),
+    ('yfinance 指標', "import registry; [registry.fetcher(k) for k in registry.select(source='yfinance')]",
+     ('selenium', 'webdriver_manager'), None),
+    ('全部指標', "import registry; [registry.fetcher(k) for k in registry.select()]", (), None),
+]
+
+PROBE = """
+import sys, time, json
+t0 = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - t0
+print(json.dumps({{'ms': elapsed * 1000, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def measure(code, heavy, runs):
+    samples, loaded = [], set()
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", PROBE.format(code=code, heavy=HEAVY)],
+                             cwd=ROOT, capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        samples.append(result['ms'])
+        loaded.update(result['loaded'])
+    return statistics.median(samples), sorted(loaded)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="量測各情境的匯入時間")
+    parser.add_argument("--runs", type=int, default=5, help="每個情境重複次數 (取中位數)")
+    parser.add_argument("--strict", action="store_true", help="超過時間預算也視為失敗 (預設只檢查禁止的套件)")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'情境':<22} {'中位數':>9}  載入的重量級套件")
+    for name, code, forbidden, budget in SCENARIOS:
+        try:
+            ms, loaded = measure(code, forbidden, args.runs)
+        except subprocess.CalledProcessError as e:
+            print(f"{name:<22} {'失敗':>9}  {e.stderr.strip().splitlines()[-1] if e.stderr else ''}")
+            failed = True
+            continue
+        bad = [m for m in loaded if m in forbidden]
+        over = budget is not None and ms > budget
+        flag = "❌" if bad or (over and args.strict) else "⚠️" if over else "✅"
+        print(f"{name:<22} {ms:7.1f}ms  {', '.join(loaded) or '-'} {flag}")
+        if bad:
+            print(f"{'':<22} 不應載入: {', '.join(bad)}")
+        failed = failed or bool(bad) or (over and args.strict)
+    sys.exit(1 if failed else 0)
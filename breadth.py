@@ -0,0 +1,135 @@
+# --- breadth.py (v1.0: 自建市場寬度) ---
+# 取代 Barchart $S5TH 爬蟲 (開 Chrome + 等 Cloudflare)：
+#   1. S&P 500 成分股清單快取在 data/cache/sp500.json (每週從 Wikipedia 更新一次，失敗時沿用舊清單)
+#   2. 成分股日 K 走 bar_cache：第一次下載 2 年，之後每天只有一次批次增量下載
+#   3. 收盤價排成「日期 × 代號」矩陣，所有統計都是整個矩陣一起 rolling / 比較，不逐檔迴圈
+# 統計: 站上 200 / 50 日線比例、52 週新高 / 新低家數、上漲 / 下跌家數
+#
+# 用法: python breadth.py [--days 10] [--refresh]
+import os
+import json
+import time
+import argparse
+import pandas as pd
+import bar_cache
+import http_fetch
+import trading_calendar
+
+CONSTITUENTS_URL = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
+CONSTITUENTS_FILE = "data/cache/sp500.json"
+CONSTITUENTS_DAYS = 7     # 成分股清單幾天更新一次
+HISTORY_PERIOD = "2y"     # 沒有快取的代號第一次下載的長度 (52 週新高低需要 252 根)
+YEAR_SESSIONS = 252
+MIN_COVERAGE = 0.9        # 有效代號 (整體或最新一天) 不到清單的 9 成就視為失敗 (改用下一層)
+
+# --- 1. 成分股清單 ---
+def _parse_constituents(html):
+    """Wikipedia 成分股表格第一欄的代號；yfinance 用 '-' 取代 '.' (BRK.B → BRK-B)"""
+    page = http_fetch.soup(html)
+    rows = page.select("table#constituents tbody tr")
+    tickers = [tr.find("td").get_text(strip=True).replace('.', '-') for tr in rows if tr.find("td")]
+    if len(tickers) < 400:
+        raise ValueError(f"成分股清單只解析到 {len(tickers)} 檔")
+    return tickers
+
+def constituents(refresh=False):
+    cached = None
+    try:
+        with open(CONSTITUENTS_FILE, encoding='utf-8') as f:
+            cached = json.load(f)
+        if not refresh and time.time() - cached['fetched_at'] < CONSTITUENTS_DAYS * 86400:
+            return cached['tickers']
+    except Exception:
+        pass
+
+    try:
+        tickers = _parse_constituents(http_fetch.get_html(CONSTITUENTS_URL))
+    except Exception as e:
+        if cached:
+            print(f"⚠️ 成分股清單更新失敗，沿用 {len(cached['tickers'])} 檔舊清單: {str(e)[:80]}")
+            return cached['tickers']
+        raise
+
+    os.makedirs(os.path.dirname(CONSTITUENTS_FILE), exist_ok=True)
+    with open(CONSTITUENTS_FILE, 'w', encoding='utf-8') as f:
+        json.dump({'fetched_at': time.time(), 'tickers': tickers}, f)
+    return tickers
+
+# --- 2. 收盤價矩陣 ---
+def close_matrix(tickers):
+    """日期 × 代號的收盤價 (某檔當天沒有資料為 NaN)"""
+    frames = bar_cache.update(tickers, period=HISTORY_PERIOD)
+    closes = pd.DataFrame({t: frames[t]['Close'] for t in tickers if t in frames}).sort_index()
+    if closes.shape[1] < len(tickers) * MIN_COVERAGE:
+        raise ValueError(f"成分股日 K 只取得 {closes.shape[1]}/{len(tickers)} 檔")
+    return closes
+
+# --- 3. 寬度統計 (整個矩陣向量化計算) ---
+def _pct_above(closes, window):
+    ma = closes.rolling(window, min_periods=window).mean()
+    valid = ma.notna() & closes.notna()
+    return (closes > ma).where(valid, False).sum(axis=1) / valid.sum(axis=1).replace(0, float('nan')) * 100
+
+def compute(closes):
+    """回傳每個日期一列的 DataFrame：pct_above_200、pct_above_50、new_highs、new_lows、advances、declines"""
+    high = closes.rolling(YEAR_SESSIONS, min_periods=YEAR_SESSIONS).max()
+    low = closes.rolling(YEAR_SESSIONS, min_periods=YEAR_SESSIONS).min()
+    change = closes.diff()
+    return pd.DataFrame({
+        'pct_above_200': _pct_above(closes, 200),
+        'pct_above_50': _pct_above(closes, 50),
+        'new_highs': (closes >= high).sum(axis=1),
+        'new_lows': (closes <= low).sum(axis=1),
+        'advances': (change > 0).sum(axis=1),
+        'declines': (change < 0).sum(axis=1),
+    })
+
+def latest(refresh=False):
+    """
+    最新一個交易日的寬度統計 (dict)。
+    bar_cache 增量更新失敗時會沿用舊快取，所以要確認最新一列真的是最後一個已收盤交易日、
+    且當天有足夠的成分股收盤價，否則丟出例外讓 tiered 改用 Barchart
+    """
+    tickers = constituents(refresh)
+    closes = close_matrix(tickers)
+    stats = compute(closes).dropna(subset=['pct_above_200'])
+    day = stats.index[-1]
+    expected = trading_calendar.last_completed_session()
+    if day.date() < expected:
+        raise ValueError(f"成分股日 K 只到 {day:%Y-%m-%d} (應為 {expected})")
+    count = int(closes.loc[day].notna().sum())
+    if count < len(tickers) * MIN_COVERAGE:
+        raise ValueError(f"{day:%Y-%m-%d} 只有 {count}/{len(tickers)} 檔收盤價")
+    return {'date': day.strftime('%Y-%m-%d'), **stats.iloc[-1].to_dict()}
+
+# --- 4. 指標抓取函式 (config: ABOVE_200_DAYS) ---
+def _barchart():
+    """舊來源 (Barchart $S5TH，需要開 Chrome)，只在成分股資料取不到時使用"""
+    import above_200_days_average
+    value = above_200_days_average.fetch_above_200_days_average()
+    float(value)  # 回傳錯誤訊息時丟出例外
+    return value
+
+def fetch_above_200_days_average():
+    """S&P 500 成分股站上 200 日線的比例 (%)"""
+    try:
+        return http_fetch.tiered(('yfinance', lambda: f"{latest()['pct_above_200']:.2f}"),
+                                 ('selenium', _barchart))
+    except Exception as e:
+        return f"市場寬度計算錯誤: {str(e)[:100]}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="S&P 500 市場寬度")
+    parser.add_argument('--days', type=int, default=10, help="顯示最近幾個交易日")
+    parser.add_argument('--refresh', action='store_true', help="重新下載成分股清單")
+    args = parser.parse_args()
+
+    t0 = time.monotonic()
+    tickers = constituents(args.refresh)
+    closes = close_matrix(tickers)
+    stats = compute(closes).dropna(subset=['pct_above_200']).tail(args.days)
+    print(f"📊 S&P 500 市場寬度 ({closes.shape[1]}/{len(tickers)} 檔，{time.monotonic() - t0:.1f}s)")
+    print(f"  {'日期':<10}  >200MA   >50MA  新高  新低  上漲  下跌")
+    for day, r in stats.iterrows():
+        print(f"  {day:%Y-%m-%d}  {r.pct_above_200:5.1f}%  {r.pct_above_50:5.1f}%  "
+              f"{r.new_highs:4.0f}  {r.new_lows:4.0f}  {r.advances:4.0f}  {r.declines:4.0f}")
@@ -0,0 +1,411 @@
+# --- browser_pool.py (v1.0: 共用 Headless Chrome 池) ---
+# 所有 Selenium 爬蟲都從這裡借用瀏覽器，不再各自啟動 / 關閉 Chrome。
+# - chromedriver 路徑會快取到 data/cache/，跨次執行不用每次都問 webdriver-manager
+# - 同一個 session 用滿 MAX_USES 次或當掉後會自動回收重開
+# - 程式結束時 (atexit) 統一關閉所有瀏覽器
+# - 每次 driver.get() 前依網站套用 config 的封鎖清單 (CDP Network.setBlockedURLs)，
+#   目標元素出現時記錄「導覽開始 → 元素出現」的時間、實際下載量，以及相對不封鎖基準省下的量
+# - 不再固定隨機等待：頁面以 eager 策略載入後立刻每 0.1 秒檢查目標元素，
+#   逾時依該網站的歷史 p95 調整；只有 config.SITE_PACING 列出的網站才在導覽前加隨機間隔
+import os
+import json
+import time
+import random
+import atexit
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from webdriver_manager.chrome import ChromeDriverManager
+import http_fetch
+import metrics
+from http_fetch import USER_AGENT
+from config import BLOCK_COMMON, SITE_BLOCKS, SITE_PACING, SITE_MIN_TIMEOUT
+
+DRIVER_CACHE_FILE = "data/cache/chromedriver.json"
+DRIVER_CACHE_DAYS = 7  # 超過天數就重新解析一次，跟上 Chrome 的版本更新
+
+MAX_SESSIONS = int(os.environ.get("BROWSER_MAX_SESSIONS", 3))  # 同時存在的 Chrome 數量上限
+MAX_USES = int(os.environ.get("BROWSER_MAX_USES", 5))          # 每個 session 借用幾次後回收
+BLOCKING = os.environ.get("BROWSER_BLOCKING", "on") != "off"    # 關掉時不擋任何資源
+
+LATENCY_FILE = "data/cache/site_latency.json"
+BASELINE_FILE = "data/cache/page_baseline.json"  # 各網站不封鎖時的下載量 (benchmarks/page_load.py 量測後寫入)
+LATENCY_SAMPLES = 50   # 每個網站保留最近幾次「導覽開始 → 元素出現」的秒數
+POLL_INTERVAL = 0.1    # 檢查目標元素的間隔 (WebDriverWait 預設 0.5 秒)
+MIN_SAMPLES = 5        # 累積這麼多次之後才用歷史調整逾時
+TIMEOUT_FACTOR = 3     # 自適應逾時 = 歷史 p95 × 倍數 (不超過爬蟲指定的逾時)
+MIN_TIMEOUT = 5         # 自適應逾時的下限 (個別網站見 config.SITE_MIN_TIMEOUT)
+
+# 導覽文件與所有子資源實際傳輸的位元組 (被擋下的請求不會出現在這裡)
+_TRANSFERRED_JS = ("return performance.getEntriesByType('navigation')"
+                   ".concat(performance.getEntriesByType('resource'))"
+                   ".reduce((sum, e) => sum + (e.transferSize || 0), 0)")
+
+# 不同網站需要的啟動參數不同，依 profile 分開管理
+# 兩者都用 eager：DOMContentLoaded 就把控制權交回來，之後由 wait_for 輪詢目標元素，不等廣告與圖片
+PROFILES = {
+    'default': {
+        'page_load_strategy': 'eager',
+        'args': [],
+    },
+    # Barchart 這類廣告多、又常在 CI 崩潰的網站
+    'lean': {
+        'page_load_strategy': 'eager',
+        'args': [
+            "--disable-gpu",
+            "--disable-features=VizDisplayCompositor",
+            "--disable-extensions",
+            "--blink-settings=imagesEnabled=false",  # 不載圖
+        ],
+    },
+}
+
+# --- 1. chromedriver 路徑快取 ---
+_driver_lock = threading.Lock()
+_driver_path = None
+
+def _read_driver_cache():
+    try:
+        with open(DRIVER_CACHE_FILE, encoding='utf-8') as f:
+            cached = json.load(f)
+        fresh = time.time() - cached['resolved_at'] < DRIVER_CACHE_DAYS * 86400
+        if fresh and os.path.exists(cached['path']):
+            return cached['path']
+    except Exception:
+        pass
+    return None
+
+def get_driver_path(refresh=False):
+    """回傳 chromedriver 路徑，優先使用快取，必要時才呼叫 ChromeDriverManager"""
+    global _driver_path
+    with _driver_lock:
+        if _driver_path and not refresh:
+            return _driver_path
+        path = None if refresh else _read_driver_cache()
+        if not path:
+            path = ChromeDriverManager().install()
+            try:
+                os.makedirs(os.path.dirname(DRIVER_CACHE_FILE), exist_ok=True)
+                with open(DRIVER_CACHE_FILE, 'w', encoding='utf-8') as f:
+                    json.dump({'path': path, 'resolved_at': time.time()}, f)
+            except Exception as e:
+                print(f"⚠️ chromedriver 路徑快取寫入失敗: {e}")
+        _driver_path = path
+        return path
+
+# --- 2. 建立瀏覽器 ---
+def build_options(profile='default'):
+    spec = PROFILES[profile]
+    chrome_options = Options()
+    if spec['page_load_strategy']:
+        chrome_options.page_load_strategy = spec['page_load_strategy']
+
+    # 使用新版 Headless 模式
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--window-size=1920,1080")
+    for arg in spec['args']:
+        chrome_options.add_argument(arg)
+
+    # 偽裝機制
+    chrome_options.add_argument(f'user-agent={USER_AGENT}')
+    chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+    chrome_options.add_experimental_option('excludeSwitches', ['enable-automation'])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    return chrome_options
+
+def _launch(profile):
+    def start(path):
+        driver = webdriver.Chrome(service=Service(path), options=build_options(profile))
+        # 移除 webdriver 標記
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+            'source': 'Object.defineProperty(navigator, "webdriver", {get: () => undefined})'
+        })
+        return driver
+
+    try:
+        return start(get_driver_path())
+    except WebDriverException as e:
+        # 快取的 driver 可能跟新版 Chrome 不相容，重新解析一次再試
+        print(f"⚠️ Chrome 啟動失敗，重新取得 chromedriver: {str(e)[:100]}")
+        metrics.add('retries')
+        return start(get_driver_path(refresh=True))
+
+# --- 3. 瀏覽器池 ---
+class _Slot:
+    __slots__ = ('driver', 'profile', 'uses')
+
+    def __init__(self, driver, profile):
+        self.driver = driver
+        self.profile = profile
+        self.uses = 0
+
+def blocked_urls(url):
+    """這個網址適用的封鎖清單 (共用 + 該網站追加)"""
+    return BLOCK_COMMON + SITE_BLOCKS.get(urlsplit(url).hostname or "", [])
+
+class _Driver:
+    """
+    借出去的 driver 包裝：
+    - get() 前依網站設定封鎖清單，並記下導覽開始的時間 (供 wait_for 計算等到元素的時間)
+    - FETCH_URL_REWRITE 有設定時把網址導向本機伺服器 (封鎖清單仍依原本的網站決定)
+    """
+
+    def __init__(self, driver):
+        self._driver = driver
+        self._blocked = None
+        self.site = None
+        self.nav_started = None
+        self.measured = True
+
+    def get(self, url):
+        # 封鎖清單是設在 Chrome 上的，關閉封鎖時也要清空 (瀏覽器可能沿用上一次借出時的設定)
+        patterns = blocked_urls(url) if BLOCKING else []
+        if patterns != self._blocked:
+            try:
+                self._driver.execute_cdp_cmd('Network.enable', {})
+                self._driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+                self._blocked = patterns
+            except WebDriverException as e:
+                print(f"⚠️ 無法設定資源封鎖: {str(e)[:80]}")
+        self.site = urlsplit(url).hostname
+        if self.site in SITE_PACING:
+            pause(*SITE_PACING[self.site])  # 這個網站的反爬蟲規則需要間隔，才在導覽前隨機等待
+        self.nav_started = time.perf_counter()
+        self.measured = False
+        return self._driver.get(http_fetch.rewrite(url))
+
+    def transferred(self):
+        try:
+            return int(self._driver.execute_script(_TRANSFERRED_JS) or 0)
+        except WebDriverException:
+            return 0
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+class BrowserPool:
+    def __init__(self, max_sessions=MAX_SESSIONS, max_uses=MAX_USES):
+        self.max_sessions = max(1, max_sessions)
+        self.max_uses = max(1, max_uses)
+        self._idle = []
+        self._live = 0
+        self._cond = threading.Condition()
+
+    def _acquire(self, profile):
+        with self._cond:
+            while True:
+                for slot in self._idle:
+                    if slot.profile == profile:
+                        self._idle.remove(slot)
+                        return slot
+                if self._live < self.max_sessions:
+                    self._live += 1
+                    break
+                if self._idle:
+                    # 池滿了但有別種 profile 閒置中，收掉它讓位
+                    self._quit(self._idle.pop(0))
+                    self._live += 1
+                    break
+                self._cond.wait()
+
+        try:
+            return _Slot(_launch(profile), profile)
+        except Exception:
+            with self._cond:
+                self._live -= 1
+                self._cond.notify()
+            raise
+
+    def _quit(self, slot):
+        # 呼叫端需持有 self._cond；只負責關閉，計數在這裡維護
+        self._live -= 1
+        try: slot.driver.quit()
+        except Exception: pass
+
+    @staticmethod
+    def _alive(driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _release(self, slot):
+        slot.uses += 1
+        # 爬蟲常把例外吞掉自己回傳錯誤字串，所以每次歸還都確認一下瀏覽器還活著
+        broken = not self._alive(slot.driver)
+        with self._cond:
+            if broken or slot.uses >= self.max_uses:
+                self._quit(slot)
+            else:
+                self._idle.append(slot)
+            self._cond.notify()
+
+    @contextmanager
+    def session(self, profile='default'):
+        """借用一個已啟動的瀏覽器；離開 with 區塊時自動歸還"""
+        slot = self._acquire(profile)
+        http_fetch.set_tier('selenium')  # 供執行報告記錄此指標由哪一層抓到
+        try:
+            yield _Driver(slot.driver)
+        finally:
+            self._release(slot)
+
+    def shutdown(self):
+        with self._cond:
+            while self._idle:
+                self._quit(self._idle.pop())
+            self._cond.notify_all()
+
+_POOL = BrowserPool()
+atexit.register(_POOL.shutdown)
+
+def session(profile='default'):
+    return _POOL.session(profile)
+
+def shutdown():
+    _POOL.shutdown()
+
+# --- 4. 各網站的載入時間歷史 ---
+_latency = None
+_latency_lock = threading.Lock()
+
+def _history():
+    global _latency
+    if _latency is None:
+        try:
+            with open(LATENCY_FILE, encoding='utf-8') as f:
+                _latency = json.load(f)
+        except Exception:
+            _latency = {}
+    return _latency
+
+def record_latency(site, seconds):
+    with _latency_lock:
+        samples = _history().setdefault(site, [])
+        samples.append(round(seconds, 3))
+        del samples[:-LATENCY_SAMPLES]
+
+def save_latency():
+    with _latency_lock:
+        if not _latency: return
+        try:
+            os.makedirs(os.path.dirname(LATENCY_FILE), exist_ok=True)
+            with open(LATENCY_FILE, 'w', encoding='utf-8') as f:
+                json.dump(_latency, f)
+        except Exception as e:
+            print(f"⚠️ 網站載入時間寫入失敗: {e}")
+
+atexit.register(save_latency)
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+def site_latency(site):
+    """(p50, p95, 樣本數)；沒有紀錄時回傳 None"""
+    with _latency_lock:
+        samples = list(_history().get(site, ()))
+    if not samples: return None
+    return _percentile(samples, 50), _percentile(samples, 95), len(samples)
+
+def adaptive_timeout(site, timeout):
+    """
+    樣本夠多時以 p95 × TIMEOUT_FACTOR 為逾時 (網站壞掉時不必空等到爬蟲指定的上限)，
+    但不低於該網站的下限；最近一次樣本已達到這個逾時 (上次等到逾時) 就退回爬蟲指定的逾時
+    """
+    if not site: return timeout
+    with _latency_lock:
+        samples = list(_history().get(site, ()))
+    if len(samples) < MIN_SAMPLES:
+        return timeout
+    floor = max(MIN_TIMEOUT, SITE_MIN_TIMEOUT.get(site, 0))
+    adaptive = min(timeout, max(floor, _percentile(samples, 95) * TIMEOUT_FACTOR))
+    return timeout if samples[-1] >= adaptive else adaptive
+
+# --- 5. 不封鎖時的下載量基準 (用來估算封鎖省下的位元組) ---
+_baseline = None
+
+def _baselines():
+    global _baseline
+    if _baseline is None:
+        try:
+            with open(BASELINE_FILE, encoding='utf-8') as f:
+                _baseline = json.load(f)
+        except Exception:
+            _baseline = {}
+    return _baseline
+
+def save_baseline(site, nbytes):
+    """記錄網站不封鎖時的下載量 (benchmarks/page_load.py 以多次冷載入的中位數呼叫)"""
+    with _latency_lock:
+        _baselines()[site] = int(nbytes)
+        try:
+            os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+            with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+                json.dump(_baseline, f, indent=1)
+        except Exception as e:
+            print(f"⚠️ 下載量基準寫入失敗: {e}")
+
+def bytes_saved(site, transferred):
+    """封鎖省下的位元組 (基準 - 實際傳輸量)；沒有基準或沒有封鎖時為 None"""
+    baseline = _baselines().get(site) if BLOCKING else None
+    return None if baseline is None else max(0, baseline - transferred)
+
+# --- 6. 爬蟲共用的等待 (耗時會記到 metrics) ---
+def pause(low, high):
+    """隨機等待 (只用在 SITE_PACING 列出的網站)"""
+    with metrics.timed('sleep'):
+        time.sleep(random.uniform(low, high))
+
+def wait_for(driver, locator, timeout):
+    """
+    等待元素出現並回傳該元素；locator 例如 (By.CSS_SELECTOR, "...")
+    導覽後第一次等待時，逾時依網站歷史調整，並記錄導覽開始到元素出現 (或逾時) 的時間 (p50 / p95 的樣本)
+    """
+    first = isinstance(driver, _Driver) and not driver.measured
+    if first:
+        timeout = adaptive_timeout(driver.site, timeout)
+    try:
+        with metrics.timed('wait'):
+            element = WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(
+                EC.presence_of_element_located(locator))
+    except TimeoutException:
+        if first:
+            # 逾時也記一筆 (實際等待的秒數)：p95 會跟著回升，下一次先退回完整逾時
+            driver.measured = True
+            record_latency(driver.site, time.perf_counter() - driver.nav_started)
+        raise
+    if first:
+        # 每次導覽只記一次：導覽開始到元素出現的時間、這一頁實際下載與封鎖省下的位元組
+        driver.measured = True
+        elapsed = time.perf_counter() - driver.nav_started
+        record_latency(driver.site, elapsed)
+        metrics.annotate(site=driver.site, selector_s=elapsed)
+        transferred = driver.transferred()
+        metrics.add('bytes', transferred)
+        saved = bytes_saved(driver.site, transferred)
+        if saved is not None:
+            metrics.add('saved', saved)
+    return element
+
+def wait_ready(driver, timeout=15):
+    """沒有特定目標元素時 (例如要取整頁原始碼)，等到 document.readyState 為 complete"""
+    with metrics.timed('wait'):
+        WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(
+            lambda d: d.execute_script("return document.readyState") == 'complete')
+
+if __name__ == "__main__":
+    # python browser_pool.py：列出各網站導覽開始到目標元素出現的 p50 / p95
+    print(f"{'網站':<24} {'次數':>4} {'p50':>7} {'p95':>7}")
+    for site in sorted(_history()):
+        p50, p95, n = site_latency(site)
+        print(f"{site:<24} {n:4d} {p50:6.2f}s {p95:6.2f}s")
@@ -1,19 +1,14 @@
 # --- config.py ---
-import data_fetchers as df # 匯入剛剛建立的 yfinance 抓取器
-# 匯入現有的爬蟲模組
-from aaii_index import fetch_aaii_bull_bear_diff
-from fear_greed_index import fetch_fear_greed_meter
-from naaim_index import fetch_naaim_exposure_index
-from skew_index import fetch_skew_index
-from above_200_days_average import fetch_above_200_days_average
-from put_call_ratio import fetch_put_call_ratio
-from treasury_yield import fetch_10y_treasury_yield
+# 抓取函式以「模組.函式」字串登記，真正執行到該指標時才由 registry.py 匯入，
+# 只讀設定 (判讀門檻、報表、回測) 不會載入 Selenium / pandas / yfinance。
+import os
 
 INDICATORS = {
     # --- 1. 🌊 宏觀與資金 ---
     'BOND_10Y': {
-        'name': '🇺🇸 10年債', 'category': 'macro', 'type': 'external', 'func': fetch_10y_treasury_yield,
-        'thresholds': (3.5, 4.5), 'inverse': True
+        'name': '🇺🇸 10年債', 'category': 'macro', 'type': 'external', 'func': 'treasury_yield.fetch_10y_treasury_yield',
+        'thresholds': (3.5, 4.5), 'inverse': True,
+        'freshness': {'cadence': 'intraday', 'minutes': 30}
     },
     'DXY': {
         'name': '💵 美元 DXY', 'category': 'macro', 'type': 'price', 'ticker': 'DX-Y.NYB',
@@ -24,7 +19,7 @@ INDICATORS = {
         'thresholds': 'ma_trend'
     },
     'BTC': {
-        'name': '🪙 比特幣', 'category': 'macro', 'type': 'custom', 'func': df.fetch_bitcoin_trend,
+        'name': '🪙 比特幣', 'category': 'macro', 'type': 'custom', 'func': 'data_fetchers.fetch_bitcoin_trend',
         'thresholds': (3.0, -3.0)
     },
 
@@ -38,13 +33,13 @@ INDICATORS = {
         'thresholds': 'ma_trend'
     },
     'RISK_RATIO': {
-        'name': '⚖️ 風險胃口', 'category': 'struct', 'type': 'custom', 'func': df.fetch_risk_on_off_ratio,
+        'name': '⚖️ 風險胃口', 'category': 'struct', 'type': 'custom', 'func': 'data_fetchers.fetch_risk_on_off_ratio',
         'thresholds': 'arrow_trend'
     },
 
     # --- 3. 🌡️ 技術與情緒 ---
     'RSI': {
-        'name': '📈 大盤 RSI', 'category': 'tech', 'type': 'custom', 'func': df.fetch_rsi_index,
+        'name': '📈 大盤 RSI', 'category': 'tech', 'type': 'custom', 'func': 'data_fetchers.fetch_rsi_index',
         'thresholds': (30, 70), 'inverse': True
     },
     'VIX': {
@@ -52,32 +47,138 @@ INDICATORS = {
         'thresholds': (30, 15), 'inverse': False
     },
     'CNN': {
-        'name': '😱 CNN 情緒', 'category': 'tech', 'type': 'external', 'func': fetch_fear_greed_meter,
-        'thresholds': (45, 55), 'inverse': True
+        'name': '😱 CNN 情緒', 'category': 'tech', 'type': 'external', 'func': 'fear_greed_index.fetch_fear_greed_meter',
+        'thresholds': (45, 55), 'inverse': True,
+        'freshness': {'cadence': 'intraday', 'minutes': 30}
     },
     'ABOVE_200_DAYS': {
-        'name': '📊 >200日線', 'category': 'tech', 'type': 'external', 'func': fetch_above_200_days_average,
-        'thresholds': (20, 80), 'inverse': True
+        'name': '📊 >200日線', 'category': 'tech', 'type': 'custom', 'func': 'breadth.fetch_above_200_days_average',
+        'thresholds': (20, 80), 'inverse': True,
+        'source': 'web',  # 雖然用 yfinance 日 K 計算，但要抓 Wikipedia 成分股清單，失敗時還會開 Chrome 爬 Barchart
+        'timeout': 180,  # 第一次要下載約 500 檔成分股的 2 年日 K，之後每天只有增量
+        'freshness': {'cadence': 'daily', 'delay': 30}
     },
 
     # --- 4. 🐳 籌碼與內資 ---
     'NAAIM': {
-        'name': '🏦 機構持倉', 'category': 'fund', 'type': 'external', 'func': fetch_naaim_exposure_index,
-        'thresholds': (40, 90), 'inverse': True
+        'name': '🏦 機構持倉', 'category': 'fund', 'type': 'external', 'func': 'naaim_index.fetch_naaim_exposure_index',
+        'thresholds': (40, 90), 'inverse': True,
+        'freshness': {'cadence': 'weekly', 'weekday': 2, 'at': '18:00'}  # 每週三美東傍晚公布
     },
     'SKEW': {
-        'name': '🦢 黑天鵝 SKEW', 'category': 'fund', 'type': 'external', 'func': fetch_skew_index,
-        'thresholds': (120, 140), 'inverse': True
+        'name': '🦢 黑天鵝 SKEW', 'category': 'fund', 'type': 'external', 'func': 'skew_index.fetch_skew_index',
+        'thresholds': (120, 140), 'inverse': True,
+        'freshness': {'cadence': 'daily', 'delay': 30}
     },
     'AAII': {
-        'name': '🐂 散戶 AAII', 'category': 'fund', 'type': 'external', 'func': fetch_aaii_bull_bear_diff,
-        'thresholds': (-15, 15), 'inverse': True
+        'name': '🐂 散戶 AAII', 'category': 'fund', 'type': 'external', 'func': 'aaii_index.fetch_aaii_bull_bear_diff',
+        'thresholds': (-15, 15), 'inverse': True,
+        'freshness': {'cadence': 'weekly', 'weekday': 3, 'at': '12:00'}  # 每週四美東中午前公布
     },
     'PUT_CALL': {
-        'name': '⚖️ Put/Call', 'category': 'fund', 'type': 'external', 'func': fetch_put_call_ratio,
-        'thresholds': (1.0, 0.8), 'inverse': False
+        'name': '⚖️ Put/Call', 'category': 'fund', 'type': 'external', 'func': 'put_call_ratio.fetch_put_call_ratio',
+        'thresholds': (1.0, 0.8), 'inverse': False,
+        # 另一個來源：'options_put_call.fetch_put_call_ratio' 由 SPY / QQQ / SPX 選擇權鏈自行計算 (見 OPTIONS_PUT_CALL)
+        'freshness': {'cadence': 'daily', 'delay': 60},  # CBOE 收盤後約一小時更新
+        # 最多回溯 3 個交易日 (put_call_ratio.LOOKBACK_SESSIONS)：HTTP 層每天一個 10 秒請求；
+        # Selenium 備援每天重新載入頁面 + 隨機間隔 + 最多 20 秒等表格渲染，加上啟動 Chrome 約 2 分鐘
+        'timeout': 150
     }
 }
+
+# --- 結果快取 (freshness) ---
+# 指標可用 'freshness' 宣告來源的公布節奏，快取的值在下一次公布前都視為最新，不會重新抓取：
+#   {'cadence': 'weekly', 'weekday': 3, 'at': '12:00'}  每週固定星期 (週一=0) 的美東時間公布
+#   {'cadence': 'daily', 'delay': 60}                   每個交易日收盤後 delay 分鐘公布
+#   {'cadence': 'intraday', 'minutes': 30}              盤中持續變動，快取 minutes 分鐘
+# 沒有宣告的指標 (yfinance 類，直接從行情快照計算) 每次都重新計算。
+
+# --- 抓取引擎設定 ---
+# 可用環境變數 FETCH_MODE / FETCH_MAX_WORKERS 臨時覆寫
+FETCH_SETTINGS = {
+    'mode': 'concurrent',     # 'concurrent' 並行抓取 / 'sequential' 依序抓取 (除錯用)
+    'max_workers': 4,         # 同時執行的指標數上限 (每個 Selenium 爬蟲都會開一個 Chrome，別開太大)
+    'default_timeout': 90,    # 單一指標逾時秒數，可在 INDICATORS 中用 'timeout' 個別覆寫
+}
+
+# --- 常駐模式 (daemon.py) ---
+DAEMON_SETTINGS = {
+    'report_time': '08:00',      # 每日報告 (台北時間)，與 GitHub Actions 排程相同
+    'market_interval': 5,        # 盤中每幾分鐘更新一次 yfinance 類指標
+    'publish_margin': 5,         # 來源預定公布時間後再等幾分鐘才去抓
+    'retry_minutes': 15,         # 到了公布時間但來源還沒更新時，多久後再試
+    'socket': os.environ.get("DAEMON_SOCKET", "data/daemon.sock"),  # 控制用 Unix socket
+}
+
+# --- 盤中串流 (streaming.py) ---
+STREAM_SETTINGS = {
+    'interval': 60,              # 每幾秒輪詢一次報價
+    'state_file': "data/cache/streaming.json",  # MA20 / RSI 的累計狀態與上次判讀，重啟後接續
+    'alert': True,               # 判讀翻轉時發 Discord 通知 (False 只印在終端機)
+}
+
+# --- 選擇權鏈 Put/Call (options_put_call.py) ---
+OPTIONS_PUT_CALL = {
+    'underlyings': {'etf': ['SPY', 'QQQ'], 'index': ['^SPX']},
+    'max_expiries': 6,           # 每個標的取最近幾個到期日 (成交量集中在近月)
+    'workers': 8,                # 並行下載的選擇權鏈數
+    'ratio': 'total',            # 指標使用的比例: 'total' / 'etf' / 'index'
+    'measure': 'volume',         # 'volume' 成交量 / 'oi' 未平倉量
+}
+
+# --- 瀏覽器頁面載入 (browser_pool.py) ---
+# Chrome 以 CDP Network.setBlockedURLs 在網路層直接擋掉不需要的資源 (* 為萬用字元，比對完整網址)。
+# BLOCK_COMMON 套用到所有網站；SITE_BLOCKS 依主機名稱追加，目標是只留下文件本身與目標元素需要的 script。
+# 環境變數 BROWSER_BLOCKING=off 可整個關閉 (除錯 / 比較用)。
+BLOCK_COMMON = [
+    # 圖片、字型、樣式、影音 (只判斷元素是否存在，不需要排版)
+    '*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.svg*', '*.ico*',
+    '*.woff*', '*.ttf*', '*.otf*', '*.css*', '*.mp4*', '*.webm*',
+    # 廣告與追蹤
+    '*googletagmanager.com*', '*google-analytics.com*', '*doubleclick.net*', '*googlesyndication.com*',
+    '*googleadservices.com*', '*adservice.google.*', '*amazon-adsystem.com*', '*facebook.net*',
+    '*hotjar.com*', '*scorecardresearch.com*', '*quantserve.com*', '*taboola.com*', '*outbrain.com*',
+    '*criteo.*', '*pubmatic.com*', '*rubiconproject.com*', '*openx.net*', '*moatads.com*',
+    '*cookielaw.org*', '*onetrust.com*',
+]
+SITE_BLOCKS = {
+    # Google Finance：報價直接寫在伺服器輸出的 HTML，所有 script 與紀錄請求都不需要
+    'www.google.com': ['*.js', '*.js?*', '*gstatic.com*', '*/log?*', '*/gen_204*'],
+    # feargreedmeter：Next.js 網站，保留自家 chunk，只擋 Vercel 的流量分析
+    'feargreedmeter.com': ['*/_vercel/insights/*', '*/_vercel/speed-insights/*'],
+    # Barchart (>200 日線的備援)：價格由自家 script 渲染，只再擋影片廣告與第三方小工具
+    'www.barchart.com': ['*jwplayer*', '*jwpcdn.com*', '*adthrive*', '*tradingview.com*'],
+    # 靜態頁面：表格在 HTML 裡，script 全部不需要 (只比對 .js 結尾或帶查詢字串，不誤擋 .json / .jsp)
+    'www.stockq.org': ['*.js', '*.js?*'],
+    'naaim.org': ['*.js', '*.js?*'],
+    # CBOE 頁面要靠 script 向 CDN 取 JSON 再渲染，不擋 script
+}
+
+# 只有反爬蟲規則真的需要的網站才在導覽前隨機等待 (秒數範圍)，其他網站一律載入後立刻輪詢目標元素
+SITE_PACING = {
+    'www.cboe.com': (1.0, 2.0),  # Put/Call 備援會連續載入好幾天的頁面，太密集會被擋
+}
+
+# 自適應逾時的下限 (秒)：這些網站偶爾會慢很多 (Cloudflare 驗證、由腳本渲染的表格)，歷史再快也不縮到這以下
+SITE_MIN_TIMEOUT = {
+    'www.barchart.com': 15,
+    'www.cboe.com': 15,
+}
+
+# --- HTTP 抓取層 (http_fetch.py) ---
+# 每個主機一個 keep-alive Session；concurrency 為同時請求數上限、interval 為相鄰兩次請求開始的最短間隔 (秒)。
+# 沒列出的主機用 'default'。
+HTTP_HOSTS = {
+    'default': {'concurrency': 4, 'interval': 0.0},
+    'www.google.com': {'concurrency': 1, 'interval': 1.0},    # Google Finance 報價頁
+    'www.barchart.com': {'concurrency': 1, 'interval': 2.0},
+    'www.stockq.org': {'concurrency': 1, 'interval': 1.0},
+    'naaim.org': {'concurrency': 1, 'interval': 1.0},
+    'www.cboe.com': {'concurrency': 1, 'interval': 1.0},
+    'cdn.cboe.com': {'concurrency': 4, 'interval': 0.0},      # 靜態 JSON，收割歷史時並行讀取
+    'en.wikipedia.org': {'concurrency': 1, 'interval': 1.0},
+}
+
 IMAGES = {
     # 🟢 多方 / Risk On (例如: 牛、火箭、綠色上漲圖)
     'BULL': "https://media0.giphy.com/media/v1.Y2lkPTc5MGI3NjExbXR6MzhxOHF2dDE1N3F4cm1nbGRqazgyMmx5dHFydnZtd2kybm5teCZlcD12MV9pbnRlcm5hbF9naWZfYnlfaWQmY3Q9cw/IDpoYMdXd9osK1jmyd/giphy.gif", 
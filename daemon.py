@@ -0,0 +1,248 @@
+# --- daemon.py (v1.0: 常駐模式) ---
+# 與 main.py 相同的流程，但 process 常駐：瀏覽器池、HTTP Session、K 線快取、已匯入的模組都一直保持溫熱。
+# 每個指標各自排程：
+#   market          : 盤中每 market_interval 分鐘更新行情快照與 yfinance 類指標，收盤後等到下次開盤
+#   indicator:<KEY> : 爬蟲類指標在來源預定公布後 (config 的 freshness + publish_margin) 才去抓；
+#                     到了時間來源卻還沒更新，retry_minutes 後再試；盤中變動的指標 (intraday) 只在交易時段內輪詢
+#   report          : 每天 report_time (台北時間) 發送 Discord 日報並寫入歷史資料 (已抓過的指標直接用結果快取)
+# 控制: python daemon.py ctl status | run KEY | refresh KEY | market | report | stop
+#
+# 用法: python daemon.py          (前景執行，Ctrl+C 結束)
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import datetime
+import threading
+import socketserver
+from concurrent.futures import ThreadPoolExecutor
+import main
+import metrics
+import registry
+import result_cache
+import trading_calendar
+from config import INDICATORS, FETCH_SETTINGS, DAEMON_SETTINGS
+
+class Daemon:
+    def __init__(self, settings=DAEMON_SETTINGS):
+        self.settings = settings
+        self.keys = registry.select()
+        self.market_keys = [k for k in self.keys if registry.source_of(k) == 'yfinance']
+        self.results = {}
+        self.due = {}           # 工作名稱 → 下次執行時間 (epoch 秒)
+        self.running = set()
+        self.last_error = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=FETCH_SETTINGS['max_workers'], thread_name_prefix="daemon")
+
+    # --- 1. 排程計算 ---
+    def _next_report(self, now):
+        at = datetime.time.fromisoformat(self.settings['report_time'])
+        local = datetime.datetime.fromtimestamp(now, trading_calendar.TAIPEI_TZ)
+        moment = datetime.datetime.combine(local.date(), at, tzinfo=trading_calendar.TAIPEI_TZ)
+        if moment <= local:
+            moment += datetime.timedelta(days=1)
+        return moment.timestamp()
+
+    def _next_market(self, now):
+        ny_now = datetime.datetime.fromtimestamp(now, trading_calendar.NY_TZ)
+        if trading_calendar.is_open(ny_now):
+            return now + self.settings['market_interval'] * 60
+        return trading_calendar.next_open(ny_now).timestamp() + 60
+
+    def _next_indicator(self, key, now):
+        policy = INDICATORS[key].get('freshness')
+        if not policy:
+            # 沒有宣告公布節奏的爬蟲：日報前 10 分鐘抓一次 (已過了今天的時間點就排到隔天，不會一跑完又立刻到期)
+            return self._next_report(now + 600) - 600
+        if policy['cadence'] == 'intraday':
+            # 盤中才會變動：休市時等到下次開盤，盤中最後一次排在收盤後 (取得收盤值)
+            ny_now = datetime.datetime.fromtimestamp(now, trading_calendar.NY_TZ)
+            if not trading_calendar.is_open(ny_now):
+                return trading_calendar.next_open(ny_now).timestamp() + 60
+            close = trading_calendar.close_time(ny_now.date()).timestamp() + 60
+        res = self.results.get(key)
+        # 應該已經公布了卻還是舊資料 (來源晚公布 / 抓取失敗) → 稍後重試
+        if res is None or res.error is not None or (
+                policy['cadence'] != 'intraday' and (res.as_of or 0) < result_cache.latest_publication(policy, now)):
+            return now + self.settings['retry_minutes'] * 60
+        if policy['cadence'] == 'intraday':
+            return min(result_cache.next_publication(policy, now), close)
+        return result_cache.next_publication(policy, now) + self.settings['publish_margin'] * 60
+
+    def _reschedule(self, job, now):
+        if job == 'report':
+            return self._next_report(now)
+        if job == 'market':
+            return self._next_market(now)
+        return self._next_indicator(job.split(':', 1)[1], now)
+
+    # --- 2. 工作 ---
+    def _job_market(self):
+        import data_fetchers as df
+        # K 線快取的新鮮度不能比輪詢間隔長，否則每隔一輪都在重算同一份舊 K 線
+        df.load_market_snapshot(registry.tickers(self.market_keys),
+                                fresh_seconds=max(0, self.settings['market_interval'] * 60 - 60))
+        for key in self.market_keys:
+            self.results[key] = main.run_indicator(key, INDICATORS[key])
+
+    def _job_indicator(self, key, use_cache=True):
+        self.results[key] = res = main.run_indicator(key, INDICATORS[key], use_cache)
+        print(f"🔄 [{key}] {res.display()} ({res.tier or '-'}, {res.latency:.1f}s)")
+
+    def _job_report(self):
+        self.results.update(main.run(self.keys))
+        metrics.print_summary()
+        metrics.write_run(keys=len(self.keys), mode='daemon')
+        metrics.reset()  # 常駐時每份日報各自一筆紀錄，也避免 span 無限累積
+
+    def submit(self, job, func=None):
+        """把工作丟到背景執行；同一個工作同時只會有一份在跑"""
+        with self._lock:
+            if job in self.running:
+                return False
+            self.running.add(job)
+            self.due[job] = float('inf')
+        if func is None:
+            if job == 'report': func = self._job_report
+            elif job == 'market': func = self._job_market
+            else: func = lambda: self._job_indicator(job.split(':', 1)[1])
+
+        def wrapper():
+            try:
+                func()
+                self.last_error.pop(job, None)
+            except Exception as e:
+                self.last_error[job] = str(e)[:200]
+                print(f"❌ [{job}] 失敗: {e}")
+            finally:
+                with self._lock:
+                    self.running.discard(job)
+                    self.due[job] = self._reschedule(job, time.time())
+                self._wake.set()
+        self._pool.submit(wrapper)
+        return True
+
+    # --- 3. 主迴圈 ---
+    def run(self):
+        now = time.time()
+        with self._lock:
+            # 啟動時先暖機：行情與爬蟲各跑一次 (結果快取仍有效的爬蟲會直接略過)
+            self.due['market'] = now
+            self.due['report'] = self._next_report(now)
+            for key in self.keys:
+                if registry.source_of(key) == 'web':
+                    self.due[f'indicator:{key}'] = now
+        print(f"🟢 常駐模式啟動，下次日報: {self._fmt(self.due['report'])}")
+
+        while not self._stop.is_set():
+            now = time.time()
+            with self._lock:
+                ready = [job for job, at in self.due.items() if at <= now]
+                nxt = min(self.due.values(), default=now + 60)
+            for job in ready:
+                self.submit(job)
+            self._wake.wait(timeout=max(0.1, min(nxt - time.time(), 60)))
+            self._wake.clear()
+
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        print("🔴 常駐模式結束")
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    # --- 4. 控制指令 ---
+    @staticmethod
+    def _fmt(ts):
+        if ts == float('inf'): return "執行中"
+        return datetime.datetime.fromtimestamp(ts, trading_calendar.TAIPEI_TZ).strftime('%m-%d %H:%M:%S')
+
+    def status(self):
+        with self._lock:
+            due = dict(self.due)
+        return {
+            'jobs': {job: self._fmt(at) for job, at in sorted(due.items(), key=lambda kv: kv[1])},
+            'results': {key: {'value': res.display(), 'status': res.status, 'tier': res.tier,
+                              'age': result_cache.age_text(res.as_of)} for key, res in self.results.items()},
+            'errors': dict(self.last_error),
+        }
+
+    def command(self, line):
+        """處理一行控制指令，回傳可序列化的結果"""
+        parts = line.split()
+        if not parts: return {'error': "空指令"}
+        cmd, args = parts[0], parts[1:]
+        if cmd == 'status':
+            return self.status()
+        if cmd in ('run', 'refresh'):
+            if not args or args[0] not in INDICATORS:
+                return {'error': f"未知的指標: {' '.join(args)}"}
+            key = args[0]
+            func = lambda: self._job_indicator(key, use_cache=(cmd == 'run'))
+            job = 'market' if registry.source_of(key) == 'yfinance' and cmd == 'run' else f'indicator:{key}'
+            started = self.submit(job, None if job == 'market' else func)
+            return {'started': started, 'job': job}
+        if cmd in ('market', 'report'):
+            return {'started': self.submit(cmd), 'job': cmd}
+        if cmd == 'stop':
+            self.stop()
+            return {'stopping': True}
+        return {'error': f"未知的指令: {cmd}"}
+
+# --- 5. Unix socket 控制介面 ---
+class _ControlHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline().decode('utf-8').strip()
+        try:
+            reply = self.server.daemon_ref.command(line)
+        except Exception as e:
+            reply = {'error': str(e)}
+        self.wfile.write((json.dumps(reply, ensure_ascii=False) + "\n").encode('utf-8'))
+
+class _ControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def serve_control(daemon, path):
+    if os.path.exists(path):
+        try:
+            send_command("status", path)
+            raise SystemExit(f"已有常駐程式在執行 ({path})")
+        except OSError:
+            os.remove(path)  # 上次沒有正常結束留下的 socket
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    server = _ControlServer(path, _ControlHandler)
+    server.daemon_ref = daemon
+    threading.Thread(target=server.serve_forever, daemon=True, name="control").start()
+    return server
+
+def send_command(line, path=DAEMON_SETTINGS['socket'], timeout=10):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        s.connect(path)
+        s.sendall((line + "\n").encode('utf-8'))
+        return json.loads(s.makefile('r', encoding='utf-8').readline())
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "ctl":
+        try:
+            print(json.dumps(send_command(" ".join(sys.argv[2:]) or "status"), ensure_ascii=False, indent=1))
+        except OSError as e:
+            raise SystemExit(f"無法連線到常駐程式: {e}")
+        raise SystemExit(0)
+
+    daemon = Daemon()
+    server = serve_control(daemon, DAEMON_SETTINGS['socket'])
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: daemon.stop())
+    try:
+        daemon.run()
+    finally:
+        server.shutdown()
+        server.server_close()
+        try: os.remove(DAEMON_SETTINGS['socket'])
+        except OSError: pass
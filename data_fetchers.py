@@ -1,29 +1,77 @@
-# --- data_fetchers.py (v6.0: AI 數據增強版) ---
+# --- data_fetchers.py (v7.1: 共用行情快照 + 本地 K 線快取) ---
+import pandas as pd
 import yfinance as yf
+import bar_cache
+
+# 0. 行情快照：從本地 K 線快取載入，只批次下載缺少的部分，其餘函式都從記憶體取資料
+# INDICATORS 裡 'ticker' 欄位以外，還會用到的代號
+BASE_TICKERS = ["^GSPC", "^NDX", "BTC-USD", "XLY", "XLP", "^IRX"]
+# 最長的需求是 MA20 / RSI(14)，3 個月的日 K 綽綽有餘
+SNAPSHOT_PERIOD = "3mo"
+
+class MarketSnapshot:
+    """依代號保存日 K 線 DataFrame (已去除該代號的空值列)"""
+
+    def __init__(self):
+        self.frames = {}
+
+    def load(self, tickers, period=SNAPSHOT_PERIOD, fresh_seconds=bar_cache.FRESH_SECONDS):
+        tickers = sorted(set(BASE_TICKERS) | set(tickers))
+        try:
+            # 本地快取 + 增量下載 (只補最後快取日之後的 K 線)
+            frames = bar_cache.update(tickers, period=period, fresh_seconds=fresh_seconds)
+        except Exception as e:
+            print(f"⚠️ 行情快照載入失敗，改為逐一抓取: {e}")
+            return False
+
+        self.frames = frames
+        print(f"📦 行情快照: {len(frames)}/{len(tickers)} 個代號")
+        return bool(frames)
+
+    def history(self, ticker):
+        return self.frames.get(ticker)
+
+SNAPSHOT = MarketSnapshot()
+
+def load_market_snapshot(tickers=(), fresh_seconds=bar_cache.FRESH_SECONDS):
+    """在抓取指標前呼叫一次；沒呼叫或失敗時，各函式會自動退回單獨下載 (fresh_seconds 見 bar_cache.update)"""
+    return SNAPSHOT.load(tickers, fresh_seconds=fresh_seconds)
+
+def _history(ticker, period):
+    d = SNAPSHOT.history(ticker)
+    if d is not None:
+        return d
+    return yf.Ticker(ticker).history(period=period)
+
+def _closes(tickers, period):
+    """回傳多個代號對齊日期後的收盤價表 (只保留大家都有資料的日期)"""
+    if all(SNAPSHOT.history(t) is not None for t in tickers):
+        return pd.DataFrame({t: SNAPSHOT.history(t)['Close'] for t in tickers}).dropna()
+    return yf.download(tickers, period=period, progress=False, auto_adjust=False)['Close'].dropna()
 
 # 1. [新增] 抓取完整大盤數據 (OHLCV) 供 AI 使用
-def fetch_full_market_data():
+def fetch_full_market_data(date=None):
     """
     一次抓取 SPX 與 NDX 的 開/高/低/收/量
+    date (YYYY-MM-DD) 指定要哪一天的 K 線 (取該日或之前最近的一根)，預設為最新一根
     回傳 dict: {'SPX_Open': ..., 'SPX_High': ..., 'NDX_Volume': ...}
     """
     try:
         # ^GSPC = S&P 500, ^NDX = Nasdaq 100
         tickers = ["^GSPC", "^NDX"]
-        # 抓取 1 天資料
-        data = yf.download(tickers, period="1d", progress=False, auto_adjust=False)
-        
+
         result = {}
-        # yfinance 的多層索引格式處理
         for symbol in tickers:
             prefix = "SPX" if symbol == "^GSPC" else "NDX"
             try:
                 # 提取該指數的最後一筆數據
-                result[f'{prefix}_Open'] = f"{data['Open'][symbol].iloc[-1]:.2f}"
-                result[f'{prefix}_High'] = f"{data['High'][symbol].iloc[-1]:.2f}"
-                result[f'{prefix}_Low']  = f"{data['Low'][symbol].iloc[-1]:.2f}"
-                result[f'{prefix}_Close'] = f"{data['Close'][symbol].iloc[-1]:.2f}"
-                result[f'{prefix}_Volume'] = f"{data['Volume'][symbol].iloc[-1]:.0f}"
+                data = _history(symbol, "5d")
+                if date: data = data[data.index <= date]
+                result[f'{prefix}_Open'] = f"{data['Open'].iloc[-1]:.2f}"
+                result[f'{prefix}_High'] = f"{data['High'].iloc[-1]:.2f}"
+                result[f'{prefix}_Low']  = f"{data['Low'].iloc[-1]:.2f}"
+                result[f'{prefix}_Close'] = f"{data['Close'].iloc[-1]:.2f}"
+                result[f'{prefix}_Volume'] = f"{data['Volume'].iloc[-1]:.0f}"
             except Exception:
                 # 若抓取失敗填入空值
                 result[f'{prefix}_Open'] = ""
@@ -40,8 +88,7 @@ def fetch_full_market_data():
 # 2. 通用 yfinance 抓取器 (單一價格)
 def fetch_yf_price(ticker, correction=1.0):
     try:
-        t = yf.Ticker(ticker)
-        d = t.history(period="1d")
+        d = _history(ticker, "1d")
         if not d.empty:
             val = d['Close'].iloc[-1]
             if correction != 1.0 and val > 20: val = val * correction
@@ -51,8 +98,7 @@ def fetch_yf_price(ticker, correction=1.0):
 
 def fetch_yf_trend(ticker):
     try:
-        t = yf.Ticker(ticker)
-        d = t.history(period="2mo")
+        d = _history(ticker, "2mo")
         if len(d) >= 20:
             ma20 = d['Close'].rolling(window=20).mean().iloc[-1]
             curr = d['Close'].iloc[-1]
@@ -64,7 +110,7 @@ def fetch_yf_trend(ticker):
 # 3. 客製化計算函式
 def fetch_bitcoin_trend():
     try:
-        d = yf.Ticker("BTC-USD").history(period="5d")
+        d = _history("BTC-USD", "5d")
         if len(d) >= 2:
             chg = ((d['Close'].iloc[-1] - d['Close'].iloc[-2]) / d['Close'].iloc[-2]) * 100
             return f"{chg:+.2f}%"
@@ -73,7 +119,7 @@ def fetch_bitcoin_trend():
 
 def fetch_risk_on_off_ratio():
     try:
-        d = yf.download(["XLY", "XLP"], period="5d", progress=False, auto_adjust=False)['Close']
+        d = _closes(["XLY", "XLP"], "5d")
         if len(d) >= 2:
             r_now = d['XLY'].iloc[-1] / d['XLP'].iloc[-1]
             r_prev = d['XLY'].iloc[-2] / d['XLP'].iloc[-2]
@@ -84,7 +130,7 @@ def fetch_risk_on_off_ratio():
 
 def fetch_rsi_index():
     try:
-        d = yf.Ticker("^GSPC").history(period="2mo")
+        d = _history("^GSPC", "2mo")
         if len(d) > 14:
             delta = d['Close'].diff()
             gain = (delta.where(delta > 0, 0)).ewm(com=13, adjust=False).mean()
@@ -96,7 +142,7 @@ def fetch_rsi_index():
 
 def fetch_market_info():
     try:
-        d = yf.download(["^GSPC", "^NDX"], period="2d", progress=False, auto_adjust=False)['Close']
+        d = {sym: _history(sym, "5d")['Close'] for sym in ["^GSPC", "^NDX"]}
         msg = []
         name_map = {"^GSPC": "S&P 500", "^NDX": "Nasdaq 100"}
         for sym in ["^GSPC", "^NDX"]:
@@ -0,0 +1,101 @@
+# --- discord_delivery.py (v1.0: Discord 發送) ---
+# - 同一份 payload 只序列化一次，同時發送到所有 webhook (DISCORD_WEBHOOK_URL + DISCORD_WEBHOOK_URLS)
+# - 常駐的小型 thread pool + 每個執行緒一個 keep-alive Session，多次發送共用連線
+# - 連線 / 讀取都有逾時；429 依 Discord 回傳的 retry_after 等待，5xx 與網路錯誤以指數退避重試
+import os
+import json
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+import metrics
+
+TIMEOUT = (5, 15)       # (連線, 讀取) 秒
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 1.0      # 指數退避的起始秒數 (1, 2, 4 ... 加上少量抖動)
+MAX_RETRY_AFTER = 60    # Discord 要求等待超過這個秒數就放棄，不拖住整個流程
+MAX_PARALLEL = 8
+
+_local = threading.local()
+_pool = None
+_pool_lock = threading.Lock()
+
+def webhook_urls():
+    """DISCORD_WEBHOOK_URL (單一) 與 DISCORD_WEBHOOK_URLS (逗號或換行分隔) 的聯集，維持順序去重複"""
+    raw = [os.environ.get("DISCORD_WEBHOOK_URL", "")] + \
+          os.environ.get("DISCORD_WEBHOOK_URLS", "").replace("\n", ",").split(",")
+    return list(dict.fromkeys(u.strip() for u in raw if u.strip()))
+
+def _session():
+    s = getattr(_local, 'session', None)
+    if s is None:
+        s = _local.session = requests.Session()
+        s.headers.update({'Content-Type': 'application/json'})
+    return s
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=MAX_PARALLEL, thread_name_prefix="discord")
+        return _pool
+
+def _retry_after(resp):
+    """429 時 Discord 在 JSON body (retry_after，秒) 與標頭都會告知要等多久"""
+    try:
+        return float(resp.json()['retry_after'])
+    except Exception:
+        pass
+    for header in ('Retry-After', 'X-RateLimit-Reset-After'):
+        try:
+            return float(resp.headers[header])
+        except (KeyError, ValueError):
+            continue
+    return None
+
+def post(url, body, label="webhook"):
+    """送出已序列化的 payload；成功回傳 True，重試用盡回傳 False (不丟例外)"""
+    with metrics.span(label, kind='delivery'):
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            wait = None
+            try:
+                resp = _session().post(url, data=body, timeout=TIMEOUT)
+                metrics.add('bytes', len(body))
+                if resp.status_code < 300:
+                    return True
+                if resp.status_code == 429:
+                    wait = _retry_after(resp)
+                    if wait is not None and wait > MAX_RETRY_AFTER:
+                        print(f"Discord Error ({label}): 限流 {wait:.0f} 秒，放棄")
+                        return False
+                elif resp.status_code < 500:
+                    # 400 / 401 / 404 之類重試也不會好
+                    print(f"Discord Error ({label}): HTTP {resp.status_code} {resp.text[:100]}")
+                    return False
+                error = f"HTTP {resp.status_code}"
+            except requests.RequestException as e:
+                error = str(e)[:100]
+
+            if attempt == MAX_ATTEMPTS:
+                print(f"Discord Error ({label}): {error}，已重試 {attempt} 次")
+                return False
+            if wait is None:
+                wait = BACKOFF_BASE * 2 ** (attempt - 1) + random.uniform(0, 0.5)
+            metrics.add('retries')
+            with metrics.timed('sleep'):
+                time.sleep(wait)
+    return False
+
+def deliver(payload, urls=None):
+    """把同一份 payload 同時送到所有 webhook，回傳成功的數量"""
+    urls = webhook_urls() if urls is None else urls
+    if not urls: return 0
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    if len(urls) == 1:
+        return int(post(urls[0], body))
+    futures = [_executor().submit(post, url, body, f"webhook{i + 1}") for i, url in enumerate(urls)]
+    ok = sum(f.result() for f in futures)
+    if ok < len(urls):
+        print(f"⚠️ Discord 只送達 {ok}/{len(urls)} 個 webhook")
+    return ok
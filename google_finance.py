@@ -0,0 +1,45 @@
+# --- google_finance.py (v1.0: Google Finance 報價共用抓取) ---
+# 10 年債 (TNX) 與 SKEW 都讀 Google Finance 報價頁的同一個元素。
+# 第一個要報價的指標會把 SYMBOLS 全部一起抓 (同一個 HTTP Session / 同一個瀏覽器)，
+# 其他指標在 MEMO_SECONDS 內直接取用，不再各自連線或各開一個 Chrome。
+import time
+import threading
+from selenium.webdriver.common.by import By
+import browser_pool
+import http_fetch
+
+QUOTE_URL = "https://www.google.com/finance/quote/{symbol}"
+PRICE_SELECTOR = "div.YMlKec.fxKbKc"  # 大字體價格
+SYMBOLS = ['TNX:INDEXCBOE', 'SKEW:INDEXCBOE']
+MEMO_SECONDS = 300
+
+_memo = {}   # 代號 → (抓取時間, 報價文字, 抓取層級)
+_lock = threading.Lock()
+
+def _via_http(symbols):
+    return {s: http_fetch.select_text(http_fetch.get_html(QUOTE_URL.format(symbol=s)), PRICE_SELECTOR)
+            for s in symbols}
+
+def _via_selenium(symbols):
+    quotes = {}
+    with browser_pool.session() as driver:
+        for s in symbols:
+            driver.get(QUOTE_URL.format(symbol=s))
+            quotes[s] = browser_pool.wait_for(driver, (By.CSS_SELECTOR, PRICE_SELECTOR), 15).text.strip()
+    return quotes
+
+def quote(symbol):
+    """回傳報價文字 (例如 '42.50')；同批的其他代號一起抓好備用"""
+    with _lock:
+        now = time.time()
+        wanted = list(dict.fromkeys(SYMBOLS + [symbol]))
+        missing = [s for s in wanted if s not in _memo or now - _memo[s][0] > MEMO_SECONDS]
+        if missing:
+            quotes = http_fetch.tiered(('http', lambda: _via_http(missing)),
+                                       ('selenium', lambda: _via_selenium(missing)))
+            tier = http_fetch.pop_tier()
+            for s, text in quotes.items():
+                _memo[s] = (now, text, tier)
+        _, text, tier = _memo[symbol]
+    http_fetch.set_tier(tier)
+    return text
@@ -0,0 +1,139 @@
+# --- harvest.py (v1.0: 情緒指標歷史收割) ---
+# 每日爬蟲只取最新一筆，但來源頁面本身就列出了很長的歷史：
+#   AAII   : stockq 的表格列出過去數十週的調查 (每日爬蟲只讀第一列)
+#   NAAIM  : 官網表格列出完整的每週歷史
+#   Put/Call: CBOE 每個交易日各有一份 JSON (與每日爬蟲相同來源)
+# 收割模式每個來源只載入一次頁面、一次解析全部列，再批次寫入歷史資料庫 (只補空白欄位)。
+# 每週公布的指標 (AAII / NAAIM) 會往後延續到下一次公布前的每個交易日，與每日存檔的值一致。
+#
+# 用法: python harvest.py [--sources aaii,naaim,put_call] [--sessions 250] [--overwrite]
+import datetime
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import browser_pool
+import http_fetch
+import history_store
+import trading_calendar
+import aaii_index
+import naaim_index
+import put_call_ratio
+
+DATE_FORMATS = ('%Y/%m/%d', '%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%b %d, %Y', '%B %d, %Y')
+PUT_CALL_SESSIONS = 250   # CBOE 每日 JSON 預設往回收割的交易日數
+PUT_CALL_WORKERS = 4      # 同時請求數 (CDN 很快，但不要太密集)
+CARRY_DAYS = 7            # 週資料最多延續幾個日曆天 (來源停更時不會一路複製舊值)
+
+def parse_date(text):
+    text = text.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+def _page(url):
+    """整頁 HTML：先用 HTTP，被擋時才開瀏覽器取渲染後的原始碼 (每個來源只載入一次)"""
+    def via_selenium():
+        with browser_pool.session() as driver:
+            driver.get(url)
+            browser_pool.wait_ready(driver)
+            return driver.page_source
+    return http_fetch.soup(http_fetch.tiered(('http', lambda: http_fetch.get_html(url)),
+                                             ('selenium', via_selenium)))
+
+def _table_rows(page, selector="table tr"):
+    """回傳 (日期, 儲存格文字 list)；第一格不是日期的列 (表頭等) 略過"""
+    for tr in page.select(selector):
+        cells = [td.get_text(strip=True) for td in tr.find_all(["td", "th"])]
+        day = parse_date(cells[0]) if cells else None
+        if day:
+            yield day, cells
+
+def harvest_aaii():
+    """stockq AAII 表格的所有週資料 → {日期: 看多-看空}"""
+    series = {}
+    for day, cells in _table_rows(_page(aaii_index.TARGET_URL), "table.economytable tr"):
+        try:
+            series[day] = aaii_index._parse_cells(cells)[2]
+        except (ValueError, IndexError):
+            continue
+    return series
+
+def harvest_naaim():
+    """NAAIM 官網歷史表格 (日期, 平均曝險, ...) → {日期: 平均曝險}"""
+    series = {}
+    for day, cells in _table_rows(_page(naaim_index.TARGET_URL)):
+        try:
+            series[day] = float(cells[1].replace(',', ''))
+        except (ValueError, IndexError):
+            continue
+    return series
+
+def harvest_put_call(dates):
+    """CBOE 每日 JSON → {日期: Put/Call}；沒有資料的日期 (尚未公布、太舊) 直接略過"""
+    def one(day):
+        try:
+            val = put_call_ratio._find_ratio(http_fetch.get_json(put_call_ratio.DATA_URL.format(date=day.isoformat())))
+            return day, float(val) if val else None
+        except Exception:
+            return day, None
+    with ThreadPoolExecutor(max_workers=PUT_CALL_WORKERS) as pool:
+        return {day: val for day, val in pool.map(one, dates) if val is not None}
+
+def forward_fill(series, end):
+    """把每週公布的值延續到下一次公布前的每個交易日 → {YYYY-MM-DD: 值}"""
+    if not series: return {}
+    days = sorted(series)
+    out = {}
+    for i, day in enumerate(days):
+        stop = min(day + datetime.timedelta(days=CARRY_DAYS - 1), end)
+        if i + 1 < len(days):
+            stop = min(stop, days[i + 1] - datetime.timedelta(days=1))
+        for session in trading_calendar.sessions(day, stop):
+            out[session.isoformat()] = series[day]
+    return out
+
+def _rows(column, values, spec):
+    return [{'Date': d, column: format(v, spec)} for d, v in sorted(values.items())]
+
+def run(sources=('aaii', 'naaim', 'put_call'), sessions=PUT_CALL_SESSIONS, overwrite=False):
+    """收割各來源並寫入歷史資料庫，回傳 {來源: 更新筆數}"""
+    end = trading_calendar.last_completed_session()
+    report = {}
+    for source in sources:
+        try:
+            if source == 'aaii':
+                rows = _rows('AAII_Diff', forward_fill(harvest_aaii(), end), '.1f')
+                column = 'AAII_Diff'
+            elif source == 'naaim':
+                rows = _rows('NAAIM', forward_fill(harvest_naaim(), end), '.2f')
+                column = 'NAAIM'
+            elif source == 'put_call':
+                dates = trading_calendar.sessions_back(end, sessions)
+                if not overwrite:
+                    # 已經有值的交易日不必再請求
+                    filled = {r['Date'] for r in history_store.read_range(dates[-1].isoformat(), end.isoformat())
+                              if r.get('Put_Call')}
+                    dates = [d for d in dates if d.isoformat() not in filled]
+                values = harvest_put_call(dates)
+                rows = _rows('Put_Call', {d.isoformat(): v for d, v in values.items()}, '.2f')
+                column = 'Put_Call'
+            else:
+                print(f"⚠️ 未知的來源: {source}")
+                continue
+        except Exception as e:
+            print(f"❌ [{source}] 收割失敗: {str(e)[:100]}")
+            continue
+        report[source] = history_store.upsert(rows, [column], overwrite=overwrite)
+        span = f"{rows[0]['Date']} ~ {rows[-1]['Date']}" if rows else "無資料"
+        print(f"🌾 [{source}] {len(rows)} 個交易日 ({span})，更新 {report[source]} 筆")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="收割 AAII / NAAIM / Put-Call 的歷史資料並寫入歷史資料庫")
+    parser.add_argument("--sources", default="aaii,naaim,put_call", help="逗號分隔的來源")
+    parser.add_argument("--sessions", type=int, default=PUT_CALL_SESSIONS, help="Put/Call 往回收割的交易日數")
+    parser.add_argument("--overwrite", action="store_true", help="覆蓋已有的值 (預設只補空白欄位)")
+    args = parser.parse_args()
+    run(args.sources.split(','), args.sessions, args.overwrite)
@@ -0,0 +1,244 @@
+# --- history_store.py (v1.0: 分區歷史資料庫) ---
+# 取代單一的 data/history.csv：
+#   data/history/2025/2025-12.csv   ← 每月一個分區 (同樣的 27 欄 CSV，方便人工檢視與 git diff)
+#   data/history/_index.json        ← 分區索引 {月份: {min, max, rows, path}}
+# - 判斷日期是否已存在：只讀該月分區 (最多 ~23 列)，跟歷史長度無關
+# - 區間讀取：依索引挑出涵蓋的分區，其他分區完全不開
+# - 相容性：export_csv() 重新輸出完整的 data/history.csv (每日排程在 main.py 之後執行一次)
+import os
+import csv
+import json
+import threading
+
+ROOT = "data/history"
+LEGACY_CSV = "data/history.csv"
+
+# 標準欄位 (AI 訓練格式)，所有寫入 / 匯出都以此為準
+FIELDNAMES = [
+    'Date',
+    'SPX_Open', 'SPX_High', 'SPX_Low', 'SPX_Close', 'SPX_Volume',
+    'NDX_Open', 'NDX_High', 'NDX_Low', 'NDX_Close', 'NDX_Volume',
+    '10Y_Yield', '3M_Yield',
+    'RSI', 'VIX', 'CNN', 'Put_Call',
+    'DXY', 'BTC_Chg', 'HYG_Price',
+    'Risk_Ratio', 'IWM_Price', 'SOXX_Price',
+    'NAAIM', 'SKEW', 'AAII_Diff', 'Above_200MA'
+]
+
+# config.INDICATORS 的 key → 歷史資料欄位
+INDICATOR_COLUMNS = {
+    'BOND_10Y': '10Y_Yield',
+    'RSI': 'RSI',
+    'VIX': 'VIX',
+    'CNN': 'CNN',
+    'PUT_CALL': 'Put_Call',
+    'DXY': 'DXY',
+    'BTC': 'BTC_Chg',
+    'HYG': 'HYG_Price',
+    'RISK_RATIO': 'Risk_Ratio',
+    'IWM': 'IWM_Price',
+    'SOXX': 'SOXX_Price',
+    'NAAIM': 'NAAIM',
+    'SKEW': 'SKEW',
+    'AAII': 'AAII_Diff',
+    'ABOVE_200_DAYS': 'Above_200MA',
+}
+
+_lock = threading.RLock()
+
+def _index_path():
+    return os.path.join(ROOT, "_index.json")
+
+def _partition_key(date):
+    return date[:7]  # 'YYYY-MM'
+
+def _partition_path(key):
+    return os.path.join(ROOT, key[:4], f"{key}.csv")
+
+def _load_index():
+    try:
+        with open(_index_path(), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        if os.path.exists(LEGACY_CSV):
+            return migrate_legacy_csv()
+        return {}
+
+def _save_index(index):
+    os.makedirs(ROOT, exist_ok=True)
+    tmp = _index_path() + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(index.items())), f, indent=1)
+    os.replace(tmp, _index_path())
+
+def _read_partition(key):
+    try:
+        with open(_partition_path(key), newline='', encoding='utf-8') as f:
+            return list(csv.DictReader(f))
+    except FileNotFoundError:
+        return []
+
+def _write_partition(key, rows):
+    """整個分區重寫 (依日期排序)，回傳該分區的索引資訊"""
+    path = _partition_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    rows = sorted(rows, key=lambda r: r['Date'])
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+    return {'path': os.path.relpath(path, ROOT), 'min': rows[0]['Date'], 'max': rows[-1]['Date'], 'rows': len(rows)}
+
+def migrate_legacy_csv(path=LEGACY_CSV):
+    """把舊的單檔 history.csv 切成月分區 (只在還沒有索引時自動執行一次)"""
+    with _lock:
+        partitions = {}
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                if row.get('Date'):
+                    partitions.setdefault(_partition_key(row['Date']), {})[row['Date']] = row
+        index = {key: _write_partition(key, list(rows.values())) for key, rows in partitions.items()}
+        _save_index(index)
+        print(f"📦 已將 {path} 轉換為 {len(index)} 個月分區")
+        return index
+
+def has_date(date):
+    """日期 (YYYY-MM-DD) 是否已寫入"""
+    key = _partition_key(date)
+    with _lock:
+        info = _load_index().get(key)
+        if not info or not (info['min'] <= date <= info['max']):
+            return False
+        return any(r['Date'] == date for r in _read_partition(key))
+
+def get_row(date):
+    """該日期已寫入的那一列 (dict)，沒有則為 None"""
+    key = _partition_key(date)
+    with _lock:
+        info = _load_index().get(key)
+        if not info or not (info['min'] <= date <= info['max']):
+            return None
+        return next((r for r in _read_partition(key) if r['Date'] == date), None)
+
+def first_date():
+    """資料庫中最早的日期 (沒有資料時為 None)"""
+    with _lock:
+        index = _load_index()
+        return min((info['min'] for info in index.values()), default=None)
+
+def append(row):
+    """寫入一筆新資料；日期已存在則不寫入並回傳 False"""
+    date = row['Date']
+    key = _partition_key(date)
+    with _lock:
+        index = _load_index()
+        info = index.get(key)
+        if info and info['min'] <= date <= info['max'] and any(r['Date'] == date for r in _read_partition(key)):
+            return False
+
+        path = _partition_path(key)
+        if info and date > info['max']:
+            # 最常見的情況：當月最新一天，直接附加一列
+            with open(path, 'a', newline='', encoding='utf-8') as f:
+                csv.DictWriter(f, fieldnames=FIELDNAMES, extrasaction='ignore').writerow(row)
+            info.update(max=date, rows=info['rows'] + 1)
+        else:
+            index[key] = _write_partition(key, _read_partition(key) + [row])
+        _save_index(index)
+        return True
+
+def upsert(rows, columns=None, overwrite=False):
+    """
+    批次合併多筆資料 (補資料 / 回填用)，每個受影響的分區只重寫一次。
+    columns   : 只處理這些欄位 (預設全部)
+    overwrite : False 時只填入原本是空白的欄位，不覆蓋每日實際抓到的值
+    回傳實際有變動的筆數。
+    """
+    columns = [c for c in (columns or FIELDNAMES) if c != 'Date']
+    by_partition = {}
+    for row in rows:
+        by_partition.setdefault(_partition_key(row['Date']), []).append(row)
+
+    changed = 0
+    with _lock:
+        index = _load_index()
+        for key, new_rows in by_partition.items():
+            existing = {r['Date']: r for r in _read_partition(key)}
+            dirty = False
+            for new in new_rows:
+                cur = existing.setdefault(new['Date'], {'Date': new['Date']})
+                updated = False
+                for col in columns:
+                    val = new.get(col, '')
+                    if val in ('', None): continue
+                    if overwrite or not cur.get(col):
+                        if cur.get(col) != val:
+                            cur[col] = val
+                            updated = True
+                if updated:
+                    changed += 1
+                    dirty = True
+            if dirty:
+                index[key] = _write_partition(key, list(existing.values()))
+        _save_index(index)
+    return changed
+
+def missing_sessions(sessions):
+    """
+    從給定的交易日 (YYYY-MM-DD，需已排序) 中找出尚未寫入的日期。
+    先用索引的筆數比對，只有筆數不足的月份才打開分區確認。
+    """
+    by_partition = {}
+    for d in sessions:
+        by_partition.setdefault(_partition_key(d), []).append(d)
+
+    missing = []
+    with _lock:
+        index = _load_index()
+        for key, days in by_partition.items():
+            info = index.get(key)
+            if info is None:
+                missing.extend(days)
+                continue
+            if (info['min'], info['max'], info['rows']) == (days[0], days[-1], len(days)):
+                continue  # 頭尾日期與筆數都相符，不必讀檔
+            stored = {r['Date'] for r in _read_partition(key)}
+            missing.extend(d for d in days if d not in stored)
+    return missing
+
+def read_range(start=None, end=None):
+    """讀取 [start, end] 區間的資料 (list of dict，依日期排序)；只會開啟涵蓋到的分區"""
+    with _lock:
+        index = _load_index()
+        rows = []
+        for key, info in sorted(index.items()):
+            if (start and info['max'] < start) or (end and info['min'] > end):
+                continue
+            rows.extend(r for r in _read_partition(key)
+                        if (not start or r['Date'] >= start) and (not end or r['Date'] <= end))
+        return rows
+
+def load_frame(start=None, end=None):
+    """以 pandas DataFrame 讀取區間資料 (Date 為 index，其餘欄位轉成數值)"""
+    import pandas as pd
+    frame = pd.DataFrame(read_range(start, end), columns=FIELDNAMES)
+    frame = frame.set_index('Date')
+    return frame.apply(pd.to_numeric, errors='coerce')
+
+def export_csv(path=LEGACY_CSV, start=None, end=None):
+    """輸出相容舊格式的單檔 CSV"""
+    rows = read_range(start, end)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"💾 已匯出 {len(rows)} 筆資料至: {path}")
+    return len(rows)
+
+if __name__ == "__main__":
+    import sys
+    # python history_store.py export [輸出路徑]
+    if len(sys.argv) >= 2 and sys.argv[1] == "export":
+        export_csv(*sys.argv[2:3])
+    else:
+        print("用法: python history_store.py export [path]")
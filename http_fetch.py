@@ -0,0 +1,229 @@
+# --- http_fetch.py (v2.0: 依主機分組的 HTTP 抓取層) ---
+# 爬蟲的第一層：requests + HTML parser，不用開 Chrome。
+# 失敗或被擋時由 tiered() 自動退回下一層 (通常是 Selenium)，並記錄是哪一層抓到的。
+# - 每個主機在每個執行緒各有一個 keep-alive Session，並依 config.HTTP_HOSTS 限制整個主機的同時請求數與請求間隔
+# - 伺服器有給 ETag / Last-Modified 的頁面會存在 data/cache/http/，下次帶條件請求，304 時直接用存檔
+#   (最多 MAX_VALIDATORS 頁，超過時刪除最久沒用到的)
+import os
+import json
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+import metrics
+from config import HTTP_HOSTS
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36'
+HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+TIMEOUT = 10
+VALIDATOR_DIR = "data/cache/http"
+MAX_VALIDATORS = 200  # 條件請求存檔的頁數上限 (收割 Put/Call 會一次請求上百個只讀一次的日期)
+
+# 出現這些字樣代表拿到的是驗證 / 擋爬蟲頁面，而不是真正的內容
+BLOCK_MARKERS = ('cf-challenge', 'Just a moment...', 'captcha', 'Access Denied')
+
+class Blocked(Exception):
+    """被網站擋下 (403 / 429 / 驗證頁)，應改用下一層抓取方式"""
+
+_local = threading.local()
+
+def rewrite(url):
+    """
+    環境變數 FETCH_URL_REWRITE (例如 http://127.0.0.1:8765) 有設定時，
+    把 https://host/path 改寫成 {FETCH_URL_REWRITE}/host/path，讓離線基準測試把所有請求導向本機伺服器。
+    """
+    base = os.environ.get("FETCH_URL_REWRITE")
+    if not base:
+        return url
+    parts = urlsplit(url)
+    return f"{base.rstrip('/')}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+
+class _Host:
+    """
+    單一主機的 Session 與禮貌限制 (同時請求數、請求間隔)。
+    requests.Session 不保證執行緒安全 (cookie jar、連線池共用)，所以每個執行緒各自一個 Session；
+    限制則由整個主機共用。執行緒池的執行緒會重複使用，keep-alive 連線仍然留著。
+    """
+
+    def __init__(self, limits):
+        self.interval = limits.get('interval', 0.0)
+        self._slots = threading.BoundedSemaphore(max(1, limits['concurrency']))
+        self._lock = threading.Lock()
+        self._next = 0.0
+        self._local = threading.local()
+
+    def session(self):
+        s = getattr(self._local, 'session', None)
+        if s is None:
+            s = self._local.session = requests.Session()
+            s.headers.update(HEADERS)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+            s.mount('https://', adapter)
+            s.mount('http://', adapter)
+        return s
+
+    @contextmanager
+    def turn(self):
+        with self._slots:
+            if self.interval:
+                with self._lock:
+                    now = time.monotonic()
+                    wait = self._next - now
+                    self._next = max(now, self._next) + self.interval
+                if wait > 0:
+                    with metrics.timed('sleep'):
+                        time.sleep(wait)
+            yield self.session()
+
+_hosts = {}
+_hosts_lock = threading.Lock()
+
+def host(name):
+    with _hosts_lock:
+        if name not in _hosts:
+            _hosts[name] = _Host(HTTP_HOSTS.get(name, HTTP_HOSTS['default']))
+        return _hosts[name]
+
+# --- 條件請求 (ETag / Last-Modified) ---
+def _validator_path(url):
+    return os.path.join(VALIDATOR_DIR, hashlib.sha1(url.encode('utf-8')).hexdigest())
+
+def _load_validator(url):
+    try:
+        with open(_validator_path(url) + ".json", encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+def _save_validator(url, resp):
+    meta = {'url': url, 'etag': resp.headers.get('ETag'), 'last_modified': resp.headers.get('Last-Modified'),
+            'encoding': resp.encoding, 'saved_at': time.time()}
+    path = _validator_path(url)
+    try:
+        os.makedirs(VALIDATOR_DIR, exist_ok=True)
+        with open(path + ".body", 'wb') as f:
+            f.write(resp.content)
+        with open(path + ".json", 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+    except Exception as e:
+        print(f"⚠️ HTTP 快取寫入失敗: {e}")
+    evict_validators()
+
+def evict_validators(max_pages=MAX_VALIDATORS):
+    """刪除最久沒用到的存檔 (.body 的修改時間，304 重用時會更新)，讓頁數維持在上限內"""
+    try:
+        bodies = [os.path.join(VALIDATOR_DIR, f) for f in os.listdir(VALIDATOR_DIR) if f.endswith('.body')]
+    except FileNotFoundError:
+        return
+    if len(bodies) <= max_pages: return
+    bodies.sort(key=os.path.getmtime)
+    for body in bodies[:len(bodies) - max_pages]:
+        for path in (body, body[:-len('.body')] + ".json"):
+            try: os.remove(path)
+            except OSError: pass
+
+def _replay(resp, url, meta):
+    """304 → 以存檔內容組成一般的 200 回應，呼叫端不需要分辨"""
+    path = _validator_path(url) + ".body"
+    with open(path, 'rb') as f:
+        resp._content = f.read()
+    os.utime(path)  # 標記為最近用過 (evict_validators 依此排序)
+    resp.status_code = 200
+    resp.encoding = meta.get('encoding')
+    return resp
+
+def get(url, timeout=TIMEOUT, headers=None, conditional=True, **kwargs):
+    name = urlsplit(url).hostname or ""
+    meta = _load_validator(url) if conditional else None
+    request_headers = dict(headers or {})
+    if meta:
+        if meta.get('etag'): request_headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'): request_headers['If-Modified-Since'] = meta['last_modified']
+
+    with host(name).turn() as session:
+        resp = session.get(rewrite(url), timeout=timeout, headers=request_headers, **kwargs)
+    metrics.add('bytes', len(resp.content))
+    if resp.status_code == 304 and meta:
+        try:
+            return _replay(resp, url, meta)
+        except OSError:
+            return get(url, timeout, headers, conditional=False, **kwargs)  # 存檔不見了就重新下載
+    if resp.status_code in (403, 429, 503):
+        raise Blocked(f"HTTP {resp.status_code}: {url}")
+    resp.raise_for_status()
+    if conditional and ('ETag' in resp.headers or 'Last-Modified' in resp.headers):
+        _save_validator(url, resp)
+    return resp
+
+def get_html(url, timeout=TIMEOUT):
+    resp = get(url, timeout)
+    if not resp.encoding or resp.encoding.lower() == 'iso-8859-1':
+        resp.encoding = resp.apparent_encoding
+    html = resp.text
+    if any(marker in html for marker in BLOCK_MARKERS):
+        raise Blocked(f"驗證頁面: {url}")
+    return html
+
+def get_json(url, timeout=TIMEOUT):
+    return get(url, timeout, headers={'Accept': 'application/json'}).json()
+
+def soup(html):
+    return BeautifulSoup(html, 'html.parser')
+
+def select_text(html, selector):
+    """回傳第一個符合 CSS selector 的元素文字，找不到就丟例外"""
+    el = soup(html).select_one(selector)
+    if el is None:
+        raise ValueError(f"找不到元素: {selector}")
+    return el.get_text(strip=True)
+
+# --- 分層抓取 ---
+def reset_tier():
+    """開始抓取一個指標前呼叫：清空目前執行緒的抓取層級與來源日期"""
+    _local.tier = None
+    _local.source_date = None
+
+def set_tier(name):
+    _local.tier = name
+
+def pop_tier():
+    """取出目前執行緒最後一次成功的抓取層級，並清空"""
+    tier = getattr(_local, 'tier', None)
+    _local.tier = None
+    return tier
+
+def set_source_date(day):
+    """爬蟲從資料本身讀到的日期 (datetime.date 或 'YYYY-MM-DD')，結果快取以它作為來源時間"""
+    _local.source_date = day
+
+def pop_source_date():
+    """取出目前執行緒記錄的來源日期 (沒有時為 None)，並清空"""
+    day = getattr(_local, 'source_date', None)
+    _local.source_date = None
+    return day
+
+def tiered(*strategies):
+    """
+    依序嘗試 (層級名稱, 函式)，回傳第一個成功的結果。
+    函式以丟出例外表示失敗；全部失敗時丟出最後一個例外。
+    """
+    last_error = None
+    for name, func in strategies:
+        try:
+            value = func()
+        except Exception as e:
+            print(f"↪️ [{name}] 失敗，改用下一層: {str(e)[:80]}")
+            metrics.add('retries')
+            last_error = e
+            continue
+        set_tier(name)
+        return value
+    raise last_error or RuntimeError("沒有可用的抓取方式")
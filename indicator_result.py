@@ -0,0 +1,153 @@
+# --- indicator_result.py (v1.0: 結構化指標結果) ---
+# 抓取函式回傳的原始值 (字串 / AAII tuple) 只在抓取完成時解析一次，
+# 之後判讀、Discord 排版、CSV 存檔都直接用這裡的欄位，不再各自 split / regex。
+import re
+from config import INDICATORS
+
+_NUMBER = re.compile(r"[-+]?\d*\.\d+|[-+]?\d+")
+
+def evaluate_status(key, value, aux=None):
+    """依 config 門檻判讀多空 (value 為數值，aux 為趨勢 / 箭頭等輔助欄位)"""
+    aux = aux or {}
+    cfg = INDICATORS.get(key)
+    if not cfg: return "⚪ 中性"
+
+    thresholds = cfg['thresholds']
+
+    if thresholds == 'ma_trend':
+        if aux.get('trend') == 'Above': return "🟢 多頭排列" if key != 'HYG' else "🟢 資金流入"
+        if aux.get('trend') == 'Below': return "🔴 轉弱/空頭" if key != 'HYG' else "🔴 資金流出"
+        return "⚪ 中性"
+
+    if thresholds == 'arrow_trend':
+        if aux.get('arrow') == '↗️': return "🟢 Risk On"
+        if aux.get('arrow') == '↘️': return "🔴 Risk Off"
+        return "⚪ 中性"
+
+    g_limit, r_limit = thresholds
+    val = value
+
+    if key == 'BTC':
+        if val > g_limit: return "🟢 大漲 (Risk On)"
+        if val < r_limit: return "🔴 大跌 (Risk Off)"
+        return "⚪ 波動正常"
+
+    if key == 'PUT_CALL':
+        if val > g_limit: return "🟢 看空過度 (偏多)"
+        if val < r_limit: return "🔴 看多過度 (偏空)"
+        return "⚪ 中性"
+
+    if key == 'VIX':
+        if val > g_limit: return "🟢 市場恐慌 (偏多)"
+        if val < r_limit: return "🔴 市場自滿 (偏空)"
+        return "⚪ 中性"
+
+    if cfg.get('inverse'):
+        if val <= g_limit: return "🟢 偏多"
+        if val >= r_limit: return "🔴 偏空"
+    else:
+        if val >= g_limit: return "🟢 偏多"
+        if val <= r_limit: return "🔴 偏空"
+
+    return "⚪ 中性"
+
+class IndicatorResult:
+    """
+    單一指標的抓取結果。
+    value   : 主要數值 (float)，失敗時為 None
+    text    : 來源顯示的數字字串 (保留原始精度，存 CSV 用)
+    aux     : 輔助欄位，例如 {'trend': 'Above'}、{'arrow': '↗️'}、{'bull': 40.1, 'bear': 26.6}
+    error   : 錯誤訊息，成功時為 None
+    latency : 抓取耗時 (秒)
+    tier    : 由哪一層抓到 ('http' / 'selenium' / 'yfinance' / 'cache')
+    as_of   : 資料在來源端的時間 (epoch 秒；爬蟲讀得到資料日期時為該日期的公布時間，否則依 freshness 推算)，未知時為 None
+    dated   : as_of 是否取自資料本身的日期 (True 時結果快取不再猜測來源是否晚公布)
+    status  : 判讀結果 (建構時算一次)
+    signal  : +1 多 / -1 空 / 0 中性或無法判讀
+    """
+    __slots__ = ('key', 'value', 'text', 'aux', 'error', 'latency', 'tier', 'as_of', 'dated', 'status', 'signal')
+
+    def __init__(self, key, value=None, text="", aux=None, error=None, latency=0.0, tier=None, as_of=None):
+        self.key = key
+        self.value = value
+        self.text = text
+        self.aux = aux or {}
+        self.error = error
+        self.latency = latency
+        self.tier = tier
+        self.as_of = as_of
+        self.dated = False
+        if error is not None or value is None:
+            self.status = "⚠️ 無法判讀"
+        else:
+            try: self.status = evaluate_status(key, value, self.aux)
+            except Exception: self.status = "⚪ 中性"
+        self.signal = 1 if "🟢" in self.status else -1 if "🔴" in self.status else 0
+
+    @classmethod
+    def failed(cls, key, error, latency=0.0, tier=None):
+        return cls(key, error=str(error), latency=latency, tier=tier)
+
+    @classmethod
+    def from_raw(cls, key, raw, latency=0.0, tier=None):
+        """解析抓取函式的原始回傳值 (整個流程只解析這一次)"""
+        if isinstance(raw, cls):
+            return raw
+        result = cls._parse(key, raw)
+        result.latency = latency
+        result.tier = tier
+        return result
+
+    @classmethod
+    def _parse(cls, key, raw):
+        # AAII 回傳 (看多%, 看空%, 差值)，失敗時差值欄位是錯誤訊息
+        if isinstance(raw, tuple) and len(raw) >= 3:
+            bull, bear, diff = raw[:3]
+            if not isinstance(diff, (int, float)):
+                return cls.failed(key, diff)
+            return cls(key, float(diff), f"{diff:.1f}", {'bull': bull, 'bear': bear})
+
+        text = "" if raw is None else str(raw).strip()
+        if not text or "Error" in text or "N/A" in text:
+            return cls.failed(key, text or "N/A")
+
+        clean = text.replace('%', '').replace('+', '').replace(',', '')
+        match = _NUMBER.match(clean.split()[0]) if clean.split() else None
+        if not match:
+            return cls.failed(key, text)
+
+        aux = {}
+        if "(Above)" in text: aux['trend'] = 'Above'
+        elif "(Below)" in text: aux['trend'] = 'Below'
+        if "↗️" in text: aux['arrow'] = '↗️'
+        elif "↘️" in text: aux['arrow'] = '↘️'
+        if text.endswith('%'): aux['pct'] = True
+        return cls(key, float(match.group()), match.group(), aux)
+
+    # --- 快取 (result_cache) 用的序列化 ---
+    def to_dict(self):
+        return {'value': self.value, 'text': self.text, 'aux': self.aux, 'as_of': self.as_of}
+
+    @classmethod
+    def from_dict(cls, key, data, tier='cache'):
+        return cls(key, data['value'], data['text'], data.get('aux'), tier=tier, as_of=data.get('as_of'))
+
+    # --- 輸出端格式化 (只在 Discord / CSV 邊界使用) ---
+    def display(self):
+        if self.error is not None:
+            return self.error
+        if 'bull' in self.aux:
+            return f"多{self.aux['bull']}% | 空{self.aux['bear']}%"
+        if 'trend' in self.aux:
+            return f"{self.text} ({self.aux['trend']})"
+        if 'arrow' in self.aux:
+            return f"{self.text} ({self.aux['arrow']})"
+        if self.aux.get('pct'):
+            return f"{self.value:+.2f}%" if self.key == 'BTC' else f"{self.text}%"
+        return self.text
+
+    def csv_value(self):
+        return "" if self.error is not None else self.text
+
+    def __repr__(self):
+        return f"IndicatorResult({self.key}={self.display()!r}, {self.status}, {self.latency:.2f}s, {self.tier})"
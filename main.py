@@ -1,47 +1,231 @@
-# --- dev_main.py (測試用的入口檔案) ---
+# --- main.py (v7.4: 結果快取) ---
+# 用法: python main.py                       完整流程 (抓取 → Discord → 存檔)
+#       python main.py --only VIX,BTC         只抓指定指標並印出結果
+#       python main.py --source yfinance      只抓不需爬網頁的指標 (不會載入 Selenium)
+#       python main.py --profile              另外以 cProfile 分析整次執行
+#       python main.py --refresh              忽略結果快取，全部重新抓取
+import os
 import time
-import data_fetchers as df
+import queue
+import argparse
+import threading
+from concurrent.futures import Future, wait, FIRST_COMPLETED
 import utils
-from config import INDICATORS
+import http_fetch
+import metrics
+import registry
+import result_cache
+from config import INDICATORS, FETCH_SETTINGS
+from indicator_result import IndicatorResult
 
-def fetch_all_indices():
+def fetch_one(key, cfg):
+    """呼叫該指標的抓取函式 (第一次用到時才 import 對應模組)，回傳原始結果"""
+    if cfg['type'] not in ('price', 'trend', 'custom', 'external'):
+        return "N/A"
+    return registry.fetcher(key)()
+
+def run_indicator(key, cfg, use_cache=True):
+    """抓取單一指標並轉成 IndicatorResult (原始值只在這裡解析一次)；use_cache=False 時不查結果快取"""
+    with metrics.span(key, kind='indicator'):
+        # 來源還沒公布新資料 → 直接用快取，不必開瀏覽器
+        res = result_cache.lookup(key) if use_cache else None
+        if res is None:
+            res = _run_indicator(key, cfg)
+            if res.error is None:
+                result_cache.stamp(res, source_date=http_fetch.pop_source_date())
+                result_cache.store(res)
+        metrics.annotate(tier=res.tier, status=res.status, error=res.error)
+    return res
+
+def _run_indicator(key, cfg):
+    t0 = time.monotonic()
+    http_fetch.reset_tier()
+    try:
+        raw = fetch_one(key, cfg)
+    except Exception as e:
+        print(f"❌ {key} 發生例外: {e}")
+        return IndicatorResult.failed(key, "Error", time.monotonic() - t0, http_fetch.pop_tier())
+    # 爬蟲會自行記錄 http / selenium；yfinance 類指標沒有分層
+    tier = http_fetch.pop_tier() or ('yfinance' if cfg['type'] != 'external' else None)
+    return IndicatorResult.from_raw(key, raw, time.monotonic() - t0, tier)
+
+def _timeout_of(key):
+    return INDICATORS[key].get('timeout', FETCH_SETTINGS['default_timeout'])
+
+def _fetch_sequential(keys):
     results = {}
-    print("🚀 [Dev Test] 開始依序抓取數據...")
-    
-    for key, cfg in INDICATORS.items():
+    print("🚀 開始依序抓取數據...")
+
+    for key in keys:
+        cfg = INDICATORS[key]
         print(f"[{key}] 正在抓取 ({cfg['name']})...")
-        try:
-            if cfg['type'] == 'price':
-                val = df.fetch_yf_price(cfg['ticker'], cfg.get('correction', 1.0))
-            elif cfg['type'] == 'trend':
-                val = df.fetch_yf_trend(cfg['ticker'])
-            elif cfg['type'] == 'custom':
-                val = cfg['func']()
-            elif cfg['type'] == 'external':
-                val = cfg['func']()
-            
-            results[key] = val
-            if "Error" in str(val): time.sleep(1)
-                
-        except Exception as e:
-            print(f"❌ {key} 發生例外: {e}")
-            results[key] = "Error"
-            
+        res = run_indicator(key, cfg)
+        results[key] = res
+        if res.error is not None: time.sleep(1)
+
     return results
 
-if __name__ == "__main__":
+def _start_workers(keys, task, max_workers):
+    """
+    以 max_workers 個 daemon 執行緒依序執行 task(key)，回傳 ({Future: key}, spawn)。
+    spawn() 再補一個 worker，用來替換逾時後被放棄的執行緒。
+    不用 ThreadPoolExecutor：它的 worker 在直譯器結束時一定會被 join，
+    一個卡住的爬蟲就會讓整個 CI 工作跟著卡住；daemon 執行緒在主程式結束時直接被捨棄。
+    """
+    tasks = queue.SimpleQueue()
+    futures = {}
+    for key in keys:
+        fut = Future()
+        futures[fut] = key
+        tasks.put((fut, key))
+
+    def worker():
+        while True:
+            try:
+                fut, key = tasks.get_nowait()
+            except queue.Empty:
+                return
+            if not fut.set_running_or_notify_cancel():
+                continue  # 已被取消 (整批放棄)
+            try:
+                fut.set_result(task(key))
+            except BaseException as e:
+                fut.set_exception(e)
+
+    def spawn():
+        threading.Thread(target=worker, name="fetch", daemon=True).start()
+
+    for _ in range(min(max_workers, len(keys))):
+        spawn()
+    return futures, spawn
+
+def _fetch_concurrent(keys, max_workers):
+    """
+    用 daemon 執行緒同時抓取所有指標。
+    每個指標的逾時是從「真正開始執行」起算，排隊等待 worker 的時間不算在內。
+    逾時的指標直接記為 Error，不再等它：執行緒仍在背景跑到它自己的 Selenium / HTTP 逾時為止，
+    但不會佔住程式結束；另補一個 worker 接手排隊中的指標。
+    限制：執行緒無法被強制中止，它開的 Chrome 要等它自己結束或程式結束 (browser_pool atexit) 才關閉。
+    """
+    print(f"🚀 開始並行抓取數據 (workers={max_workers})...")
+    started = {}
+
+    def task(key):
+        cfg = INDICATORS[key]
+        started[key] = time.monotonic()
+        print(f"[{key}] 正在抓取 ({cfg['name']})...")
+        return run_indicator(key, cfg)
+
+    results = {}
+    futures, spawn = _start_workers(keys, task, max_workers)
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            for fut in done:
+                key = futures[fut]
+                results[key] = fut.result()
+
+            now = time.monotonic()
+            for fut in list(pending):
+                key = futures[fut]
+                t0 = started.get(key)
+                if t0 is not None and now - t0 > _timeout_of(key):
+                    print(f"⏱️ {key} 超過 {_timeout_of(key)} 秒未回應，放棄等待")
+                    results[key] = IndicatorResult.failed(key, "Error (Timeout)", now - t0)
+                    metrics.record(key, now - t0, kind='indicator', error="timeout")
+                    pending.discard(fut)
+                    spawn()
+    finally:
+        for fut in pending:
+            fut.cancel()  # 還在排隊的不再執行
+
+    # 依 INDICATORS 的順序回傳，維持與依序模式相同的 dict 形狀
+    return {key: results.get(key) or IndicatorResult.failed(key, "Error") for key in keys}
+
+def print_run_report(results):
+    """列出每個指標的耗時與資料來源層級"""
+    print("\n⏱️ 執行報告:")
+    for key, res in results.items():
+        print(f"  {key:<15} {res.latency:6.1f}s  {res.tier or '-':<9} {res.status}")
+
+def fetch_all_indices(mode=None, max_workers=None, keys=None):
+    keys = list(keys or INDICATORS)
+    mode = mode or os.environ.get("FETCH_MODE", FETCH_SETTINGS['mode'])
+    if mode == 'sequential':
+        return _fetch_sequential(keys)
+    max_workers = max_workers or int(os.environ.get("FETCH_MAX_WORKERS", FETCH_SETTINGS['max_workers']))
+    return _fetch_concurrent(keys, max(1, max_workers))
+
+def run(keys):
+    partial = len(keys) < len(INDICATORS)
+
+    # 0. 行情快照 (一次下載所有 yfinance 代號，供後續所有函式共用)
+    # 只跑網頁爬蟲時不需要，也就不必載入 pandas / yfinance
+    if any(registry.source_of(k) == 'yfinance' for k in keys):
+        import data_fetchers as df
+        with metrics.span('snapshot', kind='step'):
+            df.load_market_snapshot(registry.tickers(keys))
     # 1. 抓取
-    results = fetch_all_indices()
+    results = fetch_all_indices(keys=keys)
+    print_run_report(results)
+    if partial:
+        print("\n" + utils.calculate_summary(results))
+        return results
+
     # 2. 大盤
-    market_text = df.fetch_market_info()
+    with metrics.span('market_info', kind='step'):
+        market_text = df.fetch_market_info()
     # 3. 總結
     summary = utils.calculate_summary(results)
-    
+
     print("\n" + summary)
-    
+
     # 4. 發送 Discord
-    utils.send_discord(results, market_text, summary)
-    
+    with metrics.span('send_discord', kind='step'):
+        utils.send_discord(results, market_text, summary)
+
     # 5. 存檔 CSV (關鍵測試點)
     print("正在寫入 CSV...")
-    utils.save_csv(results)
+    with metrics.span('save_csv', kind='step'):
+        utils.save_csv(results)
+
+    # 6. 補上漏跑的交易日 (只有市場欄位可回溯，一次批次下載)
+    import backfill
+    with metrics.span('fill_gaps', kind='step'):
+        backfill.fill_gaps()
+    return results
+
+def profiled(func, *args, top=25):
+    """以 cProfile 執行 func：統計檔存到 data/metrics/ (可用 snakeviz 等工具看火焰圖)，並印出最耗時的函式"""
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args)
+    finally:
+        path = os.path.join(os.path.dirname(metrics.JOURNAL_FILE), f"profile-{time.strftime('%Y%m%d-%H%M%S')}.pstats")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        profiler.dump_stats(path)
+        print(f"\n🔥 cProfile 已存到 {path}，累計耗時前 {top} 名:")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(top)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="抓取市場指標並發送 Discord 報告")
+    parser.add_argument("--only", help="只抓指定指標，逗號分隔 (例如 VIX,BTC)；子集合只印出結果，不發送也不存檔")
+    parser.add_argument("--source", choices=['yfinance', 'web'], help="只抓某一類來源的指標")
+    parser.add_argument("--profile", action="store_true", help="以 cProfile 分析整次執行並印出摘要")
+    parser.add_argument("--refresh", action="store_true", help="忽略結果快取，全部重新抓取")
+    args = parser.parse_args()
+    if args.refresh:
+        result_cache.ENABLED = False
+    keys = registry.select(args.only.split(',') if args.only else None, args.source)
+
+    try:
+        if args.profile:
+            profiled(run, keys)
+        else:
+            run(keys)
+    finally:
+        metrics.print_summary()
+        metrics.write_run(keys=len(keys), profile=args.profile)
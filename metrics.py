@@ -0,0 +1,127 @@
+# --- metrics.py (v1.0: 執行效能記錄) ---
+# 以 span 包住每個指標與主要步驟，記錄：
+#   wall    : 實際耗時 (秒)
+#   wait    : 花在 WebDriverWait 等元素出現的時間
+#   sleep   : 花在隨機等待 (模擬人類) 的時間
+#   bytes   : 下載的位元組數 (HTTP 層 + 瀏覽器實際傳輸量)
+#   saved   : 資源封鎖省下的位元組數 (該網站不封鎖時的基準下載量 - 實際傳輸量，見 browser_pool.BASELINE_FILE)
+#   site / selector_s : 瀏覽器爬蟲的網站與「導覽開始 → 目標元素出現」秒數 (browser_pool.wait_for)
+#   retries : 換層重試 / 瀏覽器重啟次數
+#   tier    : 由哪一層抓到 (http / selenium / yfinance / cache)
+# span 綁定在執行緒上 (並行抓取時各指標互不干擾)，計數器一律累加到目前執行緒最內層的 span。
+# 每次執行結束以 write_run() 附加一行 JSON 到 data/metrics/runs.jsonl。
+import os
+import json
+import time
+import datetime
+import threading
+from contextlib import contextmanager
+
+JOURNAL_FILE = "data/metrics/runs.jsonl"
+COUNTERS = ('wait', 'sleep', 'bytes', 'saved', 'retries')
+
+_local = threading.local()
+_lock = threading.Lock()
+_spans = []
+_run_started = time.time()
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+def add(counter, amount=1):
+    """累加到目前執行緒的 span；不在任何 span 內時忽略"""
+    stack = _stack()
+    if stack:
+        stack[-1][counter] = stack[-1].get(counter, 0) + amount
+
+def annotate(**fields):
+    """在目前的 span 上附加欄位 (例如 tier、status)"""
+    stack = _stack()
+    if stack:
+        stack[-1].update(fields)
+
+@contextmanager
+def span(name, **fields):
+    record = {'name': name, 'start': round(time.time() - _run_started, 3), **fields}
+    stack = _stack()
+    stack.append(record)
+    t0 = time.perf_counter()
+    try:
+        yield record
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {str(e)[:100]}"
+        raise
+    finally:
+        record['wall'] = time.perf_counter() - t0
+        stack.pop()
+        if stack:
+            # 巢狀 span 的計數器也算進外層
+            record['parent'] = stack[-1]['name']
+            for counter in COUNTERS:
+                if counter in record:
+                    stack[-1][counter] = stack[-1].get(counter, 0) + record[counter]
+        with _lock:
+            _spans.append(record)
+
+@contextmanager
+def timed(counter):
+    """把區塊耗時累加到指定計數器，例如 with timed('wait'): WebDriverWait(...).until(...)"""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        add(counter, time.perf_counter() - t0)
+
+def record(name, wall, **fields):
+    """直接寫入一個已結束的 span (例如逾時被放棄、沒機會自己結束的指標)"""
+    with _lock:
+        _spans.append({'name': name, 'wall': wall, **fields})
+
+def reset():
+    """清空已記錄的 span 並重新起算 (常駐模式每寫完一次紀錄就呼叫)"""
+    global _run_started
+    with _lock:
+        _spans.clear()
+        _run_started = time.time()
+
+def spans():
+    with _lock:
+        return list(_spans)
+
+def summary():
+    """本次執行的彙總：總耗時與各計數器合計 (只算最外層的 span，避免巢狀重複計算)"""
+    top = [s for s in spans() if 'parent' not in s]
+    totals = {c: round(sum(s.get(c, 0) for s in top), 3) for c in COUNTERS}
+    return {'wall': round(time.time() - _run_started, 3), **totals}
+
+def _round(span_record):
+    return {k: round(v, 3) if isinstance(v, float) else v for k, v in span_record.items()}
+
+def write_run(path=JOURNAL_FILE, **fields):
+    """把本次執行的所有 span 附加為 JSON Lines 的一行"""
+    entry = {
+        'run_at': datetime.datetime.fromtimestamp(_run_started).isoformat(timespec='seconds'),
+        **summary(), **fields,
+        'spans': [_round(s) for s in sorted(spans(), key=lambda s: s.get('start', 0))],
+    }
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    except Exception as e:
+        print(f"⚠️ 效能記錄寫入失敗: {e}")
+    return entry
+
+def print_summary():
+    s = summary()
+    print(f"📏 總耗時 {s['wall']:.1f}s｜等待元素 {s['wait']:.1f}s｜隨機等待 {s['sleep']:.1f}s｜"
+          f"下載 {s['bytes'] / 1024:.0f} KB" + (f" (封鎖省下 {s['saved'] / 1024:.0f} KB)" if s['saved'] else "")
+          + f"｜重試 {s['retries']:.0f} 次")
+    pages = [r for r in spans() if 'selector_s' in r]
+    if pages:
+        print("🌐 " + "｜".join(f"{r['name']} {r['selector_s']:.1f}s {r.get('bytes', 0) / 1024:.0f} KB"
+                                 + (f" (-{r['saved'] / 1024:.0f} KB)" if r.get('saved') else "")
+                                 for r in sorted(pages, key=lambda r: r['name'])))
@@ -0,0 +1,163 @@
+# --- optimize.py (v1.0: 門檻參數掃描) ---
+# 針對 config.INDICATORS 中以 (g, r) 數值門檻判讀的指標，
+# 在歷史資料上以網格 / 隨機搜尋找出最能區分後續 SPX 報酬的門檻組合。
+# - 每個候選組合的訊號以 NumPy 廣播一次算完 (候選數 × 天數 的矩陣)
+# - 候選組合切塊後分散到多個 process 執行
+# - 依時間先後切成訓練 / 測試兩段，只用訓練段挑參數，再看測試段是否站得住
+#   (訓練段最後 horizon 天的前瞻報酬會用到測試段的價格，切分處先剔除這幾天)
+#
+# 用法: python optimize.py [--keys VIX,SKEW] [--grid 80] [--random 20000] [--horizon 5] [--workers 8]
+import os
+import time
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import backtest
+import history_store
+from config import INDICATORS
+
+CHUNK = 2048  # 每塊候選數，控制 候選 × 天數 矩陣的記憶體用量
+
+def tunable_keys():
+    return [k for k, cfg in INDICATORS.items()
+            if not isinstance(cfg['thresholds'], str) and k in history_store.INDICATOR_COLUMNS]
+
+def candidates(key, values, grid=40, n_random=0, seed=0):
+    """在歷史值的 1%~99% 分位數範圍內產生 (g, r) 候選，並依規則方向過濾不合理的組合"""
+    finite = values[~np.isnan(values)]
+    lo, hi = np.percentile(finite, [1, 99])
+    axis = np.linspace(lo, hi, grid)
+    g, r = (m.ravel() for m in np.meshgrid(axis, axis))
+    if n_random:
+        rng = np.random.default_rng(seed)
+        g = np.concatenate([g, rng.uniform(lo, hi, n_random)])
+        r = np.concatenate([r, rng.uniform(lo, hi, n_random)])
+
+    cfg = INDICATORS[key]
+    # inverse: 低於 g 偏多、高於 r 偏空 → g < r；其餘 (含 VIX/PUT_CALL/BTC 特例) → g > r
+    keep = g < r if cfg.get('inverse') and key not in backtest.SPECIAL_KEYS else g > r
+    return g[keep], r[keep]
+
+def score(key, values, fwd, g, r, min_samples=5):
+    """
+    回傳每個候選的 (edge, 偏多天數, 偏空天數)。
+    edge = 偏多日的平均前瞻報酬 - 偏空日的平均前瞻報酬；任一邊樣本不足為 NaN。
+    """
+    valid = ~np.isnan(fwd)
+    f = np.where(valid, fwd, 0.0)
+    sig = backtest.vector_signal(key, values, (g[:, None], r[:, None]))
+    bull = (sig > 0) & valid
+    bear = (sig < 0) & valid
+    n_bull = bull.sum(axis=1)
+    n_bear = bear.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        edge = bull @ f / n_bull - bear @ f / n_bear
+    edge[(n_bull < min_samples) | (n_bear < min_samples)] = np.nan
+    return edge, n_bull, n_bear
+
+def _score_chunk(key, train, test, g, r, min_samples):
+    """process pool 的工作單位：同一塊候選在訓練 / 測試段各算一次"""
+    return score(key, *train, g, r, min_samples), score(key, *test, g, r, min_samples)
+
+def sweep(columns, keys=None, grid=40, n_random=0, horizon=5, train_ratio=0.7,
+          workers=None, min_samples=5, seed=0):
+    tunable = tunable_keys()
+    unknown = [k for k in keys or () if k not in tunable]
+    if unknown:
+        raise ValueError(f"無法掃描 {', '.join(unknown)} (只支援數值門檻指標: {', '.join(tunable)})")
+    keys = keys or tunable
+    fwd = backtest.forward_returns(columns['SPX_Close'], horizon)
+    split = int(len(fwd) * train_ratio)
+    purge = max(0, split - horizon)  # 訓練段只用到這裡，前瞻報酬不跨進測試段
+
+    jobs = []
+    skipped = {}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for key in keys:
+            values = columns[history_store.INDICATOR_COLUMNS[key]]
+            # 回填只補市場欄位，情緒類欄位可能整段訓練 / 測試期都是空的 → 無法產生候選或評估，列為略過
+            if np.isnan(values[:purge]).all():
+                skipped[key] = "訓練段沒有資料"
+                continue
+            if np.isnan(values[split:]).all():
+                skipped[key] = "測試段沒有資料"
+                continue
+            g, r = candidates(key, values[:purge], grid, n_random, seed)
+            train, test = (values[:purge], fwd[:purge]), (values[split:], fwd[split:])
+            for i in range(0, len(g), CHUNK):
+                jobs.append((key, g[i:i + CHUNK], r[i:i + CHUNK],
+                             pool.submit(_score_chunk, key, train, test, g[i:i + CHUNK], r[i:i + CHUNK], min_samples)))
+
+        report = {}
+        for key, g, r, fut in jobs:
+            (tr_edge, tr_bull, tr_bear), (te_edge, _, _) = fut.result()
+            entry = report.setdefault(key, {'g': [], 'r': [], 'train': [], 'test': [], 'n_bull': [], 'n_bear': []})
+            entry['g'].append(g); entry['r'].append(r)
+            entry['train'].append(tr_edge); entry['test'].append(te_edge)
+            entry['n_bull'].append(tr_bull); entry['n_bear'].append(tr_bear)
+
+    results = {key: {'candidates': 0, 'skipped': reason} for key, reason in skipped.items()}
+    for key, entry in report.items():
+        cols = {name: np.concatenate(parts) for name, parts in entry.items()}
+        cur_g, cur_r = INDICATORS[key]['thresholds']
+        values = columns[history_store.INDICATOR_COLUMNS[key]]
+        cur_train = score(key, values[:purge], fwd[:purge], np.array([cur_g]), np.array([cur_r]), min_samples)[0][0]
+        cur_test = score(key, values[split:], fwd[split:], np.array([cur_g]), np.array([cur_r]), min_samples)[0][0]
+
+        best = None
+        if not np.isnan(cols['train']).all():
+            i = int(np.nanargmax(cols['train']))
+            best = {
+                'thresholds': (round(float(cols['g'][i]), 4), round(float(cols['r'][i]), 4)),
+                'train': float(cols['train'][i]), 'test': float(cols['test'][i]),
+                'n_bull': int(cols['n_bull'][i]), 'n_bear': int(cols['n_bear'][i]),
+            }
+        results[key] = {
+            'candidates': len(cols['g']),
+            'current': {'thresholds': (cur_g, cur_r), 'train': float(cur_train), 'test': float(cur_test)},
+            'best': best,
+        }
+    return results
+
+def _fmt(edge):
+    return "   n/a " if np.isnan(edge) else f"{edge:+.2%}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="以歷史資料掃描 INDICATORS 門檻")
+    parser.add_argument("--keys", help="只掃描指定指標，逗號分隔 (預設全部數值門檻指標)")
+    parser.add_argument("--grid", type=int, default=40, help="網格每軸點數 (候選數約 grid²/2)")
+    parser.add_argument("--random", type=int, default=0, help="額外隨機抽樣的候選數")
+    parser.add_argument("--horizon", type=int, default=5, help="前瞻報酬天數")
+    parser.add_argument("--train", type=float, default=0.7, help="訓練段比例 (依時間先後切分)")
+    parser.add_argument("--min-samples", type=int, default=5, help="偏多 / 偏空各自最少樣本天數")
+    parser.add_argument("--workers", type=int, help="process 數 (預設 CPU 核心數)")
+    parser.add_argument("--start", help="起始日期 YYYY-MM-DD")
+    parser.add_argument("--end", help="結束日期 YYYY-MM-DD")
+    args = parser.parse_args()
+
+    dates, columns = backtest.load_arrays(args.start, args.end)
+    keys = [k.strip() for k in args.keys.split(',')] if args.keys else None
+
+    t0 = time.perf_counter()
+    try:
+        results = sweep(columns, keys, args.grid, args.random, args.horizon, args.train,
+                        args.workers, args.min_samples)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - t0
+
+    total = sum(r['candidates'] for r in results.values())
+    print(f"🔍 {len(dates)} 天資料，{sum(not r.get('skipped') for r in results.values())} 個指標共 {total:,} 組候選，{args.horizon} 日前瞻報酬，耗時 {elapsed:.2f} 秒")
+    print("   edge = 偏多日平均報酬 - 偏空日平均報酬 (訓練 / 測試)\n")
+    for key, res in results.items():
+        if res.get('skipped'):
+            print(f"[{key}] ⏭️ 略過: {res['skipped']}")
+            continue
+        cur = res['current']
+        print(f"[{key}] 目前 {cur['thresholds']}: 訓練 {_fmt(cur['train'])} / 測試 {_fmt(cur['test'])}")
+        best = res['best']
+        if best:
+            print(f"{'':>{len(key) + 2}} 最佳 {best['thresholds']}: 訓練 {_fmt(best['train'])} / 測試 {_fmt(best['test'])}"
+                  f" (偏多 {best['n_bull']} 天 / 偏空 {best['n_bear']} 天)")
+        else:
+            print(f"{'':>{len(key) + 2}} 樣本不足，無法評估")
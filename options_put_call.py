@@ -0,0 +1,128 @@
+# --- options_put_call.py (v1.0: 由選擇權鏈自行計算 Put/Call) ---
+# 不開瀏覽器、不依賴 CBOE 頁面：透過 yfinance 取 SPY / QQQ / SPX 各到期日的選擇權鏈，
+# 所有 (標的, 到期日) 並行下載，再把 put / call 的成交量與未平倉量排成矩陣一次加總。
+#   total  : 全部標的
+#   etf    : ETF 選擇權 (SPY / QQQ)
+#   index  : 指數選擇權 (SPX)
+# 在 config.INDICATORS['PUT_CALL'] 把 'func' 換成 'options_put_call.fetch_put_call_ratio' 即可改用此來源
+# (比例水準與 CBOE TOTAL 不同，切換前先在收盤後用 --validate 比對同一個交易日、視需要調整門檻)。
+#
+# 用法: python options_put_call.py [--expiries 6] [--validate]
+import time
+import datetime
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import yfinance as yf
+import metrics
+import trading_calendar
+from config import OPTIONS_PUT_CALL
+
+GROUPS = ('etf', 'index')
+COLUMNS = ('put_volume', 'call_volume', 'put_oi', 'call_oi')
+TOLERANCE = 0.25  # --validate：與 CBOE TOTAL 同日數值的相對差距在 ±25% 內視為通過
+
+def _expiries(symbol, limit):
+    return symbol, list(yf.Ticker(symbol).options[:limit])
+
+def _chain(symbol, expiry):
+    """單一 (標的, 到期日) → [put 成交量, call 成交量, put 未平倉, call 未平倉]"""
+    chain = yf.Ticker(symbol).option_chain(expiry)
+    row = np.empty(len(COLUMNS))
+    for i, (side, field) in enumerate(((chain.puts, 'volume'), (chain.calls, 'volume'),
+                                       (chain.puts, 'openInterest'), (chain.calls, 'openInterest'))):
+        row[i] = np.nansum(side[field].to_numpy(dtype=np.float64)) if field in side else 0.0
+    return row
+
+def collect(settings=OPTIONS_PUT_CALL):
+    """
+    並行下載所有選擇權鏈，回傳 (矩陣, 群組索引)：
+    矩陣每列是一個 (標的, 到期日) 的 COLUMNS 加總，群組索引對應 GROUPS
+    """
+    underlyings = [(GROUPS.index(group), sym) for group in GROUPS for sym in settings['underlyings'][group]]
+    with ThreadPoolExecutor(max_workers=settings['workers']) as pool:
+        expiries = dict(pool.map(lambda u: _expiries(u[1], settings['max_expiries']), underlyings))
+        tasks = [(g, sym, exp) for g, sym in underlyings for exp in expiries[sym]]
+        rows = list(pool.map(lambda t: _chain(t[1], t[2]), tasks))
+    if not rows:
+        raise ValueError("沒有取得任何選擇權鏈")
+    return np.vstack(rows), np.array([g for g, _, _ in tasks])
+
+def ratios(matrix, groups):
+    """依群組加總後算 put/call：{'total' / 'etf' / 'index': {'volume': 比例, 'oi': 比例}}"""
+    sums = np.zeros((len(GROUPS), len(COLUMNS)))
+    np.add.at(sums, groups, matrix)
+    sums = np.vstack([sums.sum(axis=0), sums])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volume = sums[:, 0] / sums[:, 1]
+        oi = sums[:, 2] / sums[:, 3]
+    return {name: {'volume': float(volume[i]), 'oi': float(oi[i])}
+            for i, name in enumerate(('total',) + GROUPS)}
+
+def compute(settings=OPTIONS_PUT_CALL):
+    with metrics.span('option_chains', kind='step'):
+        matrix, groups = collect(settings)
+        metrics.annotate(chains=len(matrix))
+    return ratios(matrix, groups)
+
+def fetch_put_call_ratio():
+    """config 選定的比例 (預設 total 成交量)，格式與 put_call_ratio 相同"""
+    try:
+        value = compute()[OPTIONS_PUT_CALL['ratio']][OPTIONS_PUT_CALL['measure']]
+        if not np.isfinite(value):
+            return "抓取失敗 (選擇權成交量為 0)"
+        return f"{value:.2f}"
+    except Exception as e:
+        return f"選擇權鏈計算錯誤: {str(e)[:100]}"
+
+def chain_session(now=None):
+    """選擇權鏈成交量對應的交易日；盤中為 None (當天的成交量還在累積，不能和 CBOE 的收盤統計比)"""
+    now = now or datetime.datetime.now(trading_calendar.NY_TZ)
+    if trading_calendar.is_open(now):
+        return None
+    return trading_calendar.last_completed_session(now)
+
+def validate(result, session):
+    """
+    和 CBOE 同一個交易日公布的 TOTAL PUT/CALL (HTTP 層，不開瀏覽器) 比對，
+    相對差距在 TOLERANCE 內為 PASS；回傳 config 選用的比例是否通過 (無法比對時為 None)
+    """
+    import put_call_ratio
+    if session is None:
+        print("⚠️ 盤中的選擇權成交量還在累積，收盤後再比對")
+        return None
+    date_str = session.isoformat()
+    try:
+        _, cboe = put_call_ratio._fetch_via_http([date_str])
+    except Exception as e:
+        print(f"⚠️ 無法取得 CBOE {date_str} 的數值 (可能尚未公布): {str(e)[:100]}")
+        return None
+    cboe = float(cboe)
+    print(f"🔎 CBOE TOTAL ({date_str}): {cboe:.2f}，容許相對差距 ±{TOLERANCE:.0%}")
+    passed = None
+    for name, r in result.items():
+        diff = r['volume'] / cboe - 1
+        ok = abs(diff) <= TOLERANCE
+        chosen = name == OPTIONS_PUT_CALL['ratio']
+        if chosen: passed = ok
+        print(f"  {name:<5} 成交量 {r['volume']:.2f} (差 {diff:+.0%}) {'✅ PASS' if ok else '❌ FAIL'}"
+              + (" ← 指標使用" if chosen else ""))
+    return passed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="由 SPY / QQQ / SPX 選擇權鏈計算 Put/Call")
+    parser.add_argument('--expiries', type=int, help=f"每個標的取最近幾個到期日 (預設 {OPTIONS_PUT_CALL['max_expiries']})")
+    parser.add_argument('--validate', action='store_true', help="與 CBOE 同一個交易日的公布值比對")
+    args = parser.parse_args()
+
+    settings = dict(OPTIONS_PUT_CALL)
+    if args.expiries: settings['max_expiries'] = args.expiries
+    t0 = time.monotonic()
+    session = chain_session()
+    matrix, groups = collect(settings)
+    result = ratios(matrix, groups)
+    print(f"📊 Put/Call ({session or '盤中'}，選擇權鏈 {len(matrix)} 條，{time.monotonic() - t0:.1f}s)")
+    for name, r in result.items():
+        print(f"  {name:<5} 成交量 {r['volume']:.2f}  未平倉 {r['oi']:.2f}")
+    if args.validate:
+        validate(result, session)
@@ -1,92 +1,128 @@
-# --- put_call_ratio.py (v6.1: Selenium Headless New + Anti-bot) ---
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
+# --- put_call_ratio.py (v9.0: 交易日曆回溯 + 結果快取) ---
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
-import datetime
+from selenium.common.exceptions import TimeoutException
+import browser_pool
+import http_fetch
+import trading_calendar
+import os
+import json
 import time
-import random
 
-def fetch_put_call_ratio():
+BASE_URL = "https://www.cboe.com/us/options/market_statistics/daily/"
+# 上面那個頁面本身是向這個 CDN 取 JSON 再渲染的，直接讀 JSON 就不用開瀏覽器
+DATA_URL = "https://cdn.cboe.com/data/us/options/market_statistics/daily/{date}_daily_options"
+RATIO_NAME = "TOTAL PUT/CALL RATIO"
+LOOKBACK_SESSIONS = 3  # 只往回找真正的交易日 (約等於舊版的 5 個日曆天)
+CACHE_FILE = "data/cache/put_call.json"
+RECHECK_MINUTES = 60   # 最新交易日還沒公布時，多久內不再重新嘗試
+PAGE_TIMEOUT = 20      # 備援頁面由腳本渲染表格，DOMContentLoaded 之後還要等一段時間
+
+def _lookback_dates():
+    """從最後一個已收盤的交易日往回列出幾個交易日 (新到舊)，週末、休市日與盤中的今天直接跳過"""
+    sessions = trading_calendar.sessions_back(trading_calendar.last_completed_session(), LOOKBACK_SESSIONS)
+    return [d.strftime("%Y-%m-%d") for d in sessions]
+
+def _load_cache():
+    try:
+        with open(CACHE_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+def _save_cache(date_str, value):
+    try:
+        os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+        with open(CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'date': date_str, 'value': value, 'checked_at': time.time()}, f)
+    except Exception as e:
+        print(f"⚠️ Put/Call 快取寫入失敗: {e}")
+
+def _find_ratio(node):
+    """在 JSON 中找 name 為 TOTAL PUT/CALL RATIO 的項目，回傳其 value"""
+    if isinstance(node, dict):
+        if str(node.get('name', '')).strip().upper() == RATIO_NAME and node.get('value') not in (None, ''):
+            return str(node['value']).strip()
+        node = list(node.values())
+    if isinstance(node, list):
+        for child in node:
+            found = _find_ratio(child)
+            if found: return found
+    return None
+
+def _fetch_via_http(dates):
+    blocked = None
+    for date_str in dates:
+        try:
+            val = _find_ratio(http_fetch.get_json(DATA_URL.format(date=date_str)))
+        except http_fetch.Blocked as e:
+            blocked = e  # CDN 對沒有資料的日期也可能回 403，先記著繼續往回找
+            continue
+        except Exception:
+            continue
+        if val:
+            return date_str, val
+    raise blocked or ValueError("多日無資料")
+
+def _fetch_via_selenium(dates):
     """
-    [終極版] 抓取 CBOE Put/Call Ratio
     策略：使用 Selenium 開啟帶有日期參數的網址 (?dt=YYYY-MM-DD)
     解決了 requests 被擋的問題，同時保留了自動往回找日期的功能。
     """
-    base_url = "https://www.cboe.com/us/options/market_statistics/daily/"
-    
-    chrome_options = Options()
-    # --- 關鍵修正：使用新版 Headless 模式 ---
-    chrome_options.add_argument("--headless=new") 
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--window-size=1920,1080")
-    
-    # --- 關鍵修正：加入偽裝機制 ---
-    chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36')
-    chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-    chrome_options.add_experimental_option('excludeSwitches', ['enable-automation'])
-    chrome_options.add_experimental_option('useAutomationExtension', False)
-    
-    # 啟動瀏覽器
-    try:
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        
-        # 移除 webdriver 標記
-        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
-            'source': 'Object.defineProperty(navigator, "webdriver", {get: () => undefined})'
-        })
-    except Exception as e:
-        return f"驅動啟動失敗: {e}"
+    # 向瀏覽器池借用瀏覽器 (整個回溯過程共用同一個 session)
+    with browser_pool.session() as driver:
+        # 自動回溯機制 (只找交易日)
+        for date_str in dates:
+            # 組裝網址，讓 Selenium 前往指定日期
+            driver.get(f"{BASE_URL}?dt={date_str}")
+
+            # 檢查是否有資料
+            # XPath: 尋找文字包含 "TOTAL PUT/CALL RATIO" 的欄位，並抓它隔壁的數值
+            xpath = f"//td[contains(text(), '{RATIO_NAME}')]/following-sibling::td[1]"
 
-    try:
-        # 2. 自動回溯機制 (最多找 5 天)
-        for i in range(5):
             try:
-                # 計算日期 (今天, 昨天, 前天...)
-                target_date = datetime.date.today() - datetime.timedelta(days=i)
-                date_str = target_date.strftime("%Y-%m-%d")
-                
-                # 組裝網址，讓 Selenium 前往指定日期
-                target_url = f"{base_url}?dt={date_str}"
-                
-                driver.get(target_url)
-                
-                # 模擬人類行為：稍微隨機等待一下
-                time.sleep(random.uniform(1.5, 3))
-                
-                # 等待網頁載入 (最多 5 秒)
-                wait = WebDriverWait(driver, 5)
-                
-                # 3. 檢查是否有資料
-                # XPath: 尋找文字包含 "TOTAL PUT/CALL RATIO" 的欄位，並抓它隔壁的數值
-                xpath = "//td[contains(text(), 'TOTAL PUT/CALL RATIO')]/following-sibling::td[1]"
-                
-                try:
-                    # 等待元素出現
-                    wait.until(EC.presence_of_element_located((By.XPATH, xpath)))
-                    element = driver.find_element(By.XPATH, xpath)
-                    val = element.text.strip()
-                    
-                    if val:
-                        return val  # 成功抓到！回傳並結束
-                except:
-                    # 如果找不到元素 (Timeout)，代表這一天沒資料，繼續迴圈跑下一天
+                browser_pool.wait_for(driver, (By.XPATH, xpath), PAGE_TIMEOUT)
+            except TimeoutException:
+                # 表格已經渲染、只是沒有這一列 → 這天真的沒資料，繼續往回找
+                # 連表格都沒出現 → 頁面還沒渲染完，不能當成沒資料而回傳更舊交易日的數值
+                if driver.find_elements(By.XPATH, "//table//td"):
                     continue
-                    
-            except Exception:
-                continue
-        
-        return "抓取失敗 (多日無資料)"
+                raise TimeoutError(f"CBOE 頁面 {PAGE_TIMEOUT} 秒內沒有渲染出表格 ({date_str})")
+            val = driver.find_element(By.XPATH, xpath).text.strip()
+            if val:
+                return date_str, val  # 成功抓到！回傳並結束
+
+    raise ValueError("多日無資料")
 
+def fetch_put_call_ratio():
+    """
+    [終極版] 抓取 CBOE Put/Call Ratio
+    第一層直接讀 CBOE CDN 的 JSON，被擋或讀不到時才開 Selenium 渲染頁面。
+    回溯只走交易日；上次成功的 (日期, 數值) 會存起來，比它舊的交易日不必再抓。
+    """
+    dates = _lookback_dates()
+    cached = _load_cache()
+    if cached:
+        # 快取已是最新交易日，或剛剛才確認過還沒有新資料 → 同一天重跑直接回傳
+        recent = time.time() - cached.get('checked_at', 0) < RECHECK_MINUTES * 60
+        if cached['date'] >= dates[0] or (recent and cached['date'] >= dates[-1]):
+            http_fetch.set_tier('cache')
+            http_fetch.set_source_date(cached['date'])
+            return cached['value']
+        dates = [d for d in dates if d > cached['date']]
+
+    try:
+        date_str, val = http_fetch.tiered(('http', lambda: _fetch_via_http(dates)),
+                                          ('selenium', lambda: _fetch_via_selenium(dates)))
+        _save_cache(date_str, val)
+        http_fetch.set_source_date(date_str)  # 實際抓到的交易日 (回溯時可能比最新交易日舊)
+        return val
     except Exception as e:
+        # 較新的交易日還沒有資料 (例如 CBOE 尚未公布)，快取仍在回溯範圍內就沿用
+        if cached and cached['date'] >= _lookback_dates()[-1]:
+            _save_cache(cached['date'], cached['value'])  # 更新確認時間
+            http_fetch.set_tier('cache')
+            http_fetch.set_source_date(cached['date'])
+            return cached['value']
+        if isinstance(e, ValueError):
+            return "抓取失敗 (多日無資料)"
         return f"執行錯誤: {str(e)[:100]}"
-        
-    finally:
-        # 釋放記憶體
-        if 'driver' in locals():
-            driver.quit()
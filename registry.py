@@ -0,0 +1,53 @@
+# --- registry.py (v1.0: 指標抓取函式的延遲載入) ---
+# config.INDICATORS 只記錄「模組.函式」字串，這裡在真正要抓某個指標時才 import 對應模組。
+# 例如只跑 yfinance 指標時完全不會載入 Selenium / webdriver-manager。
+import importlib
+from functools import lru_cache
+from config import INDICATORS
+
+# 各 type 共用的 yfinance 抓取器 (以 ticker 參數區分)
+TYPE_FUNCS = {
+    'price': 'data_fetchers.fetch_yf_price',
+    'trend': 'data_fetchers.fetch_yf_trend',
+}
+
+@lru_cache(maxsize=None)
+def resolve(path):
+    """'模組.函式' → 函式物件 (同一路徑只 import 一次)"""
+    module, _, name = path.rpartition('.')
+    return getattr(importlib.import_module(module), name)
+
+def source_of(key):
+    """
+    'web' = 需要爬網頁的指標，'yfinance' = 只用行情資料計算的指標。
+    依 type 判斷；抓取函式實際還會連網頁的 custom 指標在 config 以 'source' 明確標示
+    """
+    cfg = INDICATORS[key]
+    return cfg.get('source') or ('web' if cfg['type'] == 'external' else 'yfinance')
+
+def fetcher(key):
+    """回傳不需參數的抓取函式"""
+    cfg = INDICATORS[key]
+    if cfg['type'] == 'price':
+        func = resolve(TYPE_FUNCS['price'])
+        return lambda: func(cfg['ticker'], cfg.get('correction', 1.0))
+    if cfg['type'] == 'trend':
+        func = resolve(TYPE_FUNCS['trend'])
+        return lambda: func(cfg['ticker'])
+    return resolve(cfg['func'])
+
+def select(only=None, source=None):
+    """
+    依條件挑出指標 key (維持 INDICATORS 的順序)。
+    only   : key 的集合 / list，None 為全部
+    source : 'yfinance' 或 'web'，None 為全部
+    """
+    unknown = set(only or ()) - set(INDICATORS)
+    if unknown:
+        raise KeyError(f"未知的指標: {', '.join(sorted(unknown))}")
+    return [key for key in INDICATORS
+            if (not only or key in only) and (not source or source_of(key) == source)]
+
+def tickers(keys):
+    """這些指標需要的 yfinance 代號 (行情快照預先下載用)"""
+    return [INDICATORS[key]['ticker'] for key in keys if 'ticker' in INDICATORS[key]]
@@ -0,0 +1,145 @@
+# --- result_cache.py (v1.0: 依公布節奏判斷新鮮度的結果快取) ---
+# 每個指標的最新結果連同「來源時間」存在 data/cache/results.json。
+# config.INDICATORS 的 'freshness' 宣告來源多久公布一次 (每週 / 每個交易日收盤後 / 盤中每 N 分鐘)，
+# 快取的來源時間若不早於「最近一次應公布的時間」，就代表來源還沒有新資料，整個爬蟲 (含開 Chrome) 直接略過。
+import os
+import json
+import time
+import datetime
+import threading
+import trading_calendar
+from config import INDICATORS
+from indicator_result import IndicatorResult
+
+CACHE_FILE = "data/cache/results.json"
+ENABLED = os.environ.get("RESULT_CACHE", "on") != "off"  # main.py --refresh 會關掉
+
+_lock = threading.Lock()
+
+def latest_publication(policy, now=None):
+    """
+    依 freshness 政策回傳 now 之前最近一次的公布時間 (epoch 秒)。
+    intraday 沒有固定的公布時間，回傳 now - minutes (快取時間晚於它即視為最新)。
+    """
+    now = now or time.time()
+    cadence = policy['cadence']
+    if cadence == 'intraday':
+        return now - policy['minutes'] * 60
+
+    ny_now = datetime.datetime.fromtimestamp(now, trading_calendar.NY_TZ)
+    if cadence == 'weekly':
+        at = datetime.time.fromisoformat(policy.get('at', '00:00'))
+        day = ny_now.date() - datetime.timedelta(days=(ny_now.weekday() - policy['weekday']) % 7)
+        moment = datetime.datetime.combine(day, at, tzinfo=trading_calendar.NY_TZ)
+        if moment > ny_now:
+            moment -= datetime.timedelta(days=7)
+        return moment.timestamp()
+
+    if cadence == 'daily':
+        delay = datetime.timedelta(minutes=policy.get('delay', 0))
+        session = trading_calendar.last_completed_session(ny_now)
+        moment = trading_calendar.close_time(session) + delay
+        if moment > ny_now:
+            session = trading_calendar.previous_session(session)
+            moment = trading_calendar.close_time(session) + delay
+        return moment.timestamp()
+
+    raise ValueError(f"未知的 freshness cadence: {cadence}")
+
+def next_publication(policy, now=None):
+    """now 之後下一次預期公布的時間 (epoch 秒)，常駐模式用來排程"""
+    now = now or time.time()
+    cadence = policy['cadence']
+    if cadence == 'intraday':
+        return now + policy['minutes'] * 60
+    if cadence == 'weekly':
+        last = datetime.datetime.fromtimestamp(latest_publication(policy, now), trading_calendar.NY_TZ)
+        return (last + datetime.timedelta(days=7)).timestamp()  # 以美東牆上時間加 7 天，跨夏令時間也正確
+    if cadence == 'daily':
+        delay = datetime.timedelta(minutes=policy.get('delay', 0))
+        day = datetime.datetime.fromtimestamp(latest_publication(policy, now), trading_calendar.NY_TZ).date()
+        return (trading_calendar.close_time(trading_calendar.next_session(day)) + delay).timestamp()
+    raise ValueError(f"未知的 freshness cadence: {cadence}")
+
+def publication_time(policy, day):
+    """資料日期 day (datetime.date 或 'YYYY-MM-DD') 對應的公布時間 (epoch 秒)"""
+    if isinstance(day, str):
+        day = datetime.date.fromisoformat(day)
+    if policy['cadence'] == 'weekly':
+        at = datetime.time.fromisoformat(policy.get('at', '00:00'))
+        return datetime.datetime.combine(day, at, tzinfo=trading_calendar.NY_TZ).timestamp()
+    close = trading_calendar.close_time(day) or datetime.datetime.combine(
+        day, trading_calendar.REGULAR_CLOSE, tzinfo=trading_calendar.NY_TZ)
+    return (close + datetime.timedelta(minutes=policy.get('delay', 0))).timestamp()
+
+def _load():
+    try:
+        with open(CACHE_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def _save(entries):
+    try:
+        os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+        tmp = CACHE_FILE + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, CACHE_FILE)
+    except Exception as e:
+        print(f"⚠️ 結果快取寫入失敗: {e}")
+
+def lookup(key, now=None):
+    """快取的值仍是最新時回傳 IndicatorResult (tier='cache')，否則回傳 None"""
+    policy = INDICATORS[key].get('freshness')
+    if not policy or not ENABLED: return None
+    with _lock:
+        entry = _load().get(key)
+    if not entry: return None
+    # intraday 比的是抓取時間；週 / 日公布的比的是來源時間
+    stamp = entry['fetched_at'] if policy['cadence'] == 'intraday' else entry['as_of']
+    if stamp < latest_publication(policy, now):
+        return None
+    return IndicatorResult.from_dict(key, entry)
+
+def stamp(result, now=None, source_date=None):
+    """
+    替剛抓到的結果標上來源時間：
+    爬蟲從資料本身讀到日期時 (source_date，見 http_fetch.set_source_date) 用該日期的公布時間，
+    否則用最近一次應公布的時間推算；沒有宣告 freshness 或盤中變動的指標為抓取時間
+    """
+    now = now or time.time()
+    policy = INDICATORS[result.key].get('freshness')
+    if policy and policy['cadence'] != 'intraday':
+        result.dated = source_date is not None
+        if result.dated:
+            result.as_of = min(now, publication_time(policy, source_date))
+        else:
+            result.as_of = latest_publication(policy, now)
+    else:
+        result.as_of = now
+    return result
+
+def store(result, now=None):
+    """成功的結果才寫入；失敗時保留上一次的快取"""
+    policy = INDICATORS[result.key].get('freshness')
+    if result.error is not None or not policy:
+        return
+    with _lock:
+        entries = _load()
+        old = entries.get(result.key)
+        if (old and policy['cadence'] != 'intraday' and not result.dated and old['as_of'] < result.as_of
+                and (old['text'], old.get('aux')) == (result.text, result.aux)):
+            # 到了公布時間但數值完全沒變，多半是來源晚公布：沿用舊的來源時間，下次執行再確認
+            # (來源時間取自資料本身的日期時不必猜：新的交易日剛好數值相同也是新資料)
+            result.as_of = old['as_of']
+        entries[result.key] = {**result.to_dict(), 'fetched_at': now or time.time()}
+        _save(entries)
+
+def age_text(as_of, now=None):
+    """資料年齡的顯示文字，例如 '3小時前'、'2天前'；一小時內回傳空字串"""
+    if as_of is None: return ""
+    age = (now or time.time()) - as_of
+    if age < 3600: return ""
+    if age < 86400: return f"{age / 3600:.0f}小時前"
+    return f"{age / 86400:.0f}天前"
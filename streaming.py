@@ -0,0 +1,271 @@
+# --- streaming.py (v1.0: 盤中串流模式) ---
+# 盤中每隔 interval 秒輪詢一次報價，只更新累計狀態，不重算整段歷史：
+#   MA20 : 前 19 根已收盤 K 線的收盤價與總和，加上最新報價即得 20 日均線
+#   RSI  : Wilder 平滑後的平均漲幅 / 跌幅 (與 data_fetchers 的 ewm(com=13, adjust=False) 相同)
+#   其餘 : 前一日收盤 (比特幣漲跌幅、XLY/XLP 比值方向)
+# 換日時從本地日 K 快取取前一天的官方收盤價併入狀態 (不用盤中最後一次輪詢到的報價)；
+# 狀態存在 STREAM_SETTINGS['state_file']，重啟後接續，中間漏掉交易日 (停機、當機) 時從日 K 快取重建。
+# 每次更新都用 config 門檻重新判讀，只有判讀翻轉 (例如 🟢 → ⚪) 時才通知。
+#
+# 用法: python streaming.py [--interval 秒] [--once] [--always]
+import os
+import sys
+import json
+import time
+import datetime
+import argparse
+from collections import deque
+import bar_cache
+import registry
+import trading_calendar
+from config import INDICATORS, STREAM_SETTINGS
+from indicator_result import IndicatorResult
+
+MA_WINDOW = 20
+RSI_PERIOD = 14
+# 自訂計算的指標 → 用到的代號；'price' / 'trend' 類指標直接看 config 的 ticker
+CUSTOM_TICKERS = {'BTC': ['BTC-USD'], 'RSI': ['^GSPC'], 'RISK_RATIO': ['XLY', 'XLP']}
+
+class TickerState:
+    """
+    單一代號的累計狀態，每次報價 O(1)。
+    day    : 目前這根 (可能尚未收盤) K 線的日期，last 為它最新的價格
+    window : 之前已收盤的最多 19 根收盤價，total 為其總和
+    prev   : 前一根已收盤的收盤價
+    gain / loss : 截至 prev 的 Wilder 平均漲幅 / 跌幅
+    """
+    __slots__ = ('day', 'last', 'window', 'total', 'prev', 'gain', 'loss')
+
+    def __init__(self, day=None, last=None, window=(), prev=None, gain=None, loss=None):
+        self.day = day
+        self.last = last
+        self.window = deque(window, maxlen=MA_WINDOW - 1)
+        self.total = sum(self.window)
+        self.prev = prev
+        self.gain = gain
+        self.loss = loss
+
+    @classmethod
+    def seed(cls, frame):
+        """用日 K 歷史建立狀態 (只在第一次或狀態過舊時做一次)"""
+        state = cls()
+        for day, close in zip(frame.index, frame['Close']):
+            state.tick(day.strftime('%Y-%m-%d'), float(close))
+        return state
+
+    def _close(self, close):
+        """把一根收盤的 K 線併入狀態"""
+        if len(self.window) == self.window.maxlen:
+            self.total -= self.window[0]
+        self.window.append(close)
+        self.total += close
+        if self.prev is None:
+            self.gain = self.loss = 0.0  # 與 pandas 相同：第一根沒有漲跌，平均從 0 起算
+        else:
+            delta = close - self.prev
+            self.gain += (max(delta, 0.0) - self.gain) / RSI_PERIOD
+            self.loss += (max(-delta, 0.0) - self.loss) / RSI_PERIOD
+        self.prev = close
+
+    def tick(self, day, price, close=None):
+        """新報價；換日時把前一根 K 線以 close (官方收盤價，取不到時用最後報價) 併入狀態"""
+        if self.day is not None and day > self.day:
+            self._close(self.last if close is None else close)
+        elif self.day is not None and day < self.day:
+            return  # 比目前還舊的報價 (資料源延遲)，忽略
+        self.day, self.last = day, price
+
+    def ma(self):
+        if len(self.window) < MA_WINDOW - 1: return None
+        return (self.total + self.last) / MA_WINDOW
+
+    def rsi(self):
+        if self.gain is None or self.prev is None: return None
+        delta = self.last - self.prev
+        gain = self.gain + (max(delta, 0.0) - self.gain) / RSI_PERIOD
+        loss = self.loss + (max(-delta, 0.0) - self.loss) / RSI_PERIOD
+        return 100 - 100 / (1 + gain / loss) if loss else 100.0
+
+    def change(self):
+        if not self.prev: return None
+        return (self.last - self.prev) / self.prev * 100
+
+    def to_dict(self):
+        return {'day': self.day, 'last': self.last, 'window': list(self.window),
+                'prev': self.prev, 'gain': self.gain, 'loss': self.loss}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['day'], data['last'], data['window'], data['prev'], data['gain'], data['loss'])
+
+def stream_keys(keys=None):
+    """可以串流計算的指標 (只用行情資料的指標)"""
+    return [key for key in registry.select(keys, source='yfinance')
+            if INDICATORS[key]['type'] in ('price', 'trend') or key in CUSTOM_TICKERS]
+
+def tickers_for(keys):
+    return sorted(set(registry.tickers(keys)) | {t for k in keys for t in CUSTOM_TICKERS.get(k, ())})
+
+# --- 1. 由狀態產生指標值 (字串格式與 data_fetchers 相同，判讀走同一套 IndicatorResult) ---
+def evaluate(key, states):
+    cfg = INDICATORS[key]
+    try:
+        if cfg['type'] == 'price':
+            val = states[cfg['ticker']].last
+            correction = cfg.get('correction', 1.0)
+            if correction != 1.0 and val > 20: val = val * correction
+            raw = f"{val:.2f}"
+        elif cfg['type'] == 'trend':
+            s = states[cfg['ticker']]
+            ma = s.ma()
+            raw = "N/A" if ma is None else f"{s.last:.2f} ({'Above' if s.last > ma else 'Below'})"
+        elif key == 'RSI':
+            rsi = states['^GSPC'].rsi()
+            raw = "N/A" if rsi is None else f"{rsi:.1f}"
+        elif key == 'BTC':
+            chg = states['BTC-USD'].change()
+            raw = "N/A" if chg is None else f"{chg:+.2f}%"
+        elif key == 'RISK_RATIO':
+            xly, xlp = states['XLY'], states['XLP']
+            if not xly.prev or not xlp.prev:
+                raw = "N/A"
+            else:
+                r_now, r_prev = xly.last / xlp.last, xly.prev / xlp.prev
+                raw = f"{r_now:.2f} ({'↗️' if r_now > r_prev else '↘️'})"
+        else:
+            raw = "N/A"
+    except KeyError as e:
+        raw = f"Error: 沒有 {e} 的報價"
+    return IndicatorResult.from_raw(key, raw, tier='stream')
+
+# --- 2. 狀態存取 ---
+def load_state(path=None):
+    try:
+        with open(path or STREAM_SETTINGS['state_file'], encoding='utf-8') as f:
+            data = json.load(f)
+        return {t: TickerState.from_dict(d) for t, d in data['tickers'].items()}, data.get('status', {})
+    except Exception:
+        return {}, {}
+
+def save_state(states, status, path=None):
+    path = path or STREAM_SETTINGS['state_file']
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'tickers': {t: s.to_dict() for t, s in states.items()}, 'status': status}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"⚠️ 串流狀態寫入失敗: {e}")
+
+def _stale(ticker, state, today):
+    """
+    狀態是否漏掉了 K 線：最後一根早於前一個交易日 (加密貨幣每天交易，早於昨天)。
+    換日只會併入一根 K 線，中間漏掉的交易日必須從日 K 快取重建
+    """
+    if state is None or not state.day: return True
+    if ticker.endswith('-USD'):
+        floor = today - datetime.timedelta(days=1)
+    else:
+        floor = trading_calendar.previous_session(today)
+    return state.day < floor.isoformat()
+
+def seed_states(states, tickers):
+    """缺少或漏了 K 線的代號從本地日 K 快取重建 (其餘沿用存檔的狀態)"""
+    today = datetime.datetime.now(trading_calendar.NY_TZ).date()
+    missing = [t for t in tickers if _stale(t, states.get(t), today)]
+    if not missing: return states
+    for ticker, frame in bar_cache.update(missing).items():
+        states[ticker] = TickerState.seed(frame)
+    print(f"🌱 串流狀態重建: {', '.join(missing)}")
+    return states
+
+# --- 3. 輪詢 ---
+def fetch_quotes(tickers):
+    """一次批次下載當日 1 分鐘 K，回傳 {ticker: (日期, 最新價)}"""
+    quotes = {}
+    for ticker, frame in bar_cache.download(tickers, period="1d", interval="1m").items():
+        quotes[ticker] = (frame.index[-1].strftime('%Y-%m-%d'), float(frame['Close'].iloc[-1]))
+    return quotes
+
+def official_closes(days):
+    """{ticker: 換日前的日期} → {ticker: 該日官方收盤價}；強制增量更新日 K 快取 (快取裡可能是盤中未收的 K 線)"""
+    frames = bar_cache.update(list(days), fresh_seconds=0)
+    closes = {}
+    for ticker, day in days.items():
+        frame = frames.get(ticker)
+        if frame is None: continue
+        hit = frame['Close'][frame.index.strftime('%Y-%m-%d') == day]
+        if len(hit): closes[ticker] = float(hit.iloc[-1])
+    missing = sorted(set(days) - set(closes))
+    if missing:
+        print(f"⚠️ 取不到 {', '.join(missing)} 的官方收盤價，暫用最後報價")
+    return closes
+
+def alert(flips):
+    lines = [f"{INDICATORS[key]['name']}: {old} → **{res.status}** ({res.display()})" for key, old, res in flips]
+    for line in lines:
+        print(f"🔔 {line}")
+    if not STREAM_SETTINGS['alert']: return
+    import discord_delivery
+    discord_delivery.deliver({"content": "🔔 **盤中判讀翻轉**\n" + "\n".join(lines)})
+
+def step(keys, tickers, states, status):
+    """輪詢一次：更新狀態 → 判讀 → 回傳翻轉的指標 [(key, 舊判讀, 新結果)]"""
+    seed_states(states, tickers)  # 長時間停在休市 / 輪詢失敗後，先補回漏掉的 K 線
+    quotes = fetch_quotes(tickers)
+    rolled = {t: states[t].day for t, (day, _) in quotes.items()
+              if t in states and states[t].day and day > states[t].day}
+    closes = official_closes(rolled) if rolled else {}
+    for ticker, (day, price) in quotes.items():
+        states.setdefault(ticker, TickerState()).tick(day, price, closes.get(ticker))
+    flips = []
+    for key in keys:
+        res = evaluate(key, states)
+        if res.error is not None: continue
+        old = status.get(key)
+        if old is not None and old != res.status:
+            flips.append((key, old, res))
+        status[key] = res.status
+    return flips
+
+def run(keys=None, interval=None, once=False, always=False):
+    keys = stream_keys(keys)
+    tickers = tickers_for(keys)
+    interval = interval or STREAM_SETTINGS['interval']
+    states, status = load_state()
+    seed_states(states, tickers)
+    print(f"📡 串流模式: {len(keys)} 個指標 / {len(tickers)} 個代號，每 {interval} 秒更新")
+
+    while True:
+        now = datetime.datetime.now(trading_calendar.NY_TZ)
+        if not always and not trading_calendar.is_open(now):
+            if once: return status
+            wake = trading_calendar.next_open(now)
+            print(f"💤 休市中，{wake:%m-%d %H:%M} (美東) 開盤後繼續")
+            time.sleep(max(1, (wake - now).total_seconds()))
+            continue
+        try:
+            flips = step(keys, tickers, states, status)
+            save_state(states, status)
+            if flips: alert(flips)
+        except Exception as e:
+            print(f"❌ 串流更新失敗: {str(e)[:100]}")
+        if once: return status
+        time.sleep(interval)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="盤中串流更新 yfinance 類指標，判讀翻轉時通知")
+    parser.add_argument('--only', help="只串流這些指標，逗號分隔")
+    parser.add_argument('--interval', type=int, help=f"輪詢秒數 (預設 {STREAM_SETTINGS['interval']})")
+    parser.add_argument('--once', action='store_true', help="只更新一次就結束")
+    parser.add_argument('--always', action='store_true', help="休市時也輪詢 (例如只看比特幣)")
+    args = parser.parse_args()
+    try:
+        only = [k.strip() for k in args.only.split(',')] if args.only else None
+        result = run(only, args.interval, args.once, args.always)
+    except KeyboardInterrupt:
+        sys.exit(0)
+    if args.once:
+        for key, st in (result or {}).items():
+            print(f"  {INDICATORS[key]['name']}: {st}")
@@ -0,0 +1,47 @@
+# --- tests/test_harvest_save_csv.py (收割後同一天的每日存檔) ---
+# 收割會把週資料延續到最後一個已收盤交易日，先寫出只有 AAII_Diff 的列；
+# 同一天的每日存檔仍要寫入完整的大盤 / 指標欄位，而不是當成「已存在」跳過。
+import os
+import sys
+import types
+import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import harvest
+import history_store
+import trading_calendar
+import utils
+
+SESSION = datetime.date(2025, 12, 5)  # 週五
+MARKET = {'SPX_Open': '6850.00', 'SPX_High': '6890.00', 'SPX_Low': '6840.00', 'SPX_Close': '6870.00',
+          'SPX_Volume': '2500000000'}
+
+def _isolate(monkeypatch, tmp_path):
+    monkeypatch.setattr(history_store, 'ROOT', str(tmp_path / "history"))
+    monkeypatch.setattr(history_store, 'LEGACY_CSV', str(tmp_path / "history.csv"))
+    monkeypatch.setattr(trading_calendar, 'last_completed_session', lambda *a, **k: SESSION)
+    # 只替換網路抓取，寫入流程走真的 history_store
+    monkeypatch.setattr(harvest, 'harvest_aaii', lambda: {SESSION - datetime.timedelta(days=1): 12.3})
+    fake = types.SimpleNamespace(fetch_full_market_data=lambda date=None: dict(MARKET),
+                                 fetch_short_term_yield=lambda: "4.10%")
+    monkeypatch.setitem(sys.modules, 'data_fetchers', fake)
+
+def test_save_csv_after_harvest_same_day(monkeypatch, tmp_path):
+    _isolate(monkeypatch, tmp_path)
+    harvest.run(sources=('aaii',))
+    day = SESSION.isoformat()
+    row = history_store.get_row(day)
+    assert row['AAII_Diff'] == '12.3' and not row['SPX_Close']
+
+    utils.save_csv({'VIX': "18.50", 'AAII': "20.0"})
+    row = history_store.get_row(day)
+    assert row['SPX_Close'] == MARKET['SPX_Close']
+    assert row['3M_Yield'] == '4.10'
+    assert row['VIX'] == '18.50'
+    assert row['AAII_Diff'] == '12.3'  # 收割到的值不被覆蓋
+
+    # 已經有完整的一列 → 第二次存檔跳過
+    utils.save_csv({'VIX': "25.00"})
+    assert history_store.get_row(day)['VIX'] == '18.50'
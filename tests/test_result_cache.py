@@ -0,0 +1,45 @@
+# --- tests/test_result_cache.py (結果快取的來源時間) ---
+# 爬蟲讀到資料本身的日期時，新的交易日即使數值與前一天相同，也要視為新資料 (不能被當成來源晚公布)。
+import os
+import sys
+import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import result_cache
+import trading_calendar
+from indicator_result import IndicatorResult
+
+POLICY = result_cache.INDICATORS['PUT_CALL']['freshness']
+
+def _at(day, hour):
+    return datetime.datetime.combine(day, datetime.time(hour), tzinfo=trading_calendar.NY_TZ).timestamp()
+
+def _fetch(value, now, source_date):
+    res = IndicatorResult.from_raw('PUT_CALL', value)
+    result_cache.stamp(res, now, source_date=source_date)
+    result_cache.store(res, now)
+    return res
+
+def test_repeated_value_on_new_session_stays_fresh(monkeypatch, tmp_path):
+    monkeypatch.setattr(result_cache, 'CACHE_FILE', str(tmp_path / "results.json"))
+    monkeypatch.setattr(result_cache, 'ENABLED', True)
+    d1, d2 = datetime.date(2026, 10, 14), datetime.date(2026, 10, 15)
+
+    _fetch("0.85", _at(d1, 20), d1)
+    res = _fetch("0.85", _at(d2, 20), d2)
+    assert res.as_of == result_cache.publication_time(POLICY, d2)
+
+    # 隔天早上重跑：來源還沒公布 10/16 的資料 → 快取命中，不必再抓
+    cached = result_cache.lookup('PUT_CALL', _at(datetime.date(2026, 10, 16), 8))
+    assert cached is not None and cached.text == "0.85"
+
+def test_repeated_value_without_source_date_keeps_old_as_of(monkeypatch, tmp_path):
+    monkeypatch.setattr(result_cache, 'CACHE_FILE', str(tmp_path / "results.json"))
+    monkeypatch.setattr(result_cache, 'ENABLED', True)
+    d1, d2 = datetime.date(2026, 10, 14), datetime.date(2026, 10, 15)
+
+    first = _fetch("0.85", _at(d1, 20), None)
+    second = _fetch("0.85", _at(d2, 20), None)
+    assert second.as_of == first.as_of  # 推算的時間：數值沒變視為來源晚公布
@@ -0,0 +1,164 @@
+# --- trading_calendar.py (v2.0: 離線 NYSE 交易日曆) ---
+# 依規則推算 NYSE 休市日與提早收盤日，不需要任何網路請求。
+# 交易日表在第一次使用時一次算好 (FIRST_YEAR ~ LAST_YEAR)，之後都是記憶體查表 / 二分搜尋。
+import bisect
+import datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+NY_TZ = ZoneInfo("America/New_York")
+TAIPEI_TZ = ZoneInfo("Asia/Taipei")
+
+FIRST_YEAR = 1990
+LAST_YEAR = 2100
+REGULAR_OPEN = datetime.time(9, 30)
+REGULAR_CLOSE = datetime.time(16, 0)
+EARLY_CLOSE = datetime.time(13, 0)
+
+# 規則以外的臨時休市 (國喪日、天災等)
+SPECIAL_CLOSURES = {
+    datetime.date(2001, 9, 11), datetime.date(2001, 9, 12), datetime.date(2001, 9, 13), datetime.date(2001, 9, 14),
+    datetime.date(2004, 6, 11),   # 雷根國喪
+    datetime.date(2007, 1, 2),    # 福特國喪
+    datetime.date(2012, 10, 29), datetime.date(2012, 10, 30),  # 颶風 Sandy
+    datetime.date(2018, 12, 5),   # 老布希國喪
+    datetime.date(2025, 1, 9),    # 卡特國喪
+}
+
+def _easter(year):
+    """復活節日期 (Anonymous Gregorian algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return datetime.date(year, month, day + 1)
+
+def _nth_weekday(year, month, weekday, n):
+    """某月第 n 個星期幾 (weekday: 週一=0)；n=-1 表示最後一個"""
+    if n > 0:
+        first = datetime.date(year, month, 1)
+        return first + datetime.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = datetime.date(year + month // 12, month % 12 + 1, 1) - datetime.timedelta(days=1)
+    return last - datetime.timedelta(days=(last.weekday() - weekday) % 7)
+
+def _observed(day):
+    """週六的假日提前到週五、週日的假日延到週一"""
+    if day.weekday() == 5: return day - datetime.timedelta(days=1)
+    if day.weekday() == 6: return day + datetime.timedelta(days=1)
+    return day
+
+@lru_cache(maxsize=None)
+def holidays(year):
+    """該年度 NYSE 全日休市的日期集合"""
+    days = set()
+    # 元旦：落在週六時 NYSE 不會在前一年 12/31 補休
+    new_year = datetime.date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days.add(_observed(new_year))
+    if year >= 1998:
+        days.add(_nth_weekday(year, 1, 0, 3))           # 馬丁路德金恩紀念日
+    days.add(_nth_weekday(year, 2, 0, 3))               # 總統日
+    days.add(_easter(year) - datetime.timedelta(days=2))  # 耶穌受難日
+    days.add(_nth_weekday(year, 5, 0, -1))              # 陣亡將士紀念日
+    if year >= 2022:
+        days.add(_observed(datetime.date(year, 6, 19)))  # 六月節
+    days.add(_observed(datetime.date(year, 7, 4)))      # 獨立紀念日
+    days.add(_nth_weekday(year, 9, 0, 1))               # 勞動節
+    days.add(_nth_weekday(year, 11, 3, 4))              # 感恩節
+    days.add(_observed(datetime.date(year, 12, 25)))    # 聖誕節
+    days.update(d for d in SPECIAL_CLOSURES if d.year == year)
+    # 隔年元旦落在週六時不補休，但若是週日補到週一則屬於隔年，這裡只保留當年的日期
+    return frozenset(d for d in days if d.year == year)
+
+def is_session(day):
+    """是否為 NYSE 交易日"""
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+@lru_cache(maxsize=None)
+def early_closes(year):
+    """該年度 13:00 提早收盤的日期：獨立紀念日前一天、感恩節隔天、聖誕夜 (當天需為交易日)"""
+    days = {
+        datetime.date(year, 7, 3),
+        _nth_weekday(year, 11, 3, 4) + datetime.timedelta(days=1),
+        datetime.date(year, 12, 24),
+    }
+    return frozenset(d for d in days if is_session(d))
+
+def open_time(day):
+    """該交易日的開盤時間 (紐約時區)；非交易日回傳 None"""
+    if not is_session(day): return None
+    return datetime.datetime.combine(day, REGULAR_OPEN, tzinfo=NY_TZ)
+
+def close_time(day):
+    """該交易日的收盤時間 (紐約時區)；非交易日回傳 None"""
+    if not is_session(day): return None
+    t = EARLY_CLOSE if day in early_closes(day.year) else REGULAR_CLOSE
+    return datetime.datetime.combine(day, t, tzinfo=NY_TZ)
+
+@lru_cache(maxsize=1)
+def _session_table():
+    """FIRST_YEAR ~ LAST_YEAR 所有交易日 (已排序)，只計算一次"""
+    day = datetime.date(FIRST_YEAR, 1, 1)
+    end = datetime.date(LAST_YEAR, 12, 31)
+    table = []
+    while day <= end:
+        if is_session(day):
+            table.append(day)
+        day += datetime.timedelta(days=1)
+    return tuple(table)
+
+def sessions(start, end):
+    """[start, end] 之間的所有交易日 (舊到新)"""
+    table = _session_table()
+    return list(table[bisect.bisect_left(table, start):bisect.bisect_right(table, end)])
+
+def previous_session(day):
+    """day 之前 (不含) 的最近交易日"""
+    table = _session_table()
+    return table[bisect.bisect_left(table, day) - 1]
+
+def last_completed_session(now=None):
+    """
+    截至 now 為止最後一個已收盤的交易日。
+    now 預設為台北現在時間 (GitHub Actions 排程 08:00 台北 = 紐約前一天晚上，已收盤)。
+    """
+    now = now or datetime.datetime.now(TAIPEI_TZ)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=TAIPEI_TZ)
+    ny_now = now.astimezone(NY_TZ)
+    today = ny_now.date()
+    close = close_time(today)
+    if close is not None and ny_now >= close:
+        return today
+    return previous_session(today)
+
+def next_session(day):
+    """day 之後 (不含) 的下一個交易日"""
+    table = _session_table()
+    return table[bisect.bisect_right(table, day)]
+
+def is_open(now=None):
+    """now (預設現在) 是否在正常交易時段內"""
+    ny_now = (now or datetime.datetime.now(NY_TZ)).astimezone(NY_TZ)
+    start = open_time(ny_now.date())
+    return start is not None and start <= ny_now < close_time(ny_now.date())
+
+def next_open(now=None):
+    """now 之後最近一次開盤的時間 (已在盤中則回傳下一個交易日的開盤)"""
+    ny_now = (now or datetime.datetime.now(NY_TZ)).astimezone(NY_TZ)
+    today = open_time(ny_now.date())
+    if today is not None and ny_now < today:
+        return today
+    return open_time(next_session(ny_now.date()))
+
+def sessions_back(end, count):
+    """從 end (含) 往回的 count 個交易日，新到舊排列"""
+    table = _session_table()
+    i = bisect.bisect_right(table, end)
+    return list(reversed(table[max(0, i - count):i]))
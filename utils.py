@@ -1,13 +1,13 @@
-# --- utils.py (v6.1: 完美防呆版 - 自動跳過休市日與週末) ---
-import os
-import requests
+# --- utils.py (v7.2: 延遲載入) ---
+# 判讀與報表只依賴 config / IndicatorResult；requests、pandas、yfinance 等到真正要發送或存檔時才匯入。
 import datetime
-import csv
+from collections import Counter
 import re
-import pandas as pd # 需要引入 pandas 來讀取 CSV
-import yfinance as yf # 需要引入 yf 來確認真實日期
 from config import INDICATORS, IMAGES
-import data_fetchers as df    
+import history_store
+import result_cache
+import trading_calendar
+from indicator_result import IndicatorResult
 
 def extract_numeric_value(text):
     if not isinstance(text, str): return ""
@@ -16,66 +16,30 @@ def extract_numeric_value(text):
     if match: return match.group()
     return ""
 
-def get_indicator_status(key, value_in):
-    value_str = value_in
-    if key == 'AAII' and isinstance(value_in, tuple) and len(value_in) >= 3:
-        value_str = value_in[2]
-
-    if not value_str or "Error" in str(value_str) or "N/A" in str(value_str):
-        return "⚠️ 無法判讀"
-    
-    cfg = INDICATORS.get(key)
-    if not cfg: return "⚪ 中性"
+def as_result(key, val):
+    """把原始抓取值轉成 IndicatorResult (已經是就直接回傳)"""
+    return IndicatorResult.from_raw(key, val)
 
-    try:
-        clean_val = str(value_str).replace('%','').replace('+','').replace(',','').split()[0]
-        val = float(clean_val)
-        thresholds = cfg['thresholds']
-        
-        if thresholds == 'ma_trend':
-            if "(Above)" in str(value_str): return "🟢 多頭排列" if key != 'HYG' else "🟢 資金流入"
-            if "(Below)" in str(value_str): return "🔴 轉弱/空頭" if key != 'HYG' else "🔴 資金流出"
-            return "⚪ 中性"
-            
-        if thresholds == 'arrow_trend':
-            if "↗️" in str(value_str): return "🟢 Risk On"
-            if "↘️" in str(value_str): return "🔴 Risk Off"
-            return "⚪ 中性"
-
-        g_limit, r_limit = thresholds
-        
-        if key == 'BTC':
-            if val > g_limit: return "🟢 大漲 (Risk On)"
-            if val < r_limit: return "🔴 大跌 (Risk Off)"
-            return "⚪ 波動正常"
-        
-        if key == 'PUT_CALL':
-            if val > g_limit: return "🟢 看空過度 (偏多)"
-            if val < r_limit: return "🔴 看多過度 (偏空)"
-            return "⚪ 中性"
-            
-        if key == 'VIX':
-            if val > g_limit: return "🟢 市場恐慌 (偏多)"
-            if val < r_limit: return "🔴 市場自滿 (偏空)"
-            return "⚪ 中性"
-
-        if cfg.get('inverse'):
-            if val <= g_limit: return "🟢 偏多"
-            if val >= r_limit: return "🔴 偏空"
-        else:
-            if val >= g_limit: return "🟢 偏多"
-            if val <= r_limit: return "🔴 偏空"
-
-        return "⚪ 中性"
-    except: return "⚪ 中性"
+def get_indicator_status(key, value_in):
+    return as_result(key, value_in).status
 
-def calculate_summary(results):
+def count_votes(results):
+    """回傳 (多方數, 空方數)；每個指標的 status 在建立結果時就已算好"""
     bulls = 0
     bears = 0
     for key, val in results.items():
-        status = get_indicator_status(key, val)
-        if "🟢" in status: bulls += 1
-        if "🔴" in status: bears += 1
+        signal = as_result(key, val).signal
+        if signal > 0: bulls += 1
+        if signal < 0: bears += 1
+    return bulls, bears
+
+def tier_summary(results):
+    """例如 'http×2 selenium×5 yfinance×8'，記錄本次各資料由哪一層抓到"""
+    tiers = Counter(as_result(key, val).tier for key, val in results.items())
+    return " ".join(f"{tier}×{n}" for tier, n in tiers.items() if tier)
+
+def calculate_summary(results):
+    bulls, bears = count_votes(results)
     
     concl = "⚪ 市場分歧，建議觀望"
     if bulls > bears: concl = "🟢 市場偏向恐懼/機會 (Risk On)"
@@ -83,15 +47,11 @@ def calculate_summary(results):
     return f"**🟢 多方**: {bulls} | **🔴 空方**: {bears}\n👉 {concl}"
 
 def send_discord(results, market_text, summary):
-    url = os.environ.get("DISCORD_WEBHOOK_URL")
-    if not url: return
+    import discord_delivery
+    urls = discord_delivery.webhook_urls()
+    if not urls: return
 
-    bulls = 0
-    bears = 0
-    for key, val in results.items():
-        status = get_indicator_status(key, val)
-        if "🟢" in status: bulls += 1
-        if "🔴" in status: bears += 1
+    bulls, bears = count_votes(results)
     
     embed_color = 0x95a5a6 
     thumbnail_url = IMAGES['NEUTRAL']
@@ -120,12 +80,9 @@ def send_discord(results, market_text, summary):
         content = ""
         cat_indicators = {k: v for k, v in INDICATORS.items() if v['category'] == cat_key}
         for key, cfg in cat_indicators.items():
-            val = results.get(key, "N/A")
-            display_val = val
-            if key == 'AAII' and isinstance(val, tuple) and len(val) >= 3:
-                display_val = f"多{val[0]}% | 空{val[1]}%"
-            status = get_indicator_status(key, val)
-            content += f"> {cfg['name']}: **{display_val}** ({status})\n"
+            res = as_result(key, results.get(key, "N/A"))
+            age = result_cache.age_text(res.as_of) if res.error is None else ""
+            content += f"> {cfg['name']}: **{res.display()}** ({res.status})" + (f" · {age}" if age else "") + "\n"
             
         fields.append({"name": cat_name, "value": content, "inline": False})
         if i < len(cat_items) - 1:
@@ -137,68 +94,35 @@ def send_discord(results, market_text, summary):
             "color": embed_color,
             "fields": fields,
             "image": {"url": thumbnail_url}, 
-            "footer": {"text": "財經 Discord 機器人"},
+            "footer": {"text": f"財經 Discord 機器人 | {tier_summary(results)}"},
             "timestamp": datetime.datetime.now().isoformat()
         }]
     }
-    try: requests.post(url, json=data)
-    except Exception as e: print(f"Discord Error: {e}")
+    # embed 只建一次，多個 webhook 同時發送 (限流 / 重試見 discord_delivery)
+    discord_delivery.deliver(data, urls)
 
 def save_csv(results):
+    import data_fetchers as df
     try:
-        folder = "data"
-        if not os.path.exists(folder): os.makedirs(folder)
-        file = "data/history.csv"
-        
         # 1. 取得市場真實交易日期 (這是防呆的核心)
-        try:
-            # 抓取 SPX 歷史資料來確認「最新的有效交易日」
-            t = yf.Ticker("^GSPC")
-            # 抓 5 天是為了避免長假 (如聖誕+週末)
-            hist = t.history(period="5d")
-            
-            if not hist.empty:
-                # 取得最後一筆資料的日期 (格式: YYYY-MM-DD)
-                last_trade_date = hist.index[-1].strftime("%Y-%m-%d")
-            else:
-                # 萬一 yfinance 掛了，只好退回到系統日期 (極少發生)
-                print("⚠️ 無法取得市場日期，使用系統日期")
-                last_trade_date = datetime.datetime.now().strftime("%Y-%m-%d")
-        except Exception as e:
-            print(f"❌ 日期偵測失敗: {e}")
-            last_trade_date = datetime.datetime.now().strftime("%Y-%m-%d")
+        # 離線 NYSE 日曆：台北現在時間對應的「最後一個已收盤交易日」，週末 / 休市日自動回到前一個交易日
+        last_trade_date = trading_calendar.last_completed_session().strftime("%Y-%m-%d")
 
         print(f"📅 偵測到最新交易日為: {last_trade_date}")
 
-        # 2. 檢查 CSV 是否已存在該日期 (去重複)
-        if os.path.exists(file):
-            try:
-                # 讀取現有 CSV
-                existing_df = pd.read_csv(file)
-                # 檢查 Date 欄位
-                if 'Date' in existing_df.columns:
-                    if last_trade_date in existing_df['Date'].values.astype(str):
-                        print(f"🛑 日期 {last_trade_date} 已存在，今日不寫入 (可能是週末或休市)。")
-                        return # <--- 關鍵！直接結束函式，不存檔
-            except Exception as e:
-                print(f"⚠️ 讀取 CSV 檢查時發生錯誤 (可能檔案損壞，將嘗試附加): {e}")
-
-        # 3. 準備數據 (AI 訓練格式)
-        fieldnames = [
-            'Date', 
-            'SPX_Open', 'SPX_High', 'SPX_Low', 'SPX_Close', 'SPX_Volume',
-            'NDX_Open', 'NDX_High', 'NDX_Low', 'NDX_Close', 'NDX_Volume',
-            '10Y_Yield', '3M_Yield',
-            'RSI', 'VIX', 'CNN', 'Put_Call', 
-            'DXY', 'BTC_Chg', 'HYG_Price', 
-            'Risk_Ratio', 'IWM_Price', 'SOXX_Price', 
-            'NAAIM', 'SKEW', 'AAII_Diff', 'Above_200MA'
-        ]
-        
-        market_data = df.fetch_full_market_data()
+        # 2. 檢查歷史資料是否已存在該日期 (去重複，只讀當月分區)
+        # 收割 / 回填可能先寫入只有部分欄位的列 (例如 AAII_Diff)；沒有大盤收盤價就還不算已存檔
+        existing = history_store.get_row(last_trade_date)
+        if existing and existing.get('SPX_Close'):
+            print(f"🛑 日期 {last_trade_date} 已存在，今日不寫入 (可能是週末或休市)。")
+            return # <--- 關鍵！直接結束函式，不存檔
+
+        # 3. 準備數據 (AI 訓練格式，欄位定義見 history_store.FIELDNAMES)
+        market_data = df.fetch_full_market_data(last_trade_date)
         short_yield = df.fetch_short_term_yield()
-        aaii_raw = results.get('AAII', "")
-        aaii_val = f"{aaii_raw[2]:.1f}" if isinstance(aaii_raw, tuple) and len(aaii_raw) >= 3 else extract_numeric_value(str(aaii_raw))
+
+        def v(key):
+            return as_result(key, results.get(key, "")).csv_value()
 
         row = {
             'Date': last_trade_date, # [使用真實交易日]
@@ -215,31 +139,17 @@ def save_csv(results):
             'NDX_Close':market_data.get('NDX_Close', ''),
             'NDX_Volume':market_data.get('NDX_Volume', ''),
             
-            '10Y_Yield': extract_numeric_value(str(results.get('BOND_10Y', ''))),
             '3M_Yield':  extract_numeric_value(short_yield),
-            
-            'RSI': extract_numeric_value(str(results.get('RSI', ''))),
-            'VIX': extract_numeric_value(str(results.get('VIX', ''))),
-            'CNN': extract_numeric_value(str(results.get('CNN', ''))),
-            'Put_Call': extract_numeric_value(str(results.get('PUT_CALL', ''))),
-            'DXY': extract_numeric_value(str(results.get('DXY', ''))),
-            'BTC_Chg': extract_numeric_value(str(results.get('BTC', ''))),
-            'HYG_Price': extract_numeric_value(str(results.get('HYG', ''))),
-            'Risk_Ratio': extract_numeric_value(str(results.get('RISK_RATIO', ''))),
-            'IWM_Price': extract_numeric_value(str(results.get('IWM', ''))),
-            'SOXX_Price': extract_numeric_value(str(results.get('SOXX', ''))),
-            'NAAIM': extract_numeric_value(str(results.get('NAAIM', ''))),
-            'SKEW': extract_numeric_value(str(results.get('SKEW', ''))),
-            'AAII_Diff': aaii_val,
-            'Above_200MA': extract_numeric_value(str(results.get('ABOVE_200_DAYS', '')))
         }
-
-        with open(file, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            if not os.path.exists(file) or os.stat(file).st_size == 0:
-                writer.writeheader()
-            writer.writerow(row)
-            
-        print(f"💾 數據已儲存至: {file}")
+        # 各指標欄位 (對照表見 history_store.INDICATOR_COLUMNS)
+        for key, column in history_store.INDICATOR_COLUMNS.items():
+            row[column] = v(key)
+
+        if existing:
+            # 併入既有的部分列：只填空白欄位，收割到的值保留
+            history_store.upsert([row])
+            print(f"💾 數據已併入 {last_trade_date} (原有部分欄位): {history_store.ROOT}")
+        elif history_store.append(row):
+            print(f"💾 數據已儲存至: {history_store.ROOT}")
 
     except Exception as e: print(f"CSV Error: {e}")